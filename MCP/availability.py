@@ -0,0 +1,245 @@
+"""Busy/free interval helpers shared by the calendar availability tools."""
+
+from __future__ import annotations
+
+import math
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import Any, Iterable, Mapping, Sequence
+from zoneinfo import ZoneInfo
+
+Interval = tuple[datetime, datetime]
+
+MAX_RANGE_DAYS = 62
+# freebusy.query accepts at most 50 calendars per request.
+FREEBUSY_MAX_ITEMS = 50
+
+
+def parse_datetime(value: str) -> datetime:
+    """Parse an RFC 3339 timestamp, treating naive values as UTC."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> list[Interval]:
+    """Merge overlapping or touching intervals in one pass over sorted input."""
+    merged: list[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_slots(
+    busy: Sequence[Interval], start: datetime, end: datetime
+) -> list[Interval]:
+    """Return the gaps between sorted ``busy`` intervals within ``[start, end)``."""
+    slots: list[Interval] = []
+    cur = start
+    for busy_start, busy_end in busy:
+        if busy_start >= end:
+            break
+        if busy_start > cur:
+            slots.append((cur, busy_start))
+        cur = max(cur, busy_end)
+    if cur < end:
+        slots.append((cur, end))
+    return slots
+
+
+def working_windows(
+    start_date: date, end_date: date, work_start: time, work_end: time, tz: tzinfo
+) -> list[tuple[date, datetime, datetime]]:
+    """Return ``(day, window_start, window_end)`` for each day in the range."""
+    windows = []
+    day = start_date
+    while day <= end_date:
+        windows.append(
+            (
+                day,
+                datetime.combine(day, work_start, tzinfo=tz),
+                datetime.combine(day, work_end, tzinfo=tz),
+            )
+        )
+        day += timedelta(days=1)
+    return windows
+
+
+def parse_range(
+    start_date: str, end_date: str | None, work_start: str, work_end: str, tz_name: str
+) -> tuple[date, date, time, time, ZoneInfo]:
+    """Validate range tool arguments, raising ``ValueError`` on bad input."""
+    first = date.fromisoformat(start_date)
+    last = date.fromisoformat(end_date) if end_date else first
+    if last < first:
+        raise ValueError("end_date is before start_date")
+    if (last - first).days >= MAX_RANGE_DAYS:
+        raise ValueError(f"Range is limited to {MAX_RANGE_DAYS} days")
+    day_start, day_end = time.fromisoformat(work_start), time.fromisoformat(work_end)
+    if day_end <= day_start:
+        raise ValueError("work_end must be after work_start")
+    return first, last, day_start, day_end, ZoneInfo(tz_name)
+
+
+def query_busy(
+    service: Any,
+    calendar_ids: Sequence[str],
+    time_min: datetime,
+    time_max: datetime,
+    tz_name: str = "UTC",
+) -> tuple[dict[str, list[Interval]], dict[str, Any]]:
+    """Fetch and merge busy intervals for ``calendar_ids`` in one freebusy call.
+
+    Returns ``(busy, errors)`` where ``busy`` maps each calendar id to its
+    merged intervals and ``errors`` holds any per-calendar errors reported by
+    the API.
+    """
+    busy: dict[str, list[Interval]] = {}
+    errors: dict[str, Any] = {}
+    ids = list(dict.fromkeys(calendar_ids))
+    for i in range(0, len(ids), FREEBUSY_MAX_ITEMS):
+        chunk = ids[i : i + FREEBUSY_MAX_ITEMS]
+        body = {
+            "timeMin": time_min.isoformat(),
+            "timeMax": time_max.isoformat(),
+            "timeZone": tz_name,
+            "items": [{"id": cid} for cid in chunk],
+        }
+        result = service.freebusy().query(body=body).execute()
+        for cid in chunk:
+            info = result.get("calendars", {}).get(cid, {})
+            if info.get("errors"):
+                errors[cid] = info["errors"]
+            busy[cid] = merge_intervals(
+                (parse_datetime(b["start"]), parse_datetime(b["end"]))
+                for b in info.get("busy", [])
+            )
+    return busy, errors
+
+
+def _minute_mask(intervals: Iterable[Interval], origin: datetime, minutes: int) -> int:
+    """Return an int whose bit ``i`` is set when minute ``i`` is covered.
+
+    ``origin`` must be in UTC. Subtracting datetimes that share a zone gives
+    wall-clock time, so intervals are converted too and a DST change inside
+    the range does not shift the map by an hour.
+    """
+    bits = 0
+    for start, end in intervals:
+        start, end = start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+        first = max(0, math.floor((start - origin).total_seconds() / 60))
+        last = min(minutes, math.ceil((end - origin).total_seconds() / 60))
+        if last > first:
+            bits |= ((1 << (last - first)) - 1) << first
+    return bits
+
+
+def find_common_slots(
+    busy_by_calendar: Mapping[str, Sequence[Interval]],
+    windows: Sequence[tuple[date, datetime, datetime]],
+    duration_minutes: int,
+    step_minutes: int = 30,
+    limit: int = 5,
+) -> list[Interval]:
+    """Return the earliest ``limit`` slots where every calendar is free.
+
+    Availability is intersected at minute resolution using Python integers
+    as bitmaps: one OR per calendar builds the combined busy map, and
+    ``log2(duration)`` shift/AND steps find every start minute followed by
+    ``duration_minutes`` free minutes. Starts are aligned to ``step_minutes``
+    from the first working window.
+    """
+    if not windows or duration_minutes <= 0:
+        return []
+    tz = windows[0][1].tzinfo
+    origin = windows[0][1].astimezone(timezone.utc)
+    last = windows[-1][2].astimezone(timezone.utc)
+    minutes = math.ceil((last - origin).total_seconds() / 60)
+    free = _minute_mask(((s, e) for _, s, e in windows), origin, minutes)
+    for intervals in busy_by_calendar.values():
+        free &= ~_minute_mask(intervals, origin, minutes)
+
+    # After this loop bit i is set iff minutes i .. i+duration-1 are all free.
+    covered = 1
+    while covered < duration_minutes:
+        shift = min(covered, duration_minutes - covered)
+        free &= free >> shift
+        covered += shift
+
+    step = max(1, step_minutes)
+    count = minutes // step + 1
+    # Geometric series: bits 0, step, 2*step, ... set.
+    aligned = ((1 << (step * count)) - 1) // ((1 << step) - 1)
+    candidates = free & aligned
+    slots: list[Interval] = []
+    while candidates and len(slots) < limit:
+        lowest = candidates & -candidates
+        offset = lowest.bit_length() - 1
+        start = origin + timedelta(minutes=offset)
+        end = start + timedelta(minutes=duration_minutes)
+        slots.append((start.astimezone(tz), end.astimezone(tz)))
+        candidates ^= lowest
+    return slots
+
+
+def range_availability(
+    busy: Sequence[Interval],
+    windows: Sequence[tuple[date, datetime, datetime]],
+    min_minutes: int = 0,
+) -> list[dict[str, Any]]:
+    """Return per-day busy and free slots for merged ``busy`` intervals.
+
+    Both ``busy`` and ``windows`` are sorted, so the whole range is covered in
+    a single forward pass over the busy list.
+    """
+    days = []
+    min_length = timedelta(minutes=min_minutes)
+    idx = 0
+    for day, window_start, window_end in windows:
+        while idx < len(busy) and busy[idx][1] <= window_start:
+            idx += 1
+        day_busy = []
+        j = idx
+        while j < len(busy) and busy[j][0] < window_end:
+            day_busy.append(
+                (max(busy[j][0], window_start), min(busy[j][1], window_end))
+            )
+            j += 1
+        free = [
+            (s, e)
+            for s, e in free_slots(day_busy, window_start, window_end)
+            if e - s >= min_length
+        ]
+        tz = window_start.tzinfo
+        days.append(
+            {
+                "date": day.isoformat(),
+                "busy": _as_dicts(day_busy, tz),
+                "free": _as_dicts(free, tz),
+            }
+        )
+    return days
+
+
+def _as_dicts(intervals: Iterable[Interval], tz: tzinfo | None) -> list[dict[str, str]]:
+    return [
+        {"start": s.astimezone(tz).isoformat(), "end": e.astimezone(tz).isoformat()}
+        for s, e in intervals
+    ]
+
+
+def format_range(days: Sequence[dict[str, Any]], tz_name: str) -> str:
+    """Render ``range_availability`` output as readable text."""
+    lines = [f"Availability ({tz_name}):"]
+    for day in days:
+        label = date.fromisoformat(day["date"]).strftime("%A, %B %d, %Y")
+        slots = [
+            f"{datetime.fromisoformat(s['start']).strftime('%I:%M %p')} - "
+            f"{datetime.fromisoformat(s['end']).strftime('%I:%M %p')}"
+            for s in day["free"]
+        ]
+        lines.append(f"\n{label}:")
+        lines.append("\n".join(slots) if slots else "No free time available")
+    return "\n".join(lines)
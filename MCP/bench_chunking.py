@@ -0,0 +1,75 @@
+"""Compare word-count chunking with token-budgeted message chunking.
+
+Generates ``--messages`` synthetic emails in the ``list_recent_emails`` text
+format and reports, for each strategy, how many chunks (LLM calls) are
+needed, how full they are in real tokens, and how many messages are cut.
+Also times cold and cached re-chunking::
+
+    python bench_chunking.py --messages 400 --budget 3000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from chunking import chunk_messages, get_tokenizer, split_messages
+
+_WORDS = (
+    "meeting invoice project update review please attached schedule thanks "
+    "quarterly deadline customer feedback release notes follow-up budget"
+).split()
+
+
+def _message(i: int, rng: random.Random) -> str:
+    body = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(20, 400)))
+    return (
+        f"Date: Mon, 19 May 2025 09:{i % 60:02d}:00 +0000\n"
+        f"From: sender{i}@example.com\nSubject: Item {i}\nLabels: INBOX\n{body}"
+    )
+
+
+def word_chunks(text: str, chunk_words: int) -> list[str]:
+    """The previous strategy: fixed word counts, newlines discarded."""
+    words = text.split()
+    return [
+        " ".join(words[i : i + chunk_words]) for i in range(0, len(words), chunk_words)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=400)
+    parser.add_argument("--budget", type=int, default=3000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    text = "\n\n".join(_message(i, rng) for i in range(args.messages))
+    tokenizer = get_tokenizer()
+    messages = split_messages(text)
+    print(f"tokenizer: {'tiktoken' if tokenizer.exact else 'regex estimate'}")
+    print(f"budget: {args.budget} tokens")
+
+    # The previous code used the token budget as a word count.
+    for label, chunks in (
+        ("words", word_chunks(text, args.budget)),
+        ("messages", chunk_messages(text, args.budget)),
+    ):
+        sizes = [tokenizer.count(c) for c in chunks]
+        cut = sum(1 for m in messages if not any(m in c for c in chunks))
+        print(
+            f"{label:<9} {len(chunks):>4} chunks  max {max(sizes):>5} tokens  "
+            f"mean fill {sum(sizes) / len(sizes) / args.budget:6.1%}  "
+            f"{cut} messages cut"
+        )
+
+    tokenizer.count.cache_clear()
+    for label in ("cold", "cached"):
+        start = time.perf_counter()
+        chunk_messages(text, args.budget)
+        print(f"{label:<9} {(time.perf_counter() - start) * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Measure tokens removed by prompt compression on a synthetic mailbox.
+
+Generates ``--messages`` emails in the ``list_recent_emails`` text format,
+mixing real content with quoted replies, signatures, legal footers,
+unsubscribe blurbs and invisible preheader padding, then reports tokens
+saved per stage, with and without ``condense_repetitive_messages``::
+
+    python bench_compression.py --messages 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from chunking import get_tokenizer
+from compression import CompressionPipeline
+from email_utils import condense_repetitive_messages
+
+_CONTENT = (
+    "Can we move the project review to Thursday afternoon?",
+    "The invoice for May is attached; payment is due in 30 days.",
+    "Release notes for version 2.4 are ready for your feedback.",
+    "Your order has shipped and should arrive on Friday.",
+    "Reminder: the quarterly budget is due at the end of the week.",
+)
+_NOISE = (
+    " On Mon, May 19, 2025 at 9:00 AM Alex Smith &lt;alex@example.com&gt; wrote:"
+    " &gt; Thanks for the update, see my notes below. &gt; Can you confirm the date?",
+    "\nBest regards,\nJordan Lee\nProject Manager | Example Corp\n+1 555 0100",
+    " CONFIDENTIALITY NOTICE: This email and any attachments are confidential and"
+    " intended solely for the addressee. If you received it in error, delete it.",
+    " You are receiving this email because you subscribed at example.com."
+    " Unsubscribe or manage your preferences here.",
+    " Sent from my iPhone",
+)
+# Invisible preheader padding used by marketing mail.
+_PADDING = "\u034f \u200c " * 20
+
+
+def _message(i: int, rng: random.Random) -> str:
+    body = rng.choice(_CONTENT)
+    if rng.random() < 0.3:
+        body = _PADDING + body
+    for noise in rng.sample(_NOISE, rng.randint(0, 3)):
+        body += noise
+    return (
+        f"Date: Mon, 19 May 2025 09:{i % 60:02d}:00 +0000\n"
+        f"From: sender{i % 25}@example.com\nSubject: Item {i % 40}\n"
+        f"Labels: INBOX\n{body}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    text = "\n\n".join(_message(i, rng) for i in range(args.messages))
+    count = get_tokenizer().count
+    print(f"tokenizer: {'tiktoken' if get_tokenizer().exact else 'regex estimate'}")
+    for label, source in (
+        ("raw", text),
+        ("condensed", condense_repetitive_messages(text)),
+    ):
+        start = time.perf_counter()
+        _, report = CompressionPipeline().compress(source)
+        elapsed = (time.perf_counter() - start) * 1000
+        before, after = report["tokens_before"], report["tokens_after"]
+        print(
+            f"{label:<10} {count(text):>6} -> {before:>6} -> {after:>6} tokens "
+            f"({1 - after / count(text):5.1%} saved)  {elapsed:7.1f}ms"
+        )
+        for stage, saved in report["saved"].items():
+            print(f"  {stage:<16} {saved:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Time the offline extractive provider and its pre-pass on synthetic emails.
+
+Generates mailboxes of ``--messages`` sizes in the ``list_recent_emails``
+text format, then reports how long an extractive summary takes, how many
+tokens ``shrink_messages`` removes at ``--ratio``, and whether NumPy was
+used. Output is deterministic for a given seed::
+
+    python bench_extractive.py --messages 10,50,200 --ratio 0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+import extractive
+from chunking import get_tokenizer
+
+_TOPICS = {
+    "budget": (
+        "The quarterly budget review moved to Thursday and finance needs the figures"
+    ),
+    "release": "Release notes for version two are ready for review before the deadline",
+    "customer": "A customer reported a billing issue and asked for a follow-up call",
+    "travel": "Travel requests for the conference must be approved by Friday",
+}
+_FILLER = (
+    "Thanks for the update.",
+    "Let me know if you have questions.",
+    "Looping in the team for visibility.",
+    "Sent from my phone.",
+)
+
+
+def _message(i: int, rng: random.Random) -> str:
+    topic = rng.choice(sorted(_TOPICS))
+    body = [f"{_TOPICS[topic]}."]
+    body += [rng.choice(_FILLER) for _ in range(rng.randint(1, 4))]
+    rng.shuffle(body)
+    return (
+        f"Date: Mon, 19 May 2025 09:{i % 60:02d}:00 +0000\n"
+        f"From: sender{i}@example.com\nSubject: {topic.title()} {i}\n"
+        f"Labels: INBOX\n{' '.join(body)}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", default="10,50,200")
+    parser.add_argument("--ratio", type=float, default=0.5)
+    parser.add_argument("--sentences", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    count = get_tokenizer().count
+    print(f"ranking: {'numpy' if extractive.np is not None else 'pure python'}")
+    for size in (int(m) for m in args.messages.split(",")):
+        rng = random.Random(args.seed)
+        text = "\n\n".join(_message(i, rng) for i in range(size))
+        start = time.perf_counter()
+        extractive.summarize(text, args.sentences)
+        summary_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        shrunk = extractive.shrink_messages(text, args.ratio)
+        shrink_ms = (time.perf_counter() - start) * 1000
+        before, after = count(text), count(shrunk)
+        print(
+            f"{size:>5} messages  summary {summary_ms:8.1f}ms  "
+            f"pre-pass {shrink_ms:8.1f}ms  tokens {before:>6} -> {after:>6} "
+            f"({1 - after / before:5.1%} saved)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Compare sequential and batched Gmail metadata fetches on a stubbed transport.
+
+Each HTTP round trip sleeps for ``--latency`` seconds, so the numbers show how
+wall time grows with message count for both strategies::
+
+    python bench_gmail_batch.py --latency 0.02 --counts 10,50,100
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Callable
+
+from gmail_batch import fetch_message_metadata
+
+
+class _StubRequest:
+    def __init__(self, transport: "_StubTransport", message_id: str) -> None:
+        self.transport = transport
+        self.message_id = message_id
+
+    def response(self) -> dict[str, Any]:
+        return {"id": self.message_id, "snippet": "hello", "payload": {}}
+
+    def execute(self) -> dict[str, Any]:
+        self.transport.round_trip()
+        return self.response()
+
+
+class _StubBatch:
+    def __init__(
+        self, transport: "_StubTransport", callback: Callable[..., None]
+    ) -> None:
+        self.transport = transport
+        self.callback = callback
+        self.requests: list[tuple[str, _StubRequest]] = []
+
+    def add(self, request: _StubRequest, request_id: str) -> None:
+        self.requests.append((request_id, request))
+
+    def execute(self) -> None:
+        self.transport.round_trip()
+        for request_id, request in self.requests:
+            self.callback(request_id, request.response(), None)
+
+
+class _StubTransport:
+    """Just enough of the Gmail service surface for the fetch paths."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.round_trips = 0
+
+    def round_trip(self) -> None:
+        self.round_trips += 1
+        time.sleep(self.latency)
+
+    def users(self) -> "_StubTransport":
+        return self
+
+    def messages(self) -> "_StubTransport":
+        return self
+
+    def get(self, **kwargs: Any) -> _StubRequest:
+        return _StubRequest(self, kwargs["id"])
+
+    def new_batch_http_request(self, callback: Callable[..., None]) -> _StubBatch:
+        return _StubBatch(self, callback)
+
+
+def fetch_sequential(service: _StubTransport, ids: list[str]) -> list[Any]:
+    """The pre-batching code path: one ``get`` round trip per message."""
+    return [
+        service.users().messages().get(userId="me", id=mid).execute() for mid in ids
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--counts", default="10,25,50,100,200")
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    print(
+        f"{'messages':>8} {'sequential':>12} {'trips':>6} {'batched':>10} {'trips':>6}"
+    )
+    for count in (int(c) for c in args.counts.split(",")):
+        ids = [str(i) for i in range(count)]
+
+        seq = _StubTransport(args.latency)
+        start = time.perf_counter()
+        fetch_sequential(seq, ids)
+        seq_time = time.perf_counter() - start
+
+        batched = _StubTransport(args.latency)
+        start = time.perf_counter()
+        fetch_message_metadata(batched, ids, batch_size=args.batch_size)
+        batch_time = time.perf_counter() - start
+
+        print(
+            f"{count:>8} {seq_time * 1000:>10.1f}ms {seq.round_trips:>6} "
+            f"{batch_time * 1000:>8.1f}ms {batched.round_trips:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
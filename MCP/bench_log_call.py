@@ -0,0 +1,111 @@
+"""Compare per-call cost of ``log_call`` against the previous implementation.
+
+The previous version walked the stack with ``inspect.stack()``, redacted and
+JSON-encoded the payload, and wrote to the file on the caller's thread::
+
+    python bench_log_call.py --calls 2000 --messages 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import inspect
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Mapping
+
+os.environ.setdefault("MCP_LOG_DIR", tempfile.mkdtemp(prefix="bench_log_"))
+
+import logger_utils  # noqa: E402
+
+
+def _legacy_logger() -> logging.Logger:
+    legacy = logging.getLogger("bench_legacy")
+    handler = logging.FileHandler(logger_utils.LOG_DIR / "legacy.log")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    legacy.addHandler(handler)
+    legacy.setLevel(logging.INFO)
+    legacy.propagate = False
+    return legacy
+
+
+_legacy = _legacy_logger()
+
+
+def _redact(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {
+            k: "[REDACTED]" if k.lower() in logger_utils.SENSITIVE_KEYS else _redact(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_redact(v) for v in value]
+    return value
+
+
+def legacy_log_call(name: str, request: Any, response: Any) -> None:
+    frame = inspect.stack()[1]
+    module = inspect.getmodule(frame[0])
+    entry = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "module": module.__name__ if module else "__main__",
+        "name": name,
+        "request": _redact(request),
+        "response": _redact(response),
+    }
+    _legacy.info(json.dumps(entry))
+
+
+def _payload(messages: int) -> dict[str, Any]:
+    return {
+        "type": "text",
+        "messages": [
+            {
+                "id": str(i),
+                "labelIds": ["INBOX", "UNREAD"],
+                "snippet": "lorem ipsum " * 20,
+                "payload": {
+                    "headers": [
+                        {"name": "Subject", "value": f"Message {i}"},
+                        {"name": "From", "value": "someone@example.com"},
+                    ]
+                },
+            }
+            for i in range(messages)
+        ],
+    }
+
+
+def _time(func: Any, calls: int, payload: dict[str, Any]) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func("list_recent_emails", {"query": "newer_than:1d"}, payload)
+    return (time.perf_counter() - start) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--messages", default="0,10,50")
+    args = parser.parse_args()
+
+    print(f"{'messages':>8} {'legacy':>10} {'log_call':>10} {'drain':>9}")
+    for count in (int(m) for m in args.messages.split(",")):
+        payload = _payload(count)
+        legacy = _time(legacy_log_call, args.calls, payload)
+        current = _time(logger_utils.log_call, args.calls, payload)
+        start = time.perf_counter()
+        logger_utils.flush()
+        drain = time.perf_counter() - start
+        print(
+            f"{count:>8} {legacy * 1e6:>8.1f}us {current * 1e6:>8.1f}us"
+            f" {drain * 1000:>7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
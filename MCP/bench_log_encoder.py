@@ -0,0 +1,95 @@
+"""Compare redacted JSON encoding of multi-megabyte payloads.
+
+``legacy`` is the previous ``json.dumps(_redact(payload))``; ``streaming``
+is ``log_encoder.write_redacted_json`` into a discarding writer, as used when
+payloads are truncated; ``bounded`` is the full ``logger_utils`` path::
+
+    python bench_log_encoder.py --messages 2000,10000,40000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Mapping
+
+os.environ.setdefault("MCP_LOG_DIR", tempfile.mkdtemp(prefix="bench_log_"))
+
+import logger_utils  # noqa: E402
+from log_encoder import write_redacted_json  # noqa: E402
+
+
+def _redact(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {
+            k: "[REDACTED]" if k.lower() in logger_utils.SENSITIVE_KEYS else _redact(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_redact(v) for v in value]
+    return value
+
+
+def _payload(messages: int) -> dict[str, Any]:
+    return {
+        "list_results": [{"messages": [{"id": str(i)} for i in range(messages)]}],
+        "messages": [
+            {
+                "id": str(i),
+                "threadId": f"t{i}",
+                "labelIds": ["INBOX", "UNREAD"],
+                "snippet": "lorem ipsum dolor sit amet " * 8,
+                "payload": {
+                    "headers": [
+                        {"name": "Subject", "value": f"Message {i}"},
+                        {"name": "From", "value": "someone@example.com"},
+                        {"name": "Date", "value": "Mon, 19 May 2025 10:00:00 +0000"},
+                    ]
+                },
+            }
+            for i in range(messages)
+        ],
+    }
+
+
+def _measure(func: Callable[[], Any], repeat: int) -> tuple[float, float]:
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", default="2000,10000,40000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    matcher = logger_utils._is_sensitive
+    print(f"{'size':>8} {'variant':>10} {'time':>10} {'peak mem':>10}")
+    for count in (int(m) for m in args.messages.split(",")):
+        payload = _payload(count)
+        size = len(json.dumps(payload)) / 1e6
+        variants = {
+            "legacy": lambda: json.dumps(_redact(payload)),
+            "streaming": lambda: write_redacted_json(payload, len, matcher),
+            "bounded": lambda: logger_utils._bounded_json(payload),
+        }
+        for name, func in variants.items():
+            seconds, peak = _measure(func, args.repeat)
+            print(
+                f"{size:>6.1f}MB {name:>10} {seconds * 1000:>8.1f}ms"
+                f" {peak / 1e6:>8.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
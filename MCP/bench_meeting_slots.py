@@ -0,0 +1,64 @@
+"""Time find_common_slots on synthetic calendars.
+
+Each attendee gets ``--meetings`` random busy blocks per working day::
+
+    python bench_meeting_slots.py --attendees 5,20,50 --days 7,30
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as dtime
+from zoneinfo import ZoneInfo
+
+from availability import Interval, find_common_slots, merge_intervals, working_windows
+
+
+def synthetic_busy(
+    windows: list[tuple[date, datetime, datetime]], meetings: int, rng: random.Random
+) -> list[Interval]:
+    blocks = []
+    for _, start, _ in windows:
+        for _ in range(meetings):
+            begin = start + timedelta(minutes=rng.randrange(0, 8 * 60, 15))
+            blocks.append((begin, begin + timedelta(minutes=rng.choice((15, 30, 60)))))
+    return merge_intervals(blocks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attendees", default="5,20,50")
+    parser.add_argument("--days", default="7,30")
+    parser.add_argument("--meetings", type=int, default=2)
+    parser.add_argument("--duration", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    tz = ZoneInfo("UTC")
+    print(f"{'attendees':>9} {'days':>5} {'per call':>10} {'slots':>6}")
+    for days in (int(d) for d in args.days.split(",")):
+        windows = working_windows(
+            date(2025, 6, 2),
+            date(2025, 6, 2) + timedelta(days=days - 1),
+            dtime(9),
+            dtime(17),
+            tz,
+        )
+        for count in (int(a) for a in args.attendees.split(",")):
+            busy = {
+                f"user{i}": synthetic_busy(windows, args.meetings, rng)
+                for i in range(count)
+            }
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                slots = find_common_slots(busy, windows, args.duration, limit=10)
+            per_call = (time.perf_counter() - start) / args.repeat
+            print(f"{count:>9} {days:>5} {per_call * 1000:>8.2f}ms {len(slots):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Measure workspace server cold-start cost.
+
+Reports, over ``--repeat`` fresh interpreters:
+
+* import: time to ``import workspace_mcp_server``
+* ready: time from spawning ``workspace_mcp_server.py`` until ``/tools``
+  answers, which is what the CLI and web GUI wait on
+* first use: time for the first attribute access on each Google service
+
+::
+
+    python bench_startup.py --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+MCP_DIR = Path(__file__).resolve().parent
+
+_IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import workspace_mcp_server as server
+imported = time.perf_counter()
+server.gmail_service.users
+server.calendar_service.events
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def _env() -> dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("MCP_GMAIL_MIRROR_PATH", ":memory:")
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import() -> tuple[float, float]:
+    out = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SNIPPET],
+        cwd=MCP_DIR,
+        env=_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imported, first_use = out.stdout.split()[-2:]
+    return float(imported), float(first_use)
+
+
+def measure_ready(timeout: float = 30.0) -> float:
+    port = _free_port()
+    env = {**_env(), "PORT": str(port)}
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, str(MCP_DIR / "workspace_mcp_server.py")],
+        cwd=MCP_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                requests.get(f"http://127.0.0.1:{port}/tools", timeout=1)
+                return time.perf_counter() - start
+            except requests.ConnectionError:
+                time.sleep(0.01)
+        raise RuntimeError("server did not become ready")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def _summary(label: str, samples: list[float]) -> str:
+    return (
+        f"{label:<10} median {statistics.median(samples) * 1000:8.1f}ms"
+        f"  min {min(samples) * 1000:8.1f}ms  max {max(samples) * 1000:8.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    imports, first_uses, ready = [], [], []
+    for _ in range(args.repeat):
+        imported, first_use = measure_import()
+        imports.append(imported)
+        first_uses.append(first_use)
+        ready.append(measure_ready())
+    print(_summary("import", imports))
+    print(_summary("ready", ready))
+    print(_summary("first use", first_uses))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compare sequential and map-reduce chunk summarization on a stubbed LLM.
+
+Each LLM call sleeps for ``--latency`` seconds plus up to ``--jitter``, so the
+numbers show wall time against chunk count::
+
+    python bench_summarizer.py --latency 0.2 --chunks 4,10,40 --concurrency 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+
+from summarizer import FINAL_PROMPT, MapReduceSummarizer
+
+
+class _StubLLM:
+    def __init__(self, latency: float, jitter: float) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def ask(self, question: str, text: str) -> str:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+        return f"summary of {len(text.split())} words"
+
+
+def sequential(ask, question: str, chunks: list[str]) -> str:
+    """The previous implementation: one chunk after another, then reduce."""
+    parts = [ask(question, chunk) for chunk in chunks]
+    return ask(FINAL_PROMPT.format(question=question), "\n".join(parts))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--chunks", default="4,10,40")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--fan-in", type=int, default=8)
+    args = parser.parse_args()
+
+    question = "Summarize these emails."
+    for count in (int(c) for c in args.chunks.split(",")):
+        chunks = [f"chunk {i}" for i in range(count)]
+        for label, run in (
+            ("sequential", lambda ask: sequential(ask, question, chunks)),
+            (
+                "map-reduce",
+                lambda ask: MapReduceSummarizer(
+                    ask, max_in_flight=args.concurrency, fan_in=args.fan_in
+                ).summarize_chunks(question, chunks),
+            ),
+        ):
+            llm = _StubLLM(args.latency, args.jitter)
+            start = time.perf_counter()
+            run(llm.ask)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{count:>4} chunks  {label:<10} {elapsed:7.2f}s  {llm.calls:>3} calls"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Load test: mixed concurrent tool calls, inline versus the worker pool.
+
+Google services are replaced by stubs that sleep for ``--latency`` seconds per
+HTTP round trip. ``inline`` runs the handler directly on the event loop, as
+``call_tool`` did before the worker pool; ``pool`` goes through ``call_tool``::
+
+    python bench_tool_pool.py --emails 20 --availability 20 --latency 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, Callable
+
+os.environ.setdefault("MCP_LOG_DIR", tempfile.mkdtemp())
+
+import workspace_mcp_server as server  # noqa: E402
+
+
+class _Call:
+    def __init__(self, latency: float, result: Any) -> None:
+        self.latency = latency
+        self.result = result
+
+    def execute(self, http: Any = None) -> Any:
+        time.sleep(self.latency)
+        return self.result
+
+
+class _Batch:
+    def __init__(self, latency: float, callback: Callable[..., None]) -> None:
+        self.latency = latency
+        self.callback = callback
+        self.calls: list[tuple[str, _Call]] = []
+
+    def add(self, request: _Call, request_id: str) -> None:
+        self.calls.append((request_id, request))
+
+    def execute(self, http: Any = None) -> None:
+        time.sleep(self.latency)
+        for request_id, call in self.calls:
+            self.callback(request_id, call.result, None)
+
+
+class _Gmail:
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    def users(self) -> "_Gmail":
+        return self
+
+    def labels(self) -> "_Gmail._Labels":
+        return self._Labels(self.latency)
+
+    def messages(self) -> "_Gmail._Messages":
+        return self._Messages(self.latency)
+
+    def new_batch_http_request(self, callback: Callable[..., None]) -> _Batch:
+        return _Batch(self.latency, callback)
+
+    class _Labels:
+        def __init__(self, latency: float) -> None:
+            self.latency = latency
+
+        def list(self, **kwargs: Any) -> _Call:
+            labels = [{"id": "INBOX", "name": "Inbox"}]
+            return _Call(self.latency, {"labels": labels})
+
+    class _Messages:
+        def __init__(self, latency: float) -> None:
+            self.latency = latency
+
+        def list(self, **kwargs: Any) -> _Call:
+            ids = [{"id": str(i)} for i in range(kwargs.get("maxResults", 10))]
+            return _Call(self.latency, {"messages": ids})
+
+        def get(self, **kwargs: Any) -> _Call:
+            return _Call(self.latency, {"id": kwargs["id"], "snippet": "hi"})
+
+
+class _Calendar:
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    def events(self) -> "_Calendar":
+        return self
+
+    def list(self, **kwargs: Any) -> _Call:
+        return _Call(self.latency, {"items": []})
+
+
+def _payloads(emails: int, availability: int) -> list[dict[str, Any]]:
+    mixed: list[dict[str, Any]] = []
+    for i in range(max(emails, availability)):
+        if i < emails:
+            mixed.append({"name": "list_recent_emails", "arguments": {}})
+        if i < availability:
+            mixed.append(
+                {"name": "check_day_availability", "arguments": {"date": "2025-05-19"}}
+            )
+    return mixed
+
+
+async def _timed(
+    call: Callable[[], Any], name: str, start: float, out: dict[str, list[float]]
+) -> None:
+    """Record completion time relative to when the whole burst was submitted."""
+    await call()
+    out.setdefault(name, []).append(time.perf_counter() - start)
+
+
+async def _run(mode: str, payloads: list[dict[str, Any]]) -> dict[str, list[float]]:
+    latencies: dict[str, list[float]] = {}
+
+    def make(payload: dict[str, Any]) -> Callable[[], Any]:
+        if mode == "pool":
+            return lambda: server.call_tool(payload)
+
+        async def inline() -> Any:
+            spec = server.registry.get(payload["name"])
+            return server._dispatch(spec.name, spec.validate(payload["arguments"]))
+
+        return inline
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(_timed(make(p), p["name"], start, latencies) for p in payloads)
+    )
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=20)
+    parser.add_argument("--availability", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server.gmail_service = _Gmail(args.latency)
+    server.calendar_service = _Calendar(args.latency)
+    payloads = _payloads(args.emails, args.availability)
+
+    for mode in ("inline", "pool"):
+        start = time.perf_counter()
+        latencies = asyncio.run(_run(mode, payloads))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{mode:>6}: {len(payloads)} calls in {elapsed:.2f}s "
+            f"({len(payloads) / elapsed:.1f} calls/s)"
+        )
+        for name, values in sorted(latencies.items()):
+            print(
+                f"        {name:<24} p50 {statistics.median(values) * 1000:7.1f}ms"
+                f"  max {max(values) * 1000:7.1f}ms"
+            )
+    print(f"pool stats: {server.tool_pool.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
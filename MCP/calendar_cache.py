@@ -0,0 +1,169 @@
+"""In-memory Google Calendar event cache kept current with sync tokens."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from gmail_batch import http_status
+
+
+def parse_time(value: str) -> float:
+    """Return a UTC timestamp for an RFC 3339 datetime or ``YYYY-MM-DD`` date."""
+    if len(value) == 10:
+        value += "T00:00:00+00:00"
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def event_bounds(event: dict[str, Any]) -> tuple[float, float]:
+    """Return ``(start, end)`` timestamps for a timed or all-day event."""
+    start = event.get("start", {})
+    end = event.get("end", {})
+    start_ts = parse_time(start.get("dateTime") or start["date"])
+    end_value = end.get("dateTime") or end.get("date")
+    return start_ts, parse_time(end_value) if end_value else start_ts
+
+
+@dataclass
+class _CalendarState:
+    events: dict[str, dict[str, Any]] = field(default_factory=dict)
+    sync_token: str | None = None
+    synced_at: float = 0.0
+    # Sorted index: parallel lists ordered by start time.
+    starts: list[float] = field(default_factory=list)
+    entries: list[tuple[float, float, str]] = field(default_factory=list)
+    max_span: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def reindex(self) -> None:
+        entries = []
+        for event_id, event in self.events.items():
+            try:
+                start, end = event_bounds(event)
+            except (KeyError, ValueError):
+                continue
+            entries.append((start, end, event_id))
+        entries.sort()
+        self.entries = entries
+        self.starts = [start for start, _, _ in entries]
+        self.max_span = max((end - start for start, end, _ in entries), default=0.0)
+
+
+class CalendarCache:
+    """Serve event range queries from a per-calendar sorted index.
+
+    The first query for a calendar performs a full ``events.list`` sync and
+    keeps the returned ``nextSyncToken``. Later queries older than
+    ``max_age`` seconds apply only the incremental changes since that token;
+    a full resync happens only when Google expires the token (HTTP 410).
+    """
+
+    def __init__(self, max_age: float = 60.0) -> None:
+        self.max_age = max_age
+        self._calendars: dict[str, _CalendarState] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "incremental_syncs": 0,
+            "full_syncs": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "CalendarCache":
+        return cls(max_age=float(os.getenv("MCP_CALENDAR_CACHE_MAX_AGE", "60")))
+
+    def _state(self, calendar_id: str) -> _CalendarState:
+        with self._lock:
+            state = self._calendars.get(calendar_id)
+            if state is None:
+                state = self._calendars[calendar_id] = _CalendarState()
+            return state
+
+    def clear(self) -> None:
+        with self._lock:
+            self._calendars.clear()
+
+    def mark_stale(self, calendar_id: str) -> None:
+        """Make the next query for ``calendar_id`` fetch incremental changes."""
+        self._state(calendar_id).synced_at = 0.0
+
+    def events_between(
+        self,
+        service: Any,
+        calendar_id: str,
+        time_min: str | None = None,
+        time_max: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return events overlapping ``[time_min, time_max)`` ordered by start."""
+        state = self._state(calendar_id)
+        with state.lock:
+            if state.sync_token is None:
+                self.stats["misses"] += 1
+                self._sync(service, calendar_id, state)
+            else:
+                self.stats["hits"] += 1
+                if time.monotonic() - state.synced_at >= self.max_age:
+                    self._sync(service, calendar_id, state)
+            lo_ts = parse_time(time_min) if time_min else float("-inf")
+            hi_ts = parse_time(time_max) if time_max else float("inf")
+            first = bisect_left(state.starts, lo_ts - state.max_span)
+            last = bisect_left(state.starts, hi_ts)
+            return [
+                state.events[event_id]
+                for _, end, event_id in state.entries[first:last]
+                if end > lo_ts
+            ]
+
+    def _sync(self, service: Any, calendar_id: str, state: _CalendarState) -> None:
+        if state.sync_token is not None:
+            try:
+                self._fetch(service, calendar_id, state, state.sync_token)
+                self.stats["incremental_syncs"] += 1
+                return
+            except Exception as exc:
+                if http_status(exc) != 410:  # sync token expired
+                    raise
+        state.events.clear()
+        self._fetch(service, calendar_id, state, None)
+        self.stats["full_syncs"] += 1
+
+    def _fetch(
+        self,
+        service: Any,
+        calendar_id: str,
+        state: _CalendarState,
+        sync_token: str | None,
+    ) -> None:
+        page_token: str | None = None
+        while True:
+            kwargs: dict[str, Any] = {
+                "calendarId": calendar_id,
+                "singleEvents": True,
+                "maxResults": 2500,
+            }
+            if sync_token:
+                kwargs["syncToken"] = sync_token
+            if page_token:
+                kwargs["pageToken"] = page_token
+            result = service.events().list(**kwargs).execute()
+            for event in result.get("items", []):
+                event_id = event.get("id") or f"_{len(state.events)}"
+                if event.get("status") == "cancelled":
+                    state.events.pop(event_id, None)
+                else:
+                    state.events[event_id] = event
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                break
+        state.sync_token = result.get("nextSyncToken")
+        state.synced_at = time.monotonic()
+        state.reindex()
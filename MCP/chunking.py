@@ -0,0 +1,133 @@
+"""Token-budgeted chunking of email text along message boundaries."""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Callable
+
+DEFAULT_MODEL = "gpt-4o"
+# Messages from list_recent_emails are separated by a blank line and start
+# with their Date header; a blank line alone may also occur inside a body.
+_MESSAGE_BREAK = re.compile(r"\n\s*\n(?=Date: )")
+_SEPARATOR = "\n\n"
+# Rough GPT-style pre-tokenization used when tiktoken is unavailable.
+_PIECES = re.compile(r"\s*[A-Za-z]+|\s*\d{1,3}|\s*[^\sA-Za-z\d]+|\s+")
+
+
+def _estimate(piece: str) -> int:
+    # BPE vocabularies hold most English words (with their leading space) as
+    # one token; long words and punctuation runs take more.
+    stripped = piece.strip()
+    if not stripped:
+        return 1
+    if stripped[0].isalnum():
+        return 1 + len(stripped) // 10
+    return (len(stripped) + 1) // 2
+
+
+class Tokenizer:
+    """Count and split text in model tokens.
+
+    Uses tiktoken's encoding for ``model`` when the package and its encoding
+    files are available. Otherwise tokens are estimated from a GPT-style
+    pre-tokenization, erring high so chunks stay within the context window.
+    Counts are memoized per string.
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL) -> None:
+        self.model = model
+        self._encoding = _load_encoding(model)
+        self.exact = self._encoding is not None
+        self.count: Callable[[str], int] = lru_cache(maxsize=8192)(self._count)
+
+    def _count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return sum(_estimate(p) for p in _PIECES.findall(text))
+
+    def split(self, text: str, budget: int) -> list[str]:
+        """Cut ``text`` into consecutive pieces of at most ``budget`` tokens."""
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            return [
+                self._encoding.decode(tokens[i : i + budget])
+                for i in range(0, len(tokens), budget)
+            ]
+        return _pack(_PIECES.findall(text), self._count, budget, "")
+
+
+def _load_encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Encoding files are downloaded on first use; offline, fall back.
+        return None
+
+
+@lru_cache(maxsize=8)
+def get_tokenizer(model: str = DEFAULT_MODEL) -> Tokenizer:
+    """Return the shared tokenizer for ``model``."""
+    return Tokenizer(model)
+
+
+def _pack(
+    items: list[str], count: Callable[[str], int], budget: int, separator: str
+) -> list[str]:
+    """Greedily join ``items`` into groups of at most ``budget`` tokens."""
+    sep_cost = count(separator) if separator else 0
+    chunks: list[str] = []
+    current: list[str] = []
+    used = 0
+    for item in items:
+        cost = count(item)
+        if current and used + sep_cost + cost > budget:
+            chunks.append(separator.join(current))
+            current, used = [], 0
+        used += cost + (sep_cost if current else 0)
+        current.append(item)
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+
+def split_messages(text: str) -> list[str]:
+    """Split ``list_recent_emails`` text into individual messages."""
+    return [m.strip() for m in _MESSAGE_BREAK.split(text.strip()) if m.strip()]
+
+
+def _split_message(message: str, tokenizer: Tokenizer, budget: int) -> list[str]:
+    # Prefer line breaks so headers stay intact; cut inside a line only when
+    # the line alone exceeds the budget.
+    lines: list[str] = []
+    for line in message.split("\n"):
+        if tokenizer.count(line) > budget:
+            lines.extend(tokenizer.split(line, budget))
+        else:
+            lines.append(line)
+    return _pack(lines, tokenizer.count, budget, "\n")
+
+
+def chunk_messages(
+    text: str, budget: int, tokenizer: Tokenizer | None = None
+) -> list[str]:
+    """Pack whole messages into chunks of at most ``budget`` tokens.
+
+    Messages are never reordered and only a message larger than ``budget``
+    on its own is split.
+    """
+    tokenizer = tokenizer or get_tokenizer()
+    pieces: list[str] = []
+    for message in split_messages(text):
+        if tokenizer.count(message) > budget:
+            pieces.extend(_split_message(message, tokenizer, budget))
+        else:
+            pieces.append(message)
+    return _pack(pieces, tokenizer.count, budget, _SEPARATOR)
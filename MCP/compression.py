@@ -0,0 +1,228 @@
+"""Strip quoted replies, signatures and boilerplate from email prompt text."""
+
+from __future__ import annotations
+
+import html
+import os
+import re
+from typing import Any, Callable, Iterable
+
+from chunking import get_tokenizer, split_messages
+
+_HEADER = re.compile(r"^(?:Date|From|To|Cc|Subject|Labels):")
+_FLAGS = re.IGNORECASE | re.MULTILINE
+# Sentence ends, kept as separate pieces so text can be rejoined unchanged.
+# A period inside "shop.com" is not followed by whitespace and does not split.
+_SENTENCES = re.compile(r"((?<=[.!?])\s+|\n)")
+_PARAGRAPH = re.compile(r"\n[ \t]*\n")
+
+
+class RuleSet:
+    """A named group of compiled patterns applied to a message body.
+
+    ``cut`` patterns drop everything from their first match to the end of
+    the body (quoted threads only ever trail the new text); ``footer``
+    patterns do the same, but only for a match in the last paragraph with
+    other text before it; ``remove`` patterns delete just the matched text;
+    ``drop`` patterns delete every sentence they occur in. Patterns must
+    match structure (a quote marker, a sign-off line, footer wording), not
+    words that also occur in ordinary sentences.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        cut: Iterable[str] = (),
+        remove: Iterable[str] = (),
+        drop: Iterable[str] = (),
+        footer: Iterable[str] = (),
+    ) -> None:
+        self.name = name
+        self.cut = [re.compile(p, _FLAGS | re.DOTALL) for p in cut]
+        self.footer = [re.compile(p, _FLAGS) for p in footer]
+        self.remove = [re.compile(p, _FLAGS) for p in remove]
+        self.drop = [re.compile(p, _FLAGS) for p in drop]
+
+    def __call__(self, body: str) -> str:
+        for pattern in self.cut:
+            match = pattern.search(body)
+            if match:
+                body = body[: match.start()]
+        if self.footer:
+            breaks = list(_PARAGRAPH.finditer(body))
+            last = breaks[-1].end() if breaks else 0
+            for pattern in self.footer:
+                match = pattern.search(body, last)
+                if match and body[: match.start()].strip():
+                    body = body[: match.start()]
+        for pattern in self.remove:
+            body = pattern.sub("", body)
+        if self.drop:
+            pieces = _SENTENCES.split(body)
+            # Odd indexes are the separators captured by the split.
+            body = "".join(
+                piece
+                for i, piece in enumerate(pieces)
+                if i % 2 or not any(p.search(piece) for p in self.drop)
+            )
+        return body
+
+
+# Gmail snippets arrive on one line with HTML entities, and marketing mail
+# pads its preheader with invisible characters, so rules match inline too.
+RULE_SETS = [
+    RuleSet(
+        "invisible",
+        remove=[
+            r"[\u00ad\u034f\u061c\u115f\u1160\u17b4\u17b5\u180e\u200b-\u200f"
+            r"\u2060-\u2064\u3164\ufeff\uffa0]+"
+        ],
+    ),
+    RuleSet(
+        "quoted_replies",
+        # A quote header only counts when quoted ">" lines follow it.
+        cut=[
+            r"(?:^|\s)On\s[^\n]{5,160}?\swrote:[ \t]*(?:\n[ \t]*)?>",
+            r"-{2,}\s*(?:Original|Forwarded) Message\s*-{2,}",
+            r"^\s*From:\s[^\n]+\n\s*(?:Sent|Date):",
+            r"(?:^|\s)From:\s\S[^\n]{0,120}?\sSent:\s[^\n]{0,80}?\s(?:To|Subject):",
+        ],
+        remove=[r"^[ \t]*>.*(?:\n|$)"],
+    ),
+    RuleSet(
+        "legal_footers",
+        footer=[
+            r"(?:CONFIDENTIALITY|LEGAL|PRIVILEGED)\s+NOTICE\b",
+            r"\bDISCLAIMER:",
+            r"\bThis (?:e-?mail|message|communication)"
+            r"(?: and any (?:files|attachments)[^.]{0,80}?)?"
+            r" (?:is|are|may be|contains?)[^.]{0,80}?"
+            r"\b(?:confidential (?:and/or |or |and )?(?:privileged )?information"
+            r"|intended (?:solely|only) for (?:the )?(?:use of )?(?:the )?"
+            r"(?:addressee|recipient|individual|person|named))",
+        ],
+    ),
+    RuleSet(
+        "unsubscribe",
+        # Link text and footer wording, not every mention of opting out.
+        drop=[
+            r"^\W*unsubscribe\b",
+            r"\b(?:click|tap) (?:here|(?:on )?(?:the|this) link|below)"
+            r" to (?:unsubscribe|opt[ -]out)\b",
+            r"\bto (?:unsubscribe|opt[ -]out)(?: of [^,.!?\n]{0,40})?,?"
+            r" (?:click|tap|visit|go to) (?:here|(?:the|this) link|below)\b",
+            r"\b(?:unsubscribe|opt[ -]out) (?:here|link|below|at any time)\b",
+            r"\bmanage (?:your |email )*(?:preferences|subscriptions?)\b",
+            r"\bupdate your (?:email )?preferences\b",
+            r"\bview (?:this email |it )?in (?:your |a )?browser\b",
+            r"\byou(?:'re| are)? receiv(?:ed|ing) this"
+            r" (?:e-?mail|message|newsletter)\b",
+        ],
+    ),
+    RuleSet(
+        "signatures",
+        cut=[
+            r"^--\s*$",
+            # A sign-off line followed only by short name/contact lines,
+            # which never end a sentence.
+            r"^[ \t]*(?:Best regards|Kind regards|Warm regards|Regards|Best wishes"
+            r"|Cheers|Sincerely|Thanks(?: again)?|Thank you|Best),?[ \t]*\n"
+            r"(?:[ \t]*(?=[^\n]{1,60}(?:\n|\Z))(?:[^\s.!?]|\.(?=\S))+"
+            r"(?:[ \t]+(?:[^\s.!?]|\.(?=\S))+){0,5}[ \t]*(?:\n|\Z)){1,4}\Z",
+        ],
+        remove=[
+            r"\bSent from my (?:iPhone|iPad|Android|phone|mobile device"
+            r"|Galaxy[\w ]*)\.?"
+        ],
+    ),
+]
+
+
+def _whitespace(body: str) -> str:
+    body = re.sub(r"[ \t]+", " ", body)
+    return re.sub(r"\n{2,}", "\n", body).strip()
+
+
+class CompressionPipeline:
+    """Run ``stages`` over the body of every message in prompt text.
+
+    A stage is any callable ``body -> body`` with a ``name`` attribute, so
+    rule sets and custom functions mix freely. Header lines are never
+    touched, so ``condense_repetitive_messages`` and chunking still see
+    whole messages. ``compress`` reports the tokens each stage saved.
+    """
+
+    def __init__(self, stages: Iterable[Callable[[str], str]] | None = None) -> None:
+        self.stages = list(RULE_SETS if stages is None else stages)
+        self.stats = {"runs": 0, "tokens_before": 0, "tokens_saved": 0}
+
+    @classmethod
+    def from_env(cls) -> "CompressionPipeline":
+        """Select rule sets by name from ``MCP_COMPRESSION`` (``off`` disables)."""
+        spec = os.getenv("MCP_COMPRESSION", "all").lower()
+        if spec == "all":
+            return cls()
+        if spec == "off":
+            return cls([])
+        by_name = {rules.name: rules for rules in RULE_SETS}
+        names = [name.strip() for name in spec.split(",") if name.strip()]
+        for name in names:
+            if name not in by_name:
+                raise ValueError(f"Unknown compression stage: {name}")
+        return cls([by_name[name] for name in names])
+
+    @staticmethod
+    def _split(message: str) -> tuple[list[str], str]:
+        lines = message.split("\n")
+        count = 0
+        while count < len(lines) and _HEADER.match(lines[count]):
+            count += 1
+        return lines[:count], "\n".join(lines[count:])
+
+    def compress(self, text: str) -> tuple[str, dict[str, Any]]:
+        """Return the compressed ``text`` and a token report for this run."""
+        compressed, report = self._compress(
+            split_messages(text), get_tokenizer().count(text)
+        )
+        return "\n\n".join(compressed), report
+
+    def compress_messages(
+        self, messages: list[dict[str, Any]]
+    ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        """Like ``compress`` for message dicts, compressing each ``text``."""
+        texts = [m["text"] for m in messages]
+        compressed, report = self._compress(
+            texts, get_tokenizer().count("\n\n".join(texts))
+        )
+        return [{**m, "text": t} for m, t in zip(messages, compressed)], report
+
+    def _compress(
+        self, texts: list[str], before: int
+    ) -> tuple[list[str], dict[str, Any]]:
+        count = get_tokenizer().count
+        messages = [self._split(m) for m in texts]
+        bodies = [html.unescape(body) for _, body in messages]
+        saved: dict[str, int] = {}
+        current = sum(count(b) for b in bodies)
+        for stage in self.stages:
+            bodies = [stage(body) for body in bodies]
+            tokens = sum(count(b) for b in bodies)
+            saved[getattr(stage, "name", None) or stage.__name__] = current - tokens
+            current = tokens
+        result = [
+            "\n".join(headers + [_whitespace(body)]).strip()
+            for (headers, _), body in zip(messages, bodies)
+        ]
+        after = count("\n\n".join(result))
+        # HTML entities and whitespace, normalized outside the stages.
+        saved["normalize"] = before - after - sum(saved.values())
+        self.stats["runs"] += 1
+        self.stats["tokens_before"] += before
+        self.stats["tokens_saved"] += before - after
+        report = {
+            "messages": len(messages),
+            "tokens_before": before,
+            "tokens_after": after,
+            "saved": saved,
+        }
+        return result, report
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Test modules import logger_utils, which opens MCP_LOG_DIR/app.log at import
+# time, so point it at a scratch directory before any of them are collected;
+# test runs must never write to the repository's logs/app.log.
+_LOG_DIR = tempfile.TemporaryDirectory(prefix="mcp-test-logs-")
+os.environ["MCP_LOG_DIR"] = _LOG_DIR.name
@@ -1,41 +1,87 @@
 import argparse
+import json
 import os
-from typing import List, Tuple
+from typing import Any, Iterator, List, Tuple
 
 import requests
+from chunking import get_tokenizer
+from compression import CompressionPipeline
 from dotenv import load_dotenv
-from email_utils import condense_repetitive_messages
-from llm_service import get_service
+from email_utils import condense_repetitive_messages, condense_repetitive_records
+from extractive import prepass
+from llm_service import shared_service
 from logger_utils import log_call
+from summarizer import MapReduceSummarizer
+from summary_store import RollupSummarizer
 
 load_dotenv()
 
 SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:8001")
 
-llm = get_service()
 
-
-def fetch_recent_emails(
+def iter_recent_messages(
     query: str = "newer_than:1d",
     labels: List[str] | None = None,
     max_results: int = 10,
-) -> Tuple[str, int]:
-    """Request recent email snippets from the MCP server."""
+    summary: dict[str, Any] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Yield ``{"id", "internalDate", "text"}`` per message as they are fetched.
+
+    The server streams one NDJSON line per message, so callers can start
+    processing before the whole result set has arrived. The final status
+    line (message count and any per-message errors) is stored in ``summary``.
+    """
     url = f"{SERVER_URL}/call_tool"
     args: dict[str, object] = {"query": query, "max_results": max_results}
     if labels:
         args["label_ids"] = labels
-    payload = {"name": "list_recent_emails", "arguments": args}
-    resp = requests.post(url, json=payload, timeout=30)
-    log_call("list_recent_emails", payload, resp.text)
-    resp.raise_for_status()
-    data = resp.json()
-    return data.get("text", ""), int(data.get("count", 0))
+    payload = {"name": "list_recent_emails", "arguments": args, "stream": True}
+    with requests.post(url, json=payload, timeout=30, stream=True) as resp:
+        resp.raise_for_status()
+        for raw in resp.iter_lines():
+            if not raw:
+                continue
+            line = json.loads(raw)
+            if line["type"] == "message":
+                message = line.get("message", {})
+                yield {
+                    "id": message.get("id", ""),
+                    "internalDate": message.get("internalDate"),
+                    "text": line["text"],
+                }
+            elif line["type"] == "error":
+                log_call("list_recent_emails", payload, line)
+                raise RuntimeError(line["detail"])
+            else:
+                log_call("list_recent_emails", payload, line)
+                if summary is not None:
+                    summary.update(line)
+
+
+def iter_recent_emails(
+    query: str = "newer_than:1d",
+    labels: List[str] | None = None,
+    max_results: int = 10,
+    summary: dict[str, Any] | None = None,
+) -> Iterator[str]:
+    """Yield email snippets from the MCP server as they are fetched."""
+    for message in iter_recent_messages(query, labels, max_results, summary):
+        yield message["text"]
 
 
-def ask_mail_insights(question: str, email_text: str) -> str:
-    """Send the provided emails and question to the configured LLM."""
-    messages = [
+def fetch_recent_emails(
+    query: str = "newer_than:1d",
+    labels: List[str] | None = None,
+    max_results: int = 10,
+) -> Tuple[str, int]:
+    """Request recent email snippets from the MCP server."""
+    summary: dict[str, Any] = {}
+    texts = list(iter_recent_emails(query, labels, max_results, summary))
+    return "\n\n".join(texts), int(summary.get("count", 0))
+
+
+def _insight_messages(question: str, email_text: str) -> List[dict[str, str]]:
+    return [
         {
             "role": "system",
             "content": (
@@ -45,27 +91,94 @@ def ask_mail_insights(question: str, email_text: str) -> str:
         },
         {"role": "user", "content": f"Emails:\n{email_text}\n\nQuestion: {question}"},
     ]
-    answer = llm.chat(messages)
+
+
+def ask_mail_insights(question: str, email_text: str) -> str:
+    """Send the provided emails and question to the configured LLM."""
+    answer = shared_service().chat(_insight_messages(question, email_text))
     log_call("llm_chat", {"question": question}, answer)
     return answer
 
 
+def ask_mail_insights_stream(question: str, email_text: str) -> Iterator[str]:
+    """Like ``ask_mail_insights`` but yield the answer as it is generated."""
+    parts: list[str] = []
+    messages = _insight_messages(question, email_text)
+    for piece in shared_service().chat_stream(messages):
+        parts.append(piece)
+        yield piece
+    log_call("llm_chat", {"question": question}, "".join(parts))
+
+
 def summarize_with_chunking(
     question: str, email_text: str, chunk_tokens: int = 3000
 ) -> str:
-    """Summarize large email sets by chunking the text if needed."""
-    words = email_text.split()
-    if len(words) <= chunk_tokens:
-        return ask_mail_insights(question, email_text)
+    """Summarize large email sets by chunking the text if needed.
+
+    Chunks are summarized concurrently; see ``summarizer.MapReduceSummarizer``.
+    Oversized text is first shrunk by ``extractive.prepass`` when enabled.
+    """
+    summarizer = MapReduceSummarizer.from_env(ask_mail_insights)
+    email_text = prepass(email_text, chunk_tokens)
+    return summarizer.summarize(question, email_text, chunk_tokens)
+
 
-    partial_summaries: list[str] = []
-    for i in range(0, len(words), chunk_tokens):
-        chunk = " ".join(words[i : i + chunk_tokens])
-        part = ask_mail_insights(question, chunk)
-        partial_summaries.append(part)
+def summarize_with_chunking_stream(
+    question: str, email_text: str, chunk_tokens: int = 3000
+) -> Iterator[str]:
+    """Like ``summarize_with_chunking`` but yield the final answer as it arrives."""
+    summarizer = MapReduceSummarizer.from_env(
+        ask_mail_insights, ask_mail_insights_stream
+    )
+    email_text = prepass(email_text, chunk_tokens)
+    yield from summarizer.summarize_stream(question, email_text, chunk_tokens)
 
-    combined = "\n".join(partial_summaries)
-    return ask_mail_insights(f"Provide a final summary answering: {question}", combined)
+
+def summarize_incrementally(
+    question: str,
+    messages: list[dict[str, Any]],
+    scope: str = "",
+    keep_repetitive: bool = False,
+) -> str:
+    """Answer ``question`` from stored per-day summaries of ``messages``.
+
+    Messages are condensed and compressed as for the flat path first, with
+    repeated subjects collapsed per day. Only messages and days not seen
+    before cost LLM calls; day summaries are kept per ``scope`` (the query
+    and labels that fetched ``messages``). See
+    ``summary_store.RollupSummarizer``.
+    """
+    return "".join(
+        summarize_incrementally_stream(question, messages, scope, keep_repetitive)
+    )
+
+
+def summarize_incrementally_stream(
+    question: str,
+    messages: list[dict[str, Any]],
+    scope: str = "",
+    keep_repetitive: bool = False,
+) -> Iterator[str]:
+    """Like ``summarize_incrementally`` but yield the answer as it arrives."""
+    rollups = RollupSummarizer.from_env(
+        MapReduceSummarizer.from_env(ask_mail_insights, ask_mail_insights_stream)
+    )
+    if not keep_repetitive:
+        messages = condense_repetitive_records(messages, rollups.day_of)
+    messages, report = CompressionPipeline.from_env().compress_messages(messages)
+    log_call("prompt_compression", {"scope": scope}, report)
+    yield from rollups.answer_stream(question, messages, scope)
+    log_call(
+        "summary_rollup", {"question": question, "scope": scope}, dict(rollups.stats)
+    )
+
+
+def print_stream(pieces: Iterator[str]) -> None:
+    """Print an answer piece by piece as the LLM produces it."""
+    print("\nAnswer:\n")
+    for piece in pieces:
+        print(piece, end="", flush=True)
+    print()
 
 
 def main() -> None:
@@ -80,9 +193,28 @@ def main() -> None:
         action="store_true",
         help="Do not collapse repeated subjects",
     )
+    parser.add_argument(
+        "--flat",
+        action="store_true",
+        help="Summarize the raw snippets instead of stored day summaries",
+    )
     args = parser.parse_args()
 
     label_ids = [l for l in args.labels.split(",") if l]
+    if not args.flat:
+        messages = list(iter_recent_messages(args.query, label_ids, args.max_results))
+        if not messages:
+            print("No recent emails returned from MCP server.")
+            return
+        print(f"Found {len(messages)} emails matching query.")
+        scope = f"{args.query}|{','.join(sorted(label_ids))}"
+        print_stream(
+            summarize_incrementally_stream(
+                args.question, messages, scope, args.keep_repetitive
+            )
+        )
+        return
+
     emails, count = fetch_recent_emails(args.query, label_ids, args.max_results)
     if not args.keep_repetitive:
         emails = condense_repetitive_messages(emails)
@@ -90,11 +222,13 @@ def main() -> None:
         print("No recent emails returned from MCP server.")
         return
     print(f"Found {count} emails matching query.")
-    token_estimate = len(emails.split())
+    token_estimate = get_tokenizer().count(emails)
     print(f"Fetched about {token_estimate} tokens from Gmail snippets.")
-    answer = summarize_with_chunking(args.question, emails)
-    print("\nAnswer:\n")
-    print(answer)
+    emails, report = CompressionPipeline.from_env().compress(emails)
+    log_call("prompt_compression", {"query": args.query}, report)
+    saved = report["tokens_before"] - report["tokens_after"]
+    print(f"Removed about {saved} tokens of quoted replies and boilerplate.")
+    print_stream(summarize_with_chunking_stream(args.question, emails))
 
 
 if __name__ == "__main__":
@@ -4,6 +4,20 @@ from __future__ import annotations
 
 import re
 from collections import defaultdict
+from typing import Any, Callable
+
+_SUBJECT = re.compile(r"^Subject:\s*(.*)$", flags=re.MULTILINE)
+
+
+def _subject(msg: str) -> str:
+    match = _SUBJECT.search(msg)
+    return match.group(1).strip() if match else msg[:20]
+
+
+def _annotate(msg: str, subject: str, count: int) -> str:
+    if count == 1:
+        return msg
+    return _SUBJECT.sub(lambda _: f"Subject: {subject} (x{count})", msg, count=1)
 
 
 def condense_repetitive_messages(text: str) -> str:
@@ -17,20 +31,30 @@ def condense_repetitive_messages(text: str) -> str:
     messages = [m.strip() for m in text.strip().split("\n\n") if m.strip()]
     groups: dict[str, list[str]] = defaultdict(list)
     for msg in messages:
-        match = re.search(r"^Subject:\s*(.*)$", msg, flags=re.MULTILINE)
-        subject = match.group(1).strip() if match else msg[:20]
-        groups[subject].append(msg)
+        groups[_subject(msg)].append(msg)
 
     condensed: list[str] = []
     for subject, msgs in groups.items():
-        msg = msgs[0]
-        if len(msgs) > 1:
-            msg = re.sub(
-                r"^Subject:\s*.*$",
-                f"Subject: {subject} (x{len(msgs)})",
-                msg,
-                flags=re.MULTILINE,
-            )
-        condensed.append(msg)
+        condensed.append(_annotate(msgs[0], subject, len(msgs)))
 
     return "\n\n".join(condensed)
+
+
+def condense_repetitive_records(
+    messages: list[dict[str, Any]],
+    group: Callable[[dict[str, Any]], str] = lambda message: "",
+) -> list[dict[str, Any]]:
+    """Like ``condense_repetitive_messages`` for message dicts with a ``text``.
+
+    Repeats are only collapsed within the same ``group(message)`` (for
+    example the day a message arrived), and the first message of each
+    subject is kept with its other keys.
+    """
+    groups: dict[tuple[str, str], list[dict[str, Any]]] = defaultdict(list)
+    for message in messages:
+        groups[(group(message), _subject(message["text"]))].append(message)
+
+    return [
+        {**msgs[0], "text": _annotate(msgs[0]["text"], subject, len(msgs))}
+        for (_, subject), msgs in groups.items()
+    ]
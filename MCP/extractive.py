@@ -0,0 +1,269 @@
+"""Offline extractive summarization of email text with TextRank."""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List
+
+from chunking import get_tokenizer, split_messages
+from llm_service import BaseLLMService
+from metrics import llm_call
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+_HEADER = re.compile(r"^(Date|From|To|Cc|Subject|Labels):\s*(.*)$")
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+\.)\s+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_PROMPT = re.compile(r"^Emails:\n(.*)\n\nQuestion: .*$", re.DOTALL)
+STOPWORDS = frozenset(
+    "a about after all also an and any are as at be been but by can could did"
+    " do for from had has have he her his how i if in into is it its just me"
+    " more my no not of on or our out she so than that the their them then"
+    " there these they this to up us was we were what when which who will"
+    " with would you your re fw fwd".split()
+)
+DAMPING = 0.85
+
+
+def _terms(sentence: str) -> list[str]:
+    return [
+        w for w in _WORD.findall(sentence.lower()) if w not in STOPWORDS and len(w) > 1
+    ]
+
+
+def _sentences(line: str) -> list[str]:
+    line = _BULLET.sub("", line).strip()
+    return [s.strip() for s in _SENTENCE_END.split(line) if len(_terms(s)) >= 2]
+
+
+def _message_parts(message: str) -> tuple[list[str], str | None, list[str]]:
+    """Split one message into header lines, its subject and body sentences."""
+    headers: list[str] = []
+    subject = None
+    body: list[str] = []
+    for line in message.splitlines():
+        match = _HEADER.match(line)
+        if match:
+            headers.append(line)
+            if match.group(1) == "Subject":
+                subject = match.group(2).strip()
+        elif line.strip():
+            body.extend(_sentences(line))
+    return headers, subject, body
+
+
+def _tfidf(sentences: list[list[str]]) -> list[dict[int, float]]:
+    """Return L2-normalized sublinear TF-IDF rows keyed by term index."""
+    vocab: dict[str, int] = {}
+    counts = [Counter(vocab.setdefault(t, len(vocab)) for t in s) for s in sentences]
+    df = Counter(term for row in counts for term in row)
+    n = len(sentences)
+    rows = []
+    for row in counts:
+        weights = {
+            term: (1 + math.log(c)) * (math.log((1 + n) / (1 + df[term])) + 1)
+            for term, c in row.items()
+        }
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        rows.append({term: w / norm for term, w in weights.items()})
+    return rows
+
+
+def _postings(rows: list[dict[int, float]]) -> list[list[tuple[int, float]]]:
+    """Return ``[(sentence, weight), ...]`` per term found in several sentences.
+
+    Terms found in a single sentence link nothing, so they are left out.
+    """
+    postings: dict[int, list[tuple[int, float]]] = defaultdict(list)
+    for i, row in enumerate(rows):
+        for term, weight in row.items():
+            postings[term].append((i, weight))
+    return [posting for posting in postings.values() if len(posting) > 1]
+
+
+# Both rankers use the sentence-term matrix W instead of the n x n cosine
+# matrix: ``sim @ x == W @ (W.T @ x) - self * x``, where ``self`` holds each
+# sentence's similarity with itself. Each iteration is linear in the number
+# of term occurrences, however many sentences share a common term.
+
+
+def _rank_numpy(
+    rows: list[dict[int, float]], iterations: int, tol: float
+) -> list[float]:
+    n = len(rows)
+    postings = _postings(rows)
+    term = np.repeat(np.arange(len(postings)), [len(p) for p in postings])
+    sent = np.array([i for p in postings for i, _ in p], dtype=np.int64)
+    weight = np.array([w for p in postings for _, w in p], dtype=float)
+    own = np.bincount(sent, weights=weight * weight, minlength=n)
+
+    def similar(x):
+        by_term = np.bincount(term, weights=weight * x[sent], minlength=len(postings))
+        return np.bincount(sent, weights=weight * by_term[term], minlength=n) - own * x
+
+    totals = similar(np.ones(n))
+    linked = own > 0
+    scores = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        # Sentences sharing no terms with any other spread their vote evenly.
+        spread = (1 - DAMPING) / n + DAMPING * scores[~linked].sum() / n
+        share = np.divide(scores, totals, out=np.zeros(n), where=linked)
+        new = spread + DAMPING * similar(share)
+        done = np.abs(new - scores).sum() < tol
+        scores = new
+        if done:
+            break
+    return scores.tolist()
+
+
+def _rank_python(
+    rows: list[dict[int, float]], iterations: int, tol: float
+) -> list[float]:
+    n = len(rows)
+    postings = _postings(rows)
+    own = [0.0] * n
+    for posting in postings:
+        for i, w in posting:
+            own[i] += w * w
+
+    def similar(x: list[float]) -> list[float]:
+        out = [-o * v for o, v in zip(own, x)]
+        for posting in postings:
+            total = sum(w * x[i] for i, w in posting)
+            for i, w in posting:
+                out[i] += w * total
+        return out
+
+    totals = similar([1.0] * n)
+    scores = [1.0 / n] * n
+    for _ in range(iterations):
+        dangling = sum(score for score, o in zip(scores, own) if not o)
+        spread = (1 - DAMPING) / n + DAMPING * dangling / n
+        share = [score / t if o else 0.0 for score, t, o in zip(scores, totals, own)]
+        new = [spread + DAMPING * v for v in similar(share)]
+        done = sum(abs(a - b) for a, b in zip(new, scores)) < tol
+        scores = new
+        if done:
+            break
+    return scores
+
+
+def rank_sentences(
+    sentences: list[str], iterations: int = 50, tol: float = 1e-6
+) -> list[float]:
+    """Score ``sentences`` by TextRank over TF-IDF cosine similarity.
+
+    Uses NumPy when installed; the pure-Python fallback gives the same
+    scores and is fast enough for a mailbox page of snippets.
+    """
+    if not sentences:
+        return []
+    rows = _tfidf([_terms(s) for s in sentences])
+    rank = _rank_numpy if np is not None else _rank_python
+    # Rounded so both implementations break ties identically, by position.
+    return [round(score, 9) for score in rank(rows, iterations, tol)]
+
+
+def _top(scores: list[float], count: int) -> list[int]:
+    order = sorted(range(len(scores)), key=lambda i: (-scores[i], i))
+    return sorted(order[:count])
+
+
+def _dedupe(sentences: Iterable[str]) -> list[str]:
+    seen: set[str] = set()
+    unique = []
+    for sentence in sentences:
+        key = " ".join(_terms(sentence))
+        if key not in seen:
+            seen.add(key)
+            unique.append(sentence)
+    return unique
+
+
+def summarize(text: str, max_sentences: int = 8) -> str:
+    """Return the ``max_sentences`` most central sentences of ``text``.
+
+    Subjects count as sentences and repeated sentences are ranked once; the
+    result keeps the order in which sentences appear, one bullet each.
+    """
+    sentences: list[str] = []
+    for message in split_messages(text):
+        _, subject, body = _message_parts(message)
+        if subject and len(_terms(subject)) >= 2:
+            sentences.append(subject)
+        sentences.extend(body)
+    sentences = _dedupe(sentences)
+    if not sentences:
+        return "No emails found."
+    keep = _top(rank_sentences(sentences), max_sentences)
+    return "\n".join(f"- {sentences[i]}" for i in keep)
+
+
+def shrink_messages(text: str, ratio: float = 0.5) -> str:
+    """Drop the least central body sentences of each message.
+
+    Headers are kept, so the result still chunks and condenses by message.
+    About ``ratio`` of all body sentences survive, ranked across the whole
+    text, and every message keeps at least its best sentence.
+    """
+    parts = [_message_parts(m) for m in split_messages(text)]
+    flat = [(m, s) for m, (_, _, body) in enumerate(parts) for s in body]
+    scores = rank_sentences([s for _, s in flat])
+    keep = set(_top(scores, math.ceil(ratio * len(flat))))
+    best: dict[int, int] = {}
+    for i, (m, _) in enumerate(flat):
+        if m not in best or scores[i] > scores[best[m]]:
+            best[m] = i
+    keep.update(best.values())
+    kept: dict[int, list[str]] = {}
+    for i, (m, sentence) in enumerate(flat):
+        if i in keep:
+            kept.setdefault(m, []).append(sentence)
+    return "\n\n".join(
+        "\n".join(headers + [" ".join(kept.get(m, []))]).strip()
+        for m, (headers, _, _) in enumerate(parts)
+    )
+
+
+def prepass(text: str, chunk_tokens: int) -> str:
+    """Shrink ``text`` before it goes upstream if it exceeds one chunk.
+
+    ``MCP_EXTRACTIVE_PREPASS`` is the share of body sentences to keep
+    (e.g. ``0.5``); unset or ``0`` leaves the text unchanged.
+    """
+    ratio = float(os.getenv("MCP_EXTRACTIVE_PREPASS", "0"))
+    if not ratio or get_tokenizer().count(text) <= chunk_tokens:
+        return text
+    return shrink_messages(text, ratio)
+
+
+class ExtractiveService(BaseLLMService):
+    """Local provider that answers with the most central email sentences.
+
+    It needs no network and is deterministic, so it serves as a router
+    fallback when remote providers are down and as a benchmark provider.
+    The question is not interpreted: every prompt gets an extractive
+    summary of its emails. ``MCP_EXTRACTIVE_SENTENCES`` sets the length.
+    """
+
+    def __init__(self, max_sentences: int | None = None) -> None:
+        if max_sentences is None:
+            max_sentences = int(os.getenv("MCP_EXTRACTIVE_SENTENCES", "8"))
+        self.max_sentences = max_sentences
+
+    def chat(self, messages: List[Dict[str, str]], model: str = "gpt-4o") -> str:
+        with llm_call("extractive", model, messages) as record:
+            prompt = next(
+                (m["content"] for m in reversed(messages) if m["role"] == "user"), ""
+            )
+            match = _PROMPT.match(prompt)
+            reply = summarize(match.group(1) if match else prompt, self.max_sentences)
+            record(reply)
+        return reply
@@ -0,0 +1,85 @@
+"""Batched Gmail message fetches."""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Iterator, Sequence
+
+# Gmail accepts at most 100 calls per batch request and recommends keeping
+# batches at 50 or fewer to stay clear of per-user rate limits.
+MAX_BATCH_SIZE = 100
+DEFAULT_BATCH_SIZE = int(os.getenv("MCP_GMAIL_BATCH_SIZE", "50"))
+METADATA_HEADERS = ["Subject", "From", "Date"]
+RETRYABLE_STATUSES = {429, 500, 503}
+
+
+def _chunks(items: Sequence[str], size: int) -> Iterator[Sequence[str]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def http_status(exc: Exception) -> int | None:
+    """Return the HTTP status of a googleapiclient error, if any."""
+    resp = getattr(exc, "resp", None)
+    status = getattr(resp, "status", None)
+    return int(status) if status is not None else None
+
+
+def fetch_message_metadata(
+    service: Any,
+    message_ids: Sequence[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    headers: Sequence[str] = METADATA_HEADERS,
+    retries: int = 1,
+) -> tuple[list[dict[str, Any]], list[dict[str, str]]]:
+    """Fetch ``format="metadata"`` messages using Gmail batch requests.
+
+    Returns ``(messages, errors)``. Messages keep the order of
+    ``message_ids``; each failed id appears once in ``errors`` with the
+    error text. Items rejected with a retryable status are re-sent in a
+    follow-up batch up to ``retries`` times.
+    """
+    size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    results: dict[str, dict[str, Any]] = {}
+    failures: dict[str, Exception] = {}
+
+    def callback(request_id: str, response: Any, exception: Exception | None) -> None:
+        if exception is not None:
+            failures[request_id] = exception
+        else:
+            failures.pop(request_id, None)
+            results[request_id] = response
+
+    ordered = list(dict.fromkeys(message_ids))
+    pending = ordered
+    for attempt in range(retries + 1):
+        for chunk in _chunks(pending, size):
+            batch = service.new_batch_http_request(callback=callback)
+            for mid in chunk:
+                request = (
+                    service.users()
+                    .messages()
+                    .get(
+                        userId="me",
+                        id=mid,
+                        format="metadata",
+                        metadataHeaders=list(headers),
+                    )
+                )
+                batch.add(request, request_id=mid)
+            try:
+                batch.execute()
+            except Exception as exc:  # transport failure affects the whole batch
+                for mid in chunk:
+                    failures[mid] = exc
+        pending = [
+            mid
+            for mid, exc in failures.items()
+            if http_status(exc) in RETRYABLE_STATUSES
+        ]
+        if not pending or attempt == retries:
+            break
+
+    messages = [results[mid] for mid in ordered if mid in results]
+    errors = [{"id": mid, "error": str(exc)} for mid, exc in failures.items()]
+    return messages, errors
@@ -0,0 +1,269 @@
+"""Local SQLite mirror of Gmail message metadata kept current via history sync."""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+from gmail_batch import http_status
+from logger_utils import logger
+
+DEFAULT_PATH = Path(__file__).resolve().parent / "gmail_mirror.db"
+MAX_LIST_CACHE = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    thread_id TEXT,
+    internal_date INTEGER,
+    snippet TEXT NOT NULL,
+    label_ids TEXT NOT NULL,
+    headers TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS label_counts (
+    label_id TEXT PRIMARY KEY,
+    total INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class GmailMirror:
+    """Persistent message metadata store synced from Gmail ``historyId``.
+
+    Messages are stored the first time they are fetched. Each sync replays
+    ``users.history.list`` from the last seen history id, applying label
+    changes and deletions to stored rows. Listing results and label counts
+    are reused until a sync reports a change touching them.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_PATH, max_age: float = 60.0) -> None:
+        self.path = str(path)
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._list_cache: dict[str, tuple[float, list[str]]] = {}
+        self._synced_at = 0.0
+        self.stats = {"hits": 0, "fetched": 0, "syncs": 0, "resets": 0, "changes": 0}
+
+    @classmethod
+    def from_env(cls) -> "GmailMirror":
+        """Build a mirror from ``MCP_GMAIL_MIRROR_PATH`` and ``..._MAX_AGE``."""
+        return cls(
+            os.getenv("MCP_GMAIL_MIRROR_PATH", str(DEFAULT_PATH)),
+            max_age=float(os.getenv("MCP_GMAIL_MIRROR_MAX_AGE", "60")),
+        )
+
+    # -- state -------------------------------------------------------------
+    def _get_state(self, key: str) -> str | None:
+        row = self._conn.execute(
+            "SELECT value FROM state WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    @property
+    def history_id(self) -> str | None:
+        with self._lock:
+            return self._get_state("history_id")
+
+    def clear(self) -> None:
+        """Drop every stored message, count and sync position."""
+        with self._lock:
+            self._conn.executescript(
+                "DELETE FROM messages; DELETE FROM label_counts; DELETE FROM state;"
+            )
+            self._conn.commit()
+            self._list_cache.clear()
+            self._synced_at = 0.0
+
+    def mark_stale(self) -> None:
+        """Force the next ``sync_if_stale`` call to contact Gmail."""
+        self._synced_at = 0.0
+
+    # -- messages ----------------------------------------------------------
+    def get_many(self, ids: Sequence[str]) -> dict[str, dict[str, Any]]:
+        """Return stored messages for ``ids`` in Gmail's metadata shape."""
+        if not ids:
+            return {}
+        found: dict[str, dict[str, Any]] = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = list(ids[i : i + 500])
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT id, thread_id, internal_date, snippet, label_ids, headers"
+                    f" FROM messages WHERE id IN ({marks})",
+                    chunk,
+                ).fetchall()
+                for mid, thread_id, internal_date, snippet, labels, headers in rows:
+                    found[mid] = {
+                        "id": mid,
+                        "threadId": thread_id,
+                        "internalDate": str(internal_date),
+                        "labelIds": json.loads(labels),
+                        "snippet": snippet,
+                        "payload": {"headers": json.loads(headers)},
+                    }
+            self.stats["hits"] += len(found)
+        return found
+
+    def put_many(self, messages: Iterable[dict[str, Any]]) -> None:
+        rows = [
+            (
+                msg["id"],
+                msg.get("threadId"),
+                int(msg.get("internalDate", 0)),
+                msg.get("snippet", ""),
+                json.dumps(msg.get("labelIds", [])),
+                json.dumps(msg.get("payload", {}).get("headers", [])),
+            )
+            for msg in messages
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+            self.stats["fetched"] += len(rows)
+
+    # -- derived caches ----------------------------------------------------
+    def cached_ids(self, key: str) -> list[str] | None:
+        """Return message ids previously listed for ``key`` if still valid."""
+        with self._lock:
+            entry = self._list_cache.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.max_age:
+                return None
+            return list(entry[1])
+
+    def store_ids(self, key: str, ids: Sequence[str]) -> None:
+        with self._lock:
+            if len(self._list_cache) >= MAX_LIST_CACHE:
+                oldest = min(self._list_cache, key=lambda k: self._list_cache[k][0])
+                del self._list_cache[oldest]
+            self._list_cache[key] = (time.monotonic(), list(ids))
+
+    def label_count(self, label_id: str) -> int | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT total FROM label_counts WHERE label_id = ?", (label_id,)
+            ).fetchone()
+            return int(row[0]) if row else None
+
+    def store_label_count(self, label_id: str, total: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO label_counts VALUES (?, ?)", (label_id, total)
+            )
+            self._conn.commit()
+
+    # -- sync --------------------------------------------------------------
+    def sync_if_stale(self, service: Any) -> bool:
+        """Sync when older than ``max_age``; return whether the mirror is current."""
+        if time.monotonic() - self._synced_at < self.max_age:
+            return True
+        try:
+            self.sync(service)
+        except Exception as exc:
+            logger.error(f"Gmail mirror sync failed: {exc}")
+            return False
+        return True
+
+    def sync(self, service: Any) -> None:
+        """Apply Gmail history since the stored history id."""
+        with self._sync_lock:
+            start_id = self.history_id
+            if start_id is None:
+                self._reset(service)
+                return
+            touched: set[str] = set()
+            changed = False
+            page_token: str | None = None
+            latest = start_id
+            while True:
+                kwargs: dict[str, Any] = {"userId": "me", "startHistoryId": start_id}
+                if page_token:
+                    kwargs["pageToken"] = page_token
+                try:
+                    result = service.users().history().list(**kwargs).execute()
+                except Exception as exc:
+                    if http_status(exc) == 404:  # history id expired
+                        self._reset(service)
+                        return
+                    raise
+                records = result.get("history", [])
+                with self._lock:
+                    for record in records:
+                        self._apply(record, touched)
+                changed = changed or bool(records)
+                latest = str(result.get("historyId", latest))
+                page_token = result.get("nextPageToken")
+                if not page_token:
+                    break
+            with self._lock:
+                if changed:
+                    self.stats["changes"] += 1
+                    self._list_cache.clear()
+                if touched:
+                    marks = ",".join("?" * len(touched))
+                    self._conn.execute(
+                        f"DELETE FROM label_counts WHERE label_id IN ({marks})",
+                        sorted(touched),
+                    )
+                self._set_state("history_id", latest)
+                self._conn.commit()
+                self.stats["syncs"] += 1
+                self._synced_at = time.monotonic()
+
+    def _reset(self, service: Any) -> None:
+        profile = service.users().getProfile(userId="me").execute()
+        self.clear()
+        with self._lock:
+            self._set_state("history_id", str(profile["historyId"]))
+            self._conn.commit()
+            self.stats["resets"] += 1
+            self._synced_at = time.monotonic()
+
+    def _apply(self, record: dict[str, Any], touched: set[str]) -> None:
+        for item in record.get("messagesAdded", []):
+            touched.update(item["message"].get("labelIds", []))
+        for item in record.get("messagesDeleted", []):
+            touched.update(item["message"].get("labelIds", []))
+            self._conn.execute(
+                "DELETE FROM messages WHERE id = ?", (item["message"]["id"],)
+            )
+        for key, add in (("labelsAdded", True), ("labelsRemoved", False)):
+            for item in record.get(key, []):
+                changed_ids = item.get("labelIds", [])
+                touched.update(changed_ids)
+                mid = item["message"]["id"]
+                row = self._conn.execute(
+                    "SELECT label_ids FROM messages WHERE id = ?", (mid,)
+                ).fetchone()
+                if row is None:
+                    continue
+                labels = json.loads(row[0])
+                if add:
+                    labels += [lid for lid in changed_ids if lid not in labels]
+                else:
+                    labels = [lid for lid in labels if lid not in changed_ids]
+                self._conn.execute(
+                    "UPDATE messages SET label_ids = ? WHERE id = ?",
+                    (json.dumps(labels), mid),
+                )
@@ -0,0 +1,62 @@
+"""Process-wide cache of Gmail label metadata."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any
+
+
+class LabelRegistry:
+    """Serve Gmail labels from memory, refreshing at most every ``max_age``.
+
+    Label metadata rarely changes, so one ``labels.list`` call is shared by
+    every tool that needs id/name resolution. ``invalidate`` forces the next
+    lookup to refetch, e.g. after the user asks for an explicit refresh.
+    """
+
+    def __init__(self, max_age: float = 3600.0) -> None:
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._labels: list[dict[str, Any]] = []
+        self._by_id: dict[str, str] = {}
+        self._fetched_at: float | None = None
+        self.stats = {"hits": 0, "refreshes": 0}
+
+    @classmethod
+    def from_env(cls) -> "LabelRegistry":
+        return cls(max_age=float(os.getenv("MCP_LABEL_CACHE_MAX_AGE", "3600")))
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._fetched_at = None
+
+    def labels(self, service: Any, refresh: bool = False) -> list[dict[str, Any]]:
+        """Return label resources with ``id``, ``name`` and ``type``."""
+        with self._lock:
+            self._ensure(service, refresh)
+            return list(self._labels)
+
+    def names(self, service: Any) -> dict[str, str]:
+        """Return a mapping of label id to display name."""
+        with self._lock:
+            self._ensure(service, False)
+            return dict(self._by_id)
+
+    def _ensure(self, service: Any, refresh: bool) -> None:
+        fresh = (
+            self._fetched_at is not None
+            and time.monotonic() - self._fetched_at < self.max_age
+        )
+        if fresh and not refresh:
+            self.stats["hits"] += 1
+            return
+        result = service.users().labels().list(userId="me").execute()
+        self._labels = [
+            {"id": lbl["id"], "name": lbl["name"], "type": lbl.get("type", "user")}
+            for lbl in result.get("labels", [])
+        ]
+        self._by_id = {lbl["id"]: lbl["name"] for lbl in self._labels}
+        self._fetched_at = time.monotonic()
+        self.stats["refreshes"] += 1
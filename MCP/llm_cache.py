@@ -0,0 +1,124 @@
+"""Disk-backed cache of LLM replies keyed by model and messages."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+DEFAULT_PATH = Path(__file__).resolve().parent / "llm_cache.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS replies (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    reply TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS replies_used_at ON replies (used_at);
+"""
+
+
+def cache_key(model: str, messages: List[Dict[str, str]]) -> str:
+    """Return a stable SHA-256 of ``model`` and ``messages``."""
+    payload = json.dumps(
+        {"model": model, "messages": messages},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite store of chat replies with a TTL and least-recently-used bound.
+
+    Entries older than ``ttl`` seconds are treated as misses and removed.
+    Once more than ``max_entries`` are stored, the least recently read ones
+    are evicted. The database is shared by the CLI, agents and web GUI.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_PATH,
+        ttl: float = 86400.0,
+        max_entries: int = 1000,
+    ) -> None:
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "bypassed": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """Configure from ``MCP_LLM_CACHE_PATH``, ``_TTL`` and ``_MAX_ENTRIES``."""
+        return cls(
+            os.getenv("MCP_LLM_CACHE_PATH", str(DEFAULT_PATH)),
+            ttl=float(os.getenv("MCP_LLM_CACHE_TTL", "86400")),
+            max_entries=int(os.getenv("MCP_LLM_CACHE_MAX_ENTRIES", "1000")),
+        )
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT reply, created_at FROM replies WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            reply, created_at = row
+            if now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM replies WHERE key = ?", (key,))
+                self._conn.commit()
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute(
+                "UPDATE replies SET used_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.stats["hits"] += 1
+            return reply
+
+    def put(self, key: str, model: str, reply: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO replies"
+                " (key, model, reply, created_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                (key, model, reply, now, now),
+            )
+            evicted = self._conn.execute(
+                "DELETE FROM replies WHERE key IN (SELECT key FROM replies"
+                " ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self._conn.commit()
+            self.stats["evictions"] += max(0, evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM replies")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM replies").fetchone()[0]
@@ -3,15 +3,18 @@ import os
 from typing import List, Tuple
 
 import requests
+from chunking import get_tokenizer
+from compression import CompressionPipeline
 from dotenv import load_dotenv
 from email_utils import condense_repetitive_messages
-from llm_service import get_service
+from extractive import prepass
+from llm_service import shared_service
 from logger_utils import log_call
+from summarizer import MapReduceSummarizer
 
 load_dotenv()
 
 SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:8001")
-llm = get_service()
 
 
 def fetch_recent_emails(
@@ -42,7 +45,7 @@ def ask_mail_insights(question: str, email_text: str) -> str:
         },
         {"role": "user", "content": f"Emails:\n{email_text}\n\nQuestion: {question}"},
     ]
-    answer = llm.chat(messages)
+    answer = shared_service().chat(messages)
     log_call("llm_chat", {"question": question}, answer)
     return answer
 
@@ -50,18 +53,9 @@ def ask_mail_insights(question: str, email_text: str) -> str:
 def summarize_with_chunking(
     question: str, email_text: str, chunk_tokens: int = 3000
 ) -> str:
-    words = email_text.split()
-    if len(words) <= chunk_tokens:
-        return ask_mail_insights(question, email_text)
-
-    partial_summaries: list[str] = []
-    for i in range(0, len(words), chunk_tokens):
-        chunk = " ".join(words[i : i + chunk_tokens])
-        part = ask_mail_insights(question, chunk)
-        partial_summaries.append(part)
-
-    combined = "\n".join(partial_summaries)
-    return ask_mail_insights(f"Provide a final summary answering: {question}", combined)
+    summarizer = MapReduceSummarizer.from_env(ask_mail_insights)
+    email_text = prepass(email_text, chunk_tokens)
+    return summarizer.summarize(question, email_text, chunk_tokens)
 
 
 def main() -> None:
@@ -85,8 +79,12 @@ def main() -> None:
         print("No recent emails returned from MCP server.")
         return
     print(f"Found {count} emails matching query.")
-    token_estimate = len(emails_text.split())
+    token_estimate = get_tokenizer().count(emails_text)
     print(f"Fetched about {token_estimate} tokens from Gmail snippets.")
+    emails_text, report = CompressionPipeline.from_env().compress(emails_text)
+    log_call("prompt_compression", {"query": args.query}, report)
+    saved = report["tokens_before"] - report["tokens_after"]
+    print(f"Removed about {saved} tokens of quoted replies and boilerplate.")
     answer = summarize_with_chunking(args.question, emails_text)
     print("\nAnswer:\n")
     print(answer)
@@ -0,0 +1,254 @@
+"""Route chat calls across LLM providers with failover and hedged requests."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List
+
+from llm_service import BaseLLMService
+from metrics import percentile
+
+# Rolling window per provider for latency percentiles and error rate.
+WINDOW = 50
+
+
+class RateLimitError(Exception):
+    """Raised by providers that are throttling requests."""
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """Recognise 429s from any SDK without importing it."""
+    if isinstance(exc, RateLimitError) or type(exc).__name__ == "RateLimitError":
+        return True
+    status = getattr(exc, "status_code", None) or getattr(exc, "http_status", None)
+    return status == 429
+
+
+class ProviderHealth:
+    """Recent latency and failures of one provider."""
+
+    def __init__(self) -> None:
+        self.latencies: deque[float] = deque(maxlen=WINDOW)
+        self.outcomes: deque[bool] = deque(maxlen=WINDOW)
+        self.cooldown_until = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "error_rate": round(self.error_rate(), 3),
+            "p50": percentile(list(self.latencies), 0.5),
+            "p95": percentile(list(self.latencies), 0.95),
+            "cooling_down": self.cooldown_until > time.monotonic(),
+        }
+
+
+class RouterLLMService(BaseLLMService):
+    """Send each chat to the fastest healthy provider, falling back on failure.
+
+    ``providers`` maps names to ``BaseLLMService`` instances, in order of
+    preference. A provider is skipped while its recent error rate is above
+    ``max_error_rate`` or it is cooling down after a rate limit; failed calls
+    move on to the next provider, so one throttled provider does not fail the
+    caller. When a call runs longer than the provider's ``hedge_quantile``
+    latency (once ``min_samples`` are known), a duplicate is sent to the next
+    provider and whichever answers first wins.
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, BaseLLMService],
+        hedge_quantile: float = 0.95,
+        min_samples: int = 20,
+        max_error_rate: float = 0.5,
+        cooldown: float = 30.0,
+        max_workers: int = 32,
+    ) -> None:
+        if not providers:
+            raise ValueError("RouterLLMService needs at least one provider")
+        self.providers = dict(providers)
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.health = {name: ProviderHealth() for name in self.providers}
+        self.stats = {"requests": 0, "failovers": 0, "hedges": 0, "hedge_wins": 0}
+        self._lock = threading.Lock()
+        # Every LLM call in the process goes through this pool, so it is
+        # sized for callers' concurrency, not for the number of providers.
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="llm"
+        )
+
+    @classmethod
+    def from_env(cls, providers: Dict[str, BaseLLMService]) -> "RouterLLMService":
+        """Configure hedging from ``MCP_LLM_HEDGE_QUANTILE`` (0 disables it)."""
+        return cls(
+            providers,
+            hedge_quantile=float(os.getenv("MCP_LLM_HEDGE_QUANTILE", "0.95")),
+            min_samples=int(os.getenv("MCP_LLM_HEDGE_MIN_SAMPLES", "20")),
+            cooldown=float(os.getenv("MCP_LLM_RATE_LIMIT_COOLDOWN", "30")),
+            max_workers=int(os.getenv("MCP_LLM_ROUTER_WORKERS", "32")),
+        )
+
+    def _order(self) -> list[str]:
+        """Healthy providers fastest first, then the rest as a last resort."""
+        now = time.monotonic()
+        with self._lock:
+
+            def speed(name: str) -> float:
+                latencies = self.health[name].latencies
+                # Unmeasured providers keep their configured preference order.
+                return percentile(list(latencies), 0.5) if latencies else float("inf")
+
+            healthy, degraded = [], []
+            for name, health in self.health.items():
+                ok = (
+                    health.cooldown_until <= now
+                    and health.error_rate() <= self.max_error_rate
+                )
+                (healthy if ok else degraded).append(name)
+            return sorted(healthy, key=speed) + degraded
+
+    def _hedge_delay(self, name: str) -> float | None:
+        if not self.hedge_quantile:
+            return None
+        with self._lock:
+            latencies = list(self.health[name].latencies)
+        if len(latencies) < self.min_samples:
+            return None
+        return percentile(latencies, self.hedge_quantile)
+
+    def _call(self, name: str, messages: List[Dict[str, str]], model: str) -> str:
+        start = time.perf_counter()
+        try:
+            reply = self.providers[name].chat(messages, model=model)
+        except Exception as exc:
+            self._record_failure(name, exc)
+            raise
+        self._record_success(name, time.perf_counter() - start)
+        return reply
+
+    def _record_failure(self, name: str, exc: Exception) -> None:
+        health = self.health[name]
+        with self._lock:
+            health.calls += 1
+            health.errors += 1
+            health.outcomes.append(False)
+            if is_rate_limited(exc):
+                health.rate_limited += 1
+                health.cooldown_until = time.monotonic() + self.cooldown
+
+    def _record_success(self, name: str, latency: float) -> None:
+        health = self.health[name]
+        with self._lock:
+            health.calls += 1
+            health.outcomes.append(True)
+            health.latencies.append(latency)
+
+    def chat(self, messages: List[Dict[str, str]], model: str = "gpt-4o") -> str:
+        order = iter(self._order())
+        pending: dict[Future, tuple[str, threading.Event, list[float]]] = {}
+        hedged = False
+        error: Exception | None = None
+        self._count("requests")
+
+        def launch() -> bool:
+            name = next(order, None)
+            if name is None:
+                return False
+            began = threading.Event()
+            began_at: list[float] = []
+
+            def run() -> str:
+                began_at.append(time.perf_counter())
+                began.set()
+                return self._call(name, messages, model)
+
+            pending[self._pool.submit(run)] = (name, began, began_at)
+            return True
+
+        launch()
+        first = next(iter(pending.values()))[0]
+        while pending:
+            timeout = None
+            if not hedged and len(pending) == 1:
+                name, began, began_at = next(iter(pending.values()))
+                delay = self._hedge_delay(name)
+                if delay is not None:
+                    # Time spent queued for a worker does not count towards
+                    # the hedge delay; only the provider call itself does.
+                    began.wait()
+                    timeout = max(0.0, delay - (time.perf_counter() - began_at[0]))
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                if launch():
+                    self._count("hedges")
+                continue
+            for future in done:
+                name = pending.pop(future)[0]
+                try:
+                    reply = future.result()
+                except Exception as exc:
+                    error = exc
+                    continue
+                if name != first:
+                    self._count("hedge_wins" if hedged else "failovers")
+                return reply
+            if not pending:
+                launch()
+        assert error is not None
+        raise error
+
+    def chat_stream(
+        self, messages: List[Dict[str, str]], model: str = "gpt-4o"
+    ) -> Iterator[str]:
+        """Stream from the best provider, failing over until the first piece.
+
+        Streams are not hedged: two providers' text cannot be merged, and
+        once a piece has been yielded a failure is raised to the caller.
+        """
+        self._count("requests")
+        error: Exception | None = None
+        for attempt, name in enumerate(self._order()):
+            start = time.perf_counter()
+            started = False
+            try:
+                for piece in self.providers[name].chat_stream(messages, model=model):
+                    started = True
+                    yield piece
+            except Exception as exc:
+                self._record_failure(name, exc)
+                if started:
+                    raise
+                error = exc
+                continue
+            self._record_success(name, time.perf_counter() - start)
+            if attempt:
+                self._count("failovers")
+            return
+        assert error is not None
+        raise error
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Return per-provider health for diagnostics."""
+        with self._lock:
+            return {name: h.snapshot() for name, h in self.health.items()}
@@ -2,15 +2,19 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Dict, List
+import threading
+import time
+from typing import Dict, Iterator, List
 
 try:
     from dotenv import load_dotenv
 except Exception:  # pragma: no cover - optional dependency
     load_dotenv = None
 
-from openai import OpenAI
+from llm_cache import ResponseCache, cache_key
+from metrics import llm_cache_requests, llm_call, llm_first_token
 
 if load_dotenv:
     load_dotenv()
@@ -20,23 +24,227 @@ class BaseLLMService:
     def chat(self, messages: List[Dict[str, str]], model: str = "gpt-4o") -> str:
         raise NotImplementedError
 
+    def chat_stream(
+        self, messages: List[Dict[str, str]], model: str = "gpt-4o"
+    ) -> Iterator[str]:
+        """Yield the reply in pieces as it is generated.
+
+        Providers without native streaming yield the whole reply at once.
+        """
+        yield self.chat(messages, model=model)
+
+    async def achat(self, messages: List[Dict[str, str]], model: str = "gpt-4o") -> str:
+        """Async ``chat``; providers without an async client use a thread."""
+        return await asyncio.to_thread(self.chat, messages, model)
+
+
+def _http_limits():
+    import httpx
+
+    connections = int(os.getenv("MCP_LLM_MAX_CONNECTIONS", "20"))
+    return httpx.Limits(
+        max_connections=connections,
+        max_keepalive_connections=connections,
+        keepalive_expiry=float(os.getenv("MCP_LLM_KEEPALIVE", "120")),
+    )
+
 
 class OpenAIService(BaseLLMService):
+    """OpenAI chat completions over one pooled, keep-alive HTTP client.
+
+    The async client is created on first ``achat`` and belongs to the event
+    loop that made it, so a process should await it from a single loop.
+    """
+
     def __init__(self) -> None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=api_key)
+        # Imported here so other providers and wrappers work without the SDK.
+        import httpx
+        from openai import OpenAI
+
+        self._api_key = os.getenv("OPENAI_API_KEY")
+        self.client = OpenAI(
+            api_key=self._api_key, http_client=httpx.Client(limits=_http_limits())
+        )
+        self._async_client = None
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            import httpx
+            from openai import AsyncOpenAI
+
+            self._async_client = AsyncOpenAI(
+                api_key=self._api_key,
+                http_client=httpx.AsyncClient(limits=_http_limits()),
+            )
+        return self._async_client
 
     def chat(self, messages: List[Dict[str, str]], model: str = "gpt-4o") -> str:
-        chat = self.client.chat.completions.create(model=model, messages=messages)
-        return chat.choices[0].message.content.strip()
+        with llm_call("openai", model, messages) as record:
+            chat = self.client.chat.completions.create(model=model, messages=messages)
+            reply = chat.choices[0].message.content.strip()
+            record(reply)
+        return reply
+
+    async def achat(self, messages: List[Dict[str, str]], model: str = "gpt-4o") -> str:
+        with llm_call("openai", model, messages) as record:
+            chat = await self.async_client.chat.completions.create(
+                model=model, messages=messages
+            )
+            reply = chat.choices[0].message.content.strip()
+            record(reply)
+        return reply
+
+    def chat_stream(
+        self, messages: List[Dict[str, str]], model: str = "gpt-4o"
+    ) -> Iterator[str]:
+        with llm_call("openai", model, messages) as record:
+            start = time.perf_counter()
+            parts: list[str] = []
+            stream = self.client.chat.completions.create(
+                model=model, messages=messages, stream=True
+            )
+            for event in stream:
+                delta = event.choices[0].delta.content if event.choices else None
+                if not parts:
+                    # Match chat(), which strips the reply.
+                    delta = (delta or "").lstrip()
+                    if not delta:
+                        continue
+                    llm_first_token.observe(
+                        time.perf_counter() - start, provider="openai", model=model
+                    )
+                elif not delta:
+                    continue
+                parts.append(delta)
+                yield delta
+            record("".join(parts))
+
+
+class CachedLLMService(BaseLLMService):
+    """Answer repeated chats from a ``ResponseCache`` in front of ``service``.
+
+    Replies are keyed by a hash of the model and messages, so asking the same
+    question over the same emails costs one provider call. Pass
+    ``bypass_cache=True`` to force a fresh reply, which then replaces the
+    cached one.
+    """
+
+    def __init__(self, service: BaseLLMService, cache: ResponseCache) -> None:
+        self.service = service
+        self.cache = cache
 
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4o",
+        bypass_cache: bool = False,
+    ) -> str:
+        key = cache_key(model, messages)
+        reply = self._lookup(key, bypass_cache)
+        if reply is None:
+            reply = self.service.chat(messages, model=model)
+            self.cache.put(key, model, reply)
+        return reply
 
-_PROVIDERS = {"openai": OpenAIService}
+    async def achat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4o",
+        bypass_cache: bool = False,
+    ) -> str:
+        key = cache_key(model, messages)
+        reply = self._lookup(key, bypass_cache)
+        if reply is None:
+            reply = await self.service.achat(messages, model=model)
+            self.cache.put(key, model, reply)
+        return reply
+
+    def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4o",
+        bypass_cache: bool = False,
+    ) -> Iterator[str]:
+        """Stream from the provider on a miss; a cached reply comes in one piece.
+
+        The reply is cached only if the stream is read to the end.
+        """
+        key = cache_key(model, messages)
+        reply = self._lookup(key, bypass_cache)
+        if reply is not None:
+            yield reply
+            return
+        parts: list[str] = []
+        for piece in self.service.chat_stream(messages, model=model):
+            parts.append(piece)
+            yield piece
+        self.cache.put(key, model, "".join(parts))
+
+    def _lookup(self, key: str, bypass_cache: bool) -> str | None:
+        if bypass_cache:
+            self.cache.stats["bypassed"] += 1
+            llm_cache_requests.inc(result="bypass")
+            return None
+        reply = self.cache.get(key)
+        llm_cache_requests.inc(result="miss" if reply is None else "hit")
+        return reply
+
+
+def _extractive() -> BaseLLMService:
+    from extractive import ExtractiveService
+
+    return ExtractiveService()
+
+
+_PROVIDERS = {"openai": OpenAIService, "extractive": _extractive}
 
 
 def get_service() -> BaseLLMService:
-    provider = os.getenv("MCP_LLM_PROVIDER", "openai").lower()
-    cls = _PROVIDERS.get(provider)
-    if not cls:
-        raise ValueError(f"Unsupported LLM provider: {provider}")
-    return cls()
+    """Build the provider named by ``MCP_LLM_PROVIDER``.
+
+    A comma-separated list (e.g. ``openai,other``) builds a
+    ``llm_router.RouterLLMService`` that fails over between them in that
+    order of preference. Replies are cached on disk unless ``MCP_LLM_CACHE=0``.
+    """
+    spec = os.getenv("MCP_LLM_PROVIDER", "openai").lower()
+    names = [name.strip() for name in spec.split(",") if name.strip()]
+    for name in names:
+        if name not in _PROVIDERS:
+            raise ValueError(f"Unsupported LLM provider: {name}")
+    if len(names) == 1:
+        service = _PROVIDERS[names[0]]()
+    else:
+        from llm_router import RouterLLMService
+
+        service = RouterLLMService.from_env({n: _PROVIDERS[n]() for n in names})
+    if os.getenv("MCP_LLM_CACHE", "1") == "0":
+        return service
+    return CachedLLMService(service, ResponseCache.from_env())
+
+
+_shared: Dict[tuple[str, str], BaseLLMService] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_service() -> BaseLLMService:
+    """Return the process-wide service, building it on first use.
+
+    Callers share one client and its keep-alive connection pool instead of
+    paying for a new client, and new TLS handshakes, per request. Services
+    are keyed by ``MCP_LLM_PROVIDER`` and ``MCP_LLM_CACHE``.
+    """
+    key = (os.getenv("MCP_LLM_PROVIDER", "openai"), os.getenv("MCP_LLM_CACHE", "1"))
+    service = _shared.get(key)
+    if service is None:
+        with _shared_lock:
+            service = _shared.get(key)
+            if service is None:
+                service = _shared[key] = get_service()
+    return service
+
+
+def reset_shared_services() -> None:
+    """Drop shared services so the next call rebuilds them (used by tests)."""
+    with _shared_lock:
+        _shared.clear()
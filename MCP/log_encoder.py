@@ -0,0 +1,152 @@
+"""Single-pass JSON encoding that redacts sensitive keys while serializing."""
+
+from __future__ import annotations
+
+import re
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Iterable, Mapping
+
+REDACTED = '"[REDACTED]"'
+# Key lookups are memoized; the cache is reset if payload keys are unbounded
+# (e.g. dicts keyed by message id).
+_MATCH_CACHE_SIZE = 4096
+# Encoded chunks are handed to the writer once this many are pending.
+_FLUSH_CHUNKS = 4096
+
+
+def compile_key_matcher(
+    keys: Iterable[str], patterns: Iterable[str] = ()
+) -> Callable[[str], bool]:
+    """Return a predicate telling whether a mapping key must be redacted.
+
+    ``keys`` match case-insensitively and exactly; ``patterns`` are regular
+    expressions that must match the whole lower-cased key.
+    """
+    exact = frozenset(k.lower() for k in keys)
+    compiled = [p for p in patterns if p]
+    regex = re.compile("|".join(f"(?:{p})" for p in compiled)) if compiled else None
+    cache: dict[str, bool] = {}
+
+    def is_sensitive(key: str) -> bool:
+        hit = cache.get(key)
+        if hit is None:
+            lowered = key.lower()
+            hit = lowered in exact or bool(regex and regex.fullmatch(lowered))
+            if len(cache) >= _MATCH_CACHE_SIZE:
+                cache.clear()
+            cache[key] = hit
+        return hit
+
+    return is_sensitive
+
+
+def _float(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "Infinity" if value > 0 else "-Infinity"
+    return float.__repr__(value)
+
+
+def _key(key: Any) -> str:
+    """Coerce a mapping key to a string the way ``json.dumps`` does."""
+    if isinstance(key, str):
+        return key
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, float):
+        return _float(key)
+    if isinstance(key, int):
+        return int.__repr__(key)
+    return str(key)
+
+
+def write_redacted_json(
+    value: Any, write: Callable[[str], Any], is_sensitive: Callable[[str], bool]
+) -> None:
+    """Serialize ``value`` to ``write`` with sensitive values replaced.
+
+    Output is byte-for-byte what ``json.dumps`` produces for the redacted
+    value, but the payload is walked once and never copied. Keys are checked
+    in every mapping, including those nested in tuples or non-dict
+    ``Mapping`` types. Objects JSON cannot represent are written as their
+    ``str()``. Pending chunks are passed to ``write`` between list items, so
+    memory stays bounded for large arrays.
+    """
+    out: list[str] = []
+    append = out.append
+
+    def encode_mapping(obj: Mapping) -> None:
+        if not obj:
+            append("{}")
+            return
+        sep = "{"
+        for key, item in obj.items():
+            key = _key(key)
+            append(sep)
+            sep = ", "
+            append(encode_basestring_ascii(key))
+            if is_sensitive(key):
+                append(": " + REDACTED)
+            else:
+                append(": ")
+                encode(item)
+        append("}")
+
+    def encode_array(obj: Iterable[Any]) -> None:
+        sep = "["
+        for item in obj:
+            append(sep)
+            sep = ", "
+            encode(item)
+            if len(out) >= _FLUSH_CHUNKS:
+                write("".join(out))
+                out.clear()
+        append("[]" if sep == "[" else "]")
+
+    def encode(obj: Any) -> None:
+        # Exact-type checks first: they cover nearly every API payload value.
+        kind = type(obj)
+        if kind is str:
+            append(encode_basestring_ascii(obj))
+        elif kind is dict:
+            encode_mapping(obj)
+        elif kind is list or kind is tuple:
+            encode_array(obj)
+        elif obj is None:
+            append("null")
+        elif obj is True:
+            append("true")
+        elif obj is False:
+            append("false")
+        elif kind is int:
+            append(int.__repr__(obj))
+        elif kind is float:
+            append(_float(obj))
+        elif isinstance(obj, str):
+            append(encode_basestring_ascii(obj))
+        elif isinstance(obj, Mapping):
+            encode_mapping(obj)
+        elif isinstance(obj, (list, tuple)):
+            encode_array(obj)
+        elif isinstance(obj, int):
+            append(int.__repr__(obj))
+        elif isinstance(obj, float):
+            append(_float(obj))
+        else:
+            append(encode_basestring_ascii(str(obj)))
+
+    encode(value)
+    if out:
+        write("".join(out))
+
+
+def dumps_redacted(value: Any, is_sensitive: Callable[[str], bool]) -> str:
+    """Return ``value`` as redacted JSON text."""
+    parts: list[str] = []
+    write_redacted_json(value, parts.append, is_sensitive)
+    return "".join(parts)
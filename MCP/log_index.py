@@ -0,0 +1,191 @@
+"""SQLite sidecar index of ``app.log`` entries for tail and filtered queries."""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+INDEX_NAME = "app_log_index.db"
+# When the index is first created, entries from this much of the end of the
+# existing log file are imported so the logs page is not empty.
+BACKFILL_BYTES = 1024 * 1024
+MAX_PAGE_SIZE = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    name TEXT NOT NULL,
+    module TEXT NOT NULL,
+    line TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_name ON entries (name, id);
+CREATE INDEX IF NOT EXISTS entries_module ON entries (module, id);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries (ts);
+"""
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+    # Several processes (server, CLI, web GUI) log concurrently.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _to_epoch(value: Any) -> float:
+    """Return epoch seconds for a number or ISO 8601 time (UTC unless offset)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class LogIndexHandler(logging.Handler):
+    """Record each formatted log line in the sidecar index.
+
+    Runs on the log writer thread next to the file handler. ``log_call``
+    entries are indexed by tool name and calling module; other records use
+    an empty name and their source module. Rows beyond ``max_rows`` are
+    pruned oldest first.
+    """
+
+    def __init__(self, path: Path, log_file: Path, max_rows: int = 100_000) -> None:
+        super().__init__()
+        self.path = Path(path)
+        self.log_file = Path(log_file)
+        self.max_rows = max_rows
+        self._conn: sqlite3.Connection | None = None
+        self._inserts = 0
+        # Only lines written before this handler existed are backfilled;
+        # later ones reach the index through emit().
+        exists = self.log_file.exists()
+        self._backfill_end = self.log_file.stat().st_size if exists else 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            created = not self.path.exists()
+            self._conn = _connect(self.path)
+            self._conn.executescript(_SCHEMA)
+            if created:
+                self._backfill()
+        return self._conn
+
+    def _backfill(self) -> None:
+        end = self._backfill_end
+        if not end:
+            return
+        with self.log_file.open("rb") as fh:
+            fh.seek(max(0, end - BACKFILL_BYTES))
+            if end > BACKFILL_BYTES:
+                fh.readline()  # skip the partial first line
+            lines = fh.read(end - fh.tell()).decode("utf-8", "replace").splitlines()
+        rows = []
+        for line in lines:
+            try:
+                data = json.loads(line)
+                ts = _to_epoch(data["timestamp"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            rows.append((ts, data.get("name", ""), data.get("module", ""), line))
+        self._conn.executemany(
+            "INSERT INTO entries (ts, name, module, line) VALUES (?, ?, ?, ?)", rows
+        )
+        self._conn.commit()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = self.format(record)
+            entry = getattr(record, "entry", None)
+            name, module = (entry[0], entry[1]) if entry else ("", record.module)
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO entries (ts, name, module, line) VALUES (?, ?, ?, ?)",
+                (record.created, name, module, line),
+            )
+            self._inserts += 1
+            if self._inserts % 1000 == 0:
+                conn.execute(
+                    "DELETE FROM entries WHERE id <= "
+                    "(SELECT MAX(id) FROM entries) - ?",
+                    (self.max_rows,),
+                )
+            conn.commit()
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        super().close()
+
+
+def query_logs(
+    path: str | Path,
+    name: str | None = None,
+    module: str | None = None,
+    since: Any = None,
+    until: Any = None,
+    before: int | None = None,
+    limit: int = 20,
+) -> dict[str, Any]:
+    """Return matching entries newest first, plus a cursor for the next page.
+
+    ``since``/``until`` accept ISO 8601 strings or epoch seconds. Pass the
+    returned ``next_before`` as ``before`` to fetch older entries.
+    """
+    path = Path(path)
+    if not path.exists():
+        return {"entries": [], "next_before": None}
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    clauses, params = [], []
+    for column, value in (("name", name), ("module", module)):
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if since not in (None, ""):
+        clauses.append("ts >= ?")
+        params.append(_to_epoch(since))
+    if until not in (None, ""):
+        clauses.append("ts < ?")
+        params.append(_to_epoch(until))
+    if before:
+        clauses.append("id < ?")
+        params.append(int(before))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = _connect(path)
+    try:
+        rows = conn.execute(
+            f"SELECT id, ts, name, module, line FROM entries {where}"
+            " ORDER BY id DESC LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    entries = []
+    for row_id, ts, entry_name, entry_module, line in rows[:limit]:
+        entry: dict[str, Any] = {}
+        if entry_name:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                pass
+        entry.setdefault(
+            "timestamp", datetime.fromtimestamp(ts, timezone.utc).isoformat()
+        )
+        entry.setdefault("module", entry_module)
+        entry.setdefault("name", entry_name)
+        if not entry_name:
+            entry["message"] = line
+        entry["id"] = row_id
+        entries.append(entry)
+    next_before = entries[-1]["id"] if len(rows) > limit else None
+    return {"entries": entries, "next_before": next_before}
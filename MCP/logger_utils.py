@@ -1,10 +1,32 @@
-import inspect
+import atexit
+import gzip
+import hashlib
 import json
 import logging
 import os
+import queue
+import random
+import shutil
+import sys
+import time
 from datetime import datetime, timezone
+from logging.handlers import (
+    BaseRotatingHandler,
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
+    TimedRotatingFileHandler,
+)
 from pathlib import Path
-from typing import Any, Mapping
+from typing import Any
+
+from log_encoder import compile_key_matcher, write_redacted_json
+from log_index import INDEX_NAME, LogIndexHandler
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
 
 try:
     from dotenv import load_dotenv
@@ -18,47 +40,270 @@ if load_dotenv:
 _default_dir = Path(__file__).resolve().parent.parent / "logs"
 LOG_DIR = Path(os.getenv("MCP_LOG_DIR", _default_dir))
 LOG_FILE = LOG_DIR / "app.log"
+# Sidecar SQLite index used by the web GUI log viewer (see log_index).
+INDEX_FILE = LOG_DIR / INDEX_NAME
+INDEX_ENABLED = os.getenv("MCP_LOG_INDEX", "1") != "0"
+INDEX_MAX_ROWS = int(os.getenv("MCP_LOG_INDEX_MAX_ROWS", "100000"))
 
 SENSITIVE_KEYS = {"token", "secret", "api_key", "access_token"}
+# Extra exact keys and full-match regexes, comma separated, e.g.
+# MCP_LOG_REDACT_KEYS="password" MCP_LOG_REDACT_PATTERNS=".*_secret,x-api-.*".
+_is_sensitive = compile_key_matcher(
+    SENSITIVE_KEYS
+    | {k.strip() for k in os.getenv("MCP_LOG_REDACT_KEYS", "").split(",") if k.strip()},
+    [p.strip() for p in os.getenv("MCP_LOG_REDACT_PATTERNS", "").split(",")],
+)
+
+
+def parse_rates(spec: str) -> dict[str, float]:
+    """Parse ``"tool=0.1,other=0.5"`` into per-tool sampling rates."""
+    rates: dict[str, float] = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        rates[name.strip()] = min(1.0, max(0.0, float(value)))
+    return rates
+
+
+# Log size policy. Payloads whose JSON exceeds MAX_PAYLOAD_BYTES are replaced
+# by their size, SHA-256 and a short preview (0 disables truncation). Files
+# rotate at ROTATE_BYTES, or on the ROTATE_WHEN schedule (e.g. "midnight")
+# when set, keeping BACKUP_COUNT gzip-compressed files.
+MAX_PAYLOAD_BYTES = int(os.getenv("MCP_LOG_MAX_PAYLOAD", "65536"))
+PREVIEW_CHARS = 512
+ROTATE_BYTES = int(os.getenv("MCP_LOG_ROTATE_BYTES", str(10 * 1024 * 1024)))
+ROTATE_WHEN = os.getenv("MCP_LOG_ROTATE_WHEN", "")
+BACKUP_COUNT = int(os.getenv("MCP_LOG_BACKUPS", "5"))
+# e.g. "list_recent_emails_raw=0.1" keeps one in ten of those entries.
+SAMPLE_RATES = parse_rates(os.getenv("MCP_LOG_SAMPLE", ""))
+
+
+class _BoundedSink:
+    """Collect encoder output, switching to a running hash past the limit.
+
+    Memory use stays within ``MAX_PAYLOAD_BYTES`` plus one encoder flush no
+    matter how large the payload is.
+    """
+
+    def __init__(self) -> None:
+        self.parts: list[str] = []
+        self.size = 0
+        self.digest: Any = None
+        self.preview = ""
+
+    def write(self, chunk: str) -> None:
+        # The encoder escapes non-ASCII, so len() is the byte size.
+        self.size += len(chunk)
+        if self.digest is not None:
+            self.digest.update(chunk.encode("ascii"))
+            return
+        self.parts.append(chunk)
+        if MAX_PAYLOAD_BYTES and self.size > MAX_PAYLOAD_BYTES:
+            buffered = "".join(self.parts)
+            self.parts = []
+            self.preview = buffered[:PREVIEW_CHARS]
+            self.digest = hashlib.sha256(buffered.encode("ascii"))
+
+    def getvalue(self) -> str:
+        if self.digest is None:
+            return "".join(self.parts)
+        return json.dumps(
+            {
+                "truncated": True,
+                "bytes": self.size,
+                "sha256": self.digest.hexdigest(),
+                "preview": self.preview,
+            }
+        )
+
+
+def _bounded_json(value: Any) -> str:
+    """Return redacted JSON for ``value``, summarized if over the size limit."""
+    sink = _BoundedSink()
+    write_redacted_json(value, sink.write, _is_sensitive)
+    return sink.getvalue()
+
+
+class _EntryFormatter(logging.Formatter):
+    """Serialize ``log_call`` entries; other records are written as-is."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = getattr(record, "entry", None)
+        if entry is None:
+            return super().format(record)
+        # Size-based rotation formats each record before emitting it.
+        cached = getattr(record, "formatted_entry", None)
+        if cached is None:
+            cached = record.formatted_entry = self._format_entry(record, entry)
+        return cached
+
+    def _format_entry(self, record: logging.LogRecord, entry: tuple) -> str:
+        name, module, request, response, rate = entry
+        timestamp = datetime.fromtimestamp(record.created, timezone.utc).isoformat()
+        head = json.dumps({"timestamp": timestamp, "module": module, "name": name})
+        if rate is not None:
+            head = head[:-1] + f', "sample_rate": {rate}}}'
+        return (
+            f'{head[:-1]}, "request": {_bounded_json(request)}, '
+            f'"response": {_bounded_json(response)}}}'
+        )
+
+
+def _gz_name(name: str) -> str:
+    return name + ".gz"
+
+
+def _gz_rotate(source: str, dest: str) -> None:
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+_FORMATTER = _EntryFormatter("%(message)s")
+
+
+class _SharedRotation:
+    """Share one rotating LOG_FILE between processes.
+
+    The server, web GUI and CLI all append to LOG_FILE, which keeps the log
+    viewer and its index on a single file. Only the process holding an
+    exclusive lock on ``app.log.lock`` rotates it; the lock passes to
+    another process when its holder exits. Every process reopens LOG_FILE
+    once the path no longer points at its open file, as
+    ``WatchedFileHandler`` does, so nobody keeps writing to a renamed or
+    deleted inode. Without ``fcntl`` every process rotates on its own.
+    """
+
+    baseFilename: str
+    stream: Any
+
+    def _init_shared(self) -> None:
+        self._lock_file: Any = None
+        self._owner = fcntl is None
+
+    def _owns_rotation(self) -> bool:
+        if not self._owner:
+            if self._lock_file is None:
+                self._lock_file = open(self.baseFilename + ".lock", "a")
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return False
+            self._owner = True
+            self._take_over()
+        return True
+
+    def _take_over(self) -> None:
+        """Pick up the rotation schedule from the previous owner."""
+
+    def _reopen_if_moved(self) -> None:
+        if self.stream is None:
+            return
+        try:
+            on_disk = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            on_disk = None
+        opened = os.fstat(self.stream.fileno())
+        if on_disk and (on_disk.st_dev, on_disk.st_ino) == (
+            opened.st_dev,
+            opened.st_ino,
+        ):
+            return
+        self.stream.close()
+        self.stream = self._open()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        self._reopen_if_moved()
+        return self._owns_rotation() and super().shouldRollover(record)
+
+    def close(self) -> None:
+        super().close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+class _SharedRotatingFileHandler(_SharedRotation, RotatingFileHandler):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._init_shared()
+
+
+class _SharedTimedRotatingFileHandler(_SharedRotation, TimedRotatingFileHandler):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._init_shared()
+
+    def _take_over(self) -> None:
+        # The previous owner already rotated at the boundaries it saw.
+        self.rolloverAt = self.computeRollover(int(time.time()))
+
+
+def _file_handler() -> logging.Handler:
+    handler: BaseRotatingHandler
+    if ROTATE_WHEN:
+        handler = _SharedTimedRotatingFileHandler(
+            LOG_FILE, when=ROTATE_WHEN, backupCount=BACKUP_COUNT, utc=True
+        )
+    else:
+        handler = _SharedRotatingFileHandler(
+            LOG_FILE, maxBytes=ROTATE_BYTES, backupCount=BACKUP_COUNT
+        )
+    handler.namer = _gz_name
+    handler.rotator = _gz_rotate
+    handler.setFormatter(_FORMATTER)
+    return handler
 
 
 def get_logger() -> logging.Logger:
-    """Return a singleton logger writing to LOG_FILE in JSON lines."""
+    """Return a singleton logger writing to LOG_FILE in JSON lines.
+
+    Records are queued and written by a background listener thread, so the
+    file write, redaction and JSON encoding stay off the caller's thread.
+    Call ``flush`` to wait for queued records to reach the file. Entries
+    are also recorded in the ``INDEX_FILE`` sidecar unless ``MCP_LOG_INDEX=0``.
+    """
     LOG_DIR.mkdir(exist_ok=True)
     logger = logging.getLogger("mcp_logger")
     if not logger.handlers:
-        handler = logging.FileHandler(LOG_FILE)
-        formatter = logging.Formatter("%(message)s")
-        handler.setFormatter(formatter)
+        handlers = [_file_handler()]
+        if INDEX_ENABLED:
+            index = LogIndexHandler(INDEX_FILE, LOG_FILE, INDEX_MAX_ROWS)
+            index.setFormatter(_FORMATTER)
+            handlers.append(index)
+        records: queue.Queue = queue.Queue()
+        listener = QueueListener(records, *handlers)
+        listener.start()
+        atexit.register(listener.stop)
+        handler = QueueHandler(records)
+        # Kept on the handler so callers that replace it can stop the thread.
+        handler.listener = listener  # type: ignore[attr-defined]
         logger.addHandler(handler)
         logger.setLevel(logging.INFO)
     return logger
 
 
-logger = get_logger()
+def flush() -> None:
+    """Block until every queued record has been written to LOG_FILE."""
+    for handler in logging.getLogger("mcp_logger").handlers:
+        if isinstance(handler, QueueHandler):
+            handler.queue.join()
 
 
-def _redact(value: Any) -> Any:
-    """Recursively redact sensitive fields in mappings."""
-    if isinstance(value, Mapping):
-        return {
-            k: "[REDACTED]" if k.lower() in SENSITIVE_KEYS else _redact(v)
-            for k, v in value.items()
-        }
-    if isinstance(value, list):
-        return [_redact(v) for v in value]
-    return value
+logger = get_logger()
 
 
 def log_call(name: str, request: Any, response: Any) -> None:
-    """Log a request/response pair in JSON format with redaction."""
-    frame = inspect.stack()[1]
-    module = inspect.getmodule(frame[0])
-    entry = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "module": module.__name__ if module else "__main__",
-        "name": name,
-        "request": _redact(request),
-        "response": _redact(response),
-    }
-    logger.info(json.dumps(entry))
+    """Log a request/response pair in JSON format with redaction.
+
+    Payloads are serialized later on the writer thread, so callers must not
+    mutate them after logging. Tools listed in ``MCP_LOG_SAMPLE`` are only
+    logged at their configured rate.
+    """
+    rate = SAMPLE_RATES.get(name)
+    if rate is not None and random.random() >= rate:
+        return
+    module = sys._getframe(1).f_globals.get("__name__", "__main__")
+    entry = (name, module, request, response, rate)
+    logger.info("%s", name, extra={"entry": entry})
@@ -77,26 +77,26 @@ def count_emails(label_id: str) -> None:
         print(f"Request failed: {exc}")
 
 
-def list_labels() -> dict[str, str]:
-    """Return a mapping of Gmail label IDs to names and display them."""
+def fetch_labels(refresh: bool = False) -> dict[str, str]:
+    """Return a mapping of Gmail label IDs to names from the server registry."""
     url = f"{SERVER_URL}/call_tool"
-    payload = {"name": "list_gmail_labels", "arguments": {}}
+    payload = {"name": "list_gmail_labels", "arguments": {"refresh": refresh}}
     try:
         resp = requests.post(url, json=payload, timeout=30)
         log_call("list_gmail_labels", payload, resp.text)
         resp.raise_for_status()
-        text = resp.json().get("text", "")
+        labels = resp.json().get("labels", [])
     except requests.RequestException as exc:
         print(f"Request failed: {exc}")
         return {}
-    lines = text.splitlines()
-    mapping: dict[str, str] = {}
-    for line in lines:
-        if ":" in line:
-            label_id, name = line.split(":", 1)
-            mapping[label_id.strip()] = name.strip()
-    if lines:
-        pydoc.pager("\n".join(lines))
+    return {lbl["id"]: lbl["name"] for lbl in labels}
+
+
+def list_labels(refresh: bool = False) -> dict[str, str]:
+    """Return a mapping of Gmail label IDs to names and display them."""
+    mapping = fetch_labels(refresh)
+    if mapping:
+        pydoc.pager("\n".join(f"{lid}: {name}" for lid, name in mapping.items()))
     else:
         print("No labels found.")
     return mapping
@@ -107,19 +107,21 @@ def choose_label() -> str | None:
     labels = list_labels()
     if not labels:
         return None
+    by_name = {name.lower(): lid for lid, name in labels.items()}
     while True:
         answer = input("Label ID or name (default INBOX): ").strip()
         if not answer:
             answer = "INBOX"
-        for lid, name in labels.items():
-            if answer == lid or answer.lower() == name.lower():
-                return lid
+        if answer in labels:
+            return answer
+        if answer.lower() in by_name:
+            return by_name[answer.lower()]
         print("Label not found, please try again.")
 
 
 def sync_labels_csv() -> None:
     """Fetch Gmail labels and save them to a CSV with an importance flag."""
-    mapping = list_labels()
+    mapping = list_labels(refresh=True)
     if not mapping:
         return
     labels = [{"id": lid, "name": name} for lid, name in mapping.items()]
@@ -221,16 +223,33 @@ def create_calendar_event() -> None:
 
 
 def check_day_availability() -> None:
-    """Check free slots for a given day."""
+    """Check free slots for a day, or for every day in a date range."""
     date_str = input("Date (YYYY-MM-DD): ").strip()
+    end_str = input("End date (YYYY-MM-DD, press Enter for a single day): ").strip()
     url = f"{SERVER_URL}/call_tool"
-    payload = {
-        "name": "check_day_availability",
-        "arguments": {"date": date_str},
-    }
+    if end_str:
+        work_start = input("Working hours start (HH:MM, default 09:00): ").strip()
+        work_end = input("Working hours end (HH:MM, default 17:00): ").strip()
+        default_tz = os.getenv("MCP_TIMEZONE", "UTC")
+        tz_name = input(f"Timezone (default {default_tz}): ").strip() or default_tz
+        payload = {
+            "name": "check_range_availability",
+            "arguments": {
+                "start_date": date_str,
+                "end_date": end_str,
+                "work_start": work_start or "09:00",
+                "work_end": work_end or "17:00",
+                "timezone": tz_name,
+            },
+        }
+    else:
+        payload = {
+            "name": "check_day_availability",
+            "arguments": {"date": date_str},
+        }
     try:
         resp = requests.post(url, json=payload, timeout=30)
-        log_call("check_day_availability", payload, resp.text)
+        log_call(payload["name"], payload, resp.text)
         resp.raise_for_status()
         print(resp.json().get("text", ""))
     except requests.RequestException as exc:
@@ -289,7 +308,7 @@ def main() -> None:
             "7. Test credentials\n"
             "8. List next week's events\n"
             "9. Create calendar event\n"
-            "10. Check day availability\n"
+            "10. Check availability (day or range)\n"
             "11. Quit"
         )
         choice = input("Select: ").strip()
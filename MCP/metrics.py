@@ -0,0 +1,328 @@
+"""Process-local latency histograms and counters with Prometheus text export."""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+# Seconds. Google API calls sit between 50ms and a few seconds; LLM calls
+# can take tens of seconds.
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+# Percentiles on the dev page come from this many most recent samples per
+# label set, so they reflect current behaviour rather than the whole uptime.
+WINDOW_SIZE = 1024
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(values: dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in values.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: tuple[str, str] | None = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Return the ``q`` quantile (0-1) of ``samples`` by linear interpolation."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    pos = (len(ordered) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+class Counter:
+    """Monotonic counter keyed by label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> dict[Labels, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+            for labels, value in sorted(self.values().items())
+        ]
+
+
+class _Series:
+    __slots__ = ("buckets", "count", "sum", "window")
+
+    def __init__(self, size: int) -> None:
+        self.buckets = [0] * size
+        self.count = 0
+        self.sum = 0.0
+        self.window: deque[float] = deque(maxlen=WINDOW_SIZE)
+
+
+class Histogram:
+    """Latency histogram with cumulative buckets and a recent-sample window."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name = name
+        self.help = help_text
+        self.bounds = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = threading.Lock()
+        self._series: dict[Labels, _Series] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.bounds))
+            for i, bound in enumerate(self.bounds):
+                if value <= bound:
+                    series.buckets[i] += 1
+                    break
+            series.count += 1
+            series.sum += value
+            series.window.append(value)
+
+    def summary(
+        self, quantiles: tuple[float, ...] = (0.5, 0.95, 0.99)
+    ) -> dict[Labels, dict[str, float]]:
+        """Return count, mean and recent-window percentiles per label set."""
+        with self._lock:
+            snapshot = {
+                k: (s.count, s.sum, list(s.window)) for k, s in self._series.items()
+            }
+        result = {}
+        for key, (count, total, window) in snapshot.items():
+            row = {"count": count, "mean": total / count if count else 0.0}
+            for q in quantiles:
+                row[f"p{round(q * 100)}"] = percentile(window, q)
+            result[key] = row
+        return result
+
+    def render(self) -> list[str]:
+        with self._lock:
+            snapshot = {
+                k: (list(s.buckets), s.count, s.sum) for k, s in self._series.items()
+            }
+        lines = []
+        for labels, (buckets, count, total) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, n in zip(self.bounds, buckets):
+                cumulative += n
+                le = ("le", _format_value(bound))
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(labels, le)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics for one process, rendered together for ``/metrics``."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Counter | Histogram] = {}
+
+    def _get(self, cls: type, name: str, help_text: str, **kwargs: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def histogram(
+        self, name: str, help_text: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+tool_latency = REGISTRY.histogram(
+    "mcp_tool_duration_seconds", "Time to answer a tool call, including queueing."
+)
+tool_errors = REGISTRY.counter(
+    "mcp_tool_errors_total", "Tool calls that failed, by HTTP status."
+)
+upstream_latency = REGISTRY.histogram(
+    "mcp_upstream_duration_seconds", "Google API round-trip time per method."
+)
+upstream_errors = REGISTRY.counter(
+    "mcp_upstream_errors_total", "Google API round trips that failed, by status."
+)
+upstream_request_bytes = REGISTRY.counter(
+    "mcp_upstream_request_bytes_total", "Request body bytes sent to Google APIs."
+)
+upstream_response_bytes = REGISTRY.counter(
+    "mcp_upstream_response_bytes_total", "Response body bytes read from Google APIs."
+)
+llm_latency = REGISTRY.histogram(
+    "mcp_llm_duration_seconds", "LLM chat completion time per provider and model."
+)
+llm_first_token = REGISTRY.histogram(
+    "mcp_llm_first_token_seconds", "Time until a streamed LLM reply starts."
+)
+llm_errors = REGISTRY.counter("mcp_llm_errors_total", "LLM calls that raised.")
+llm_cache_requests = REGISTRY.counter(
+    "mcp_llm_cache_requests_total", "LLM chats by response cache result."
+)
+llm_request_bytes = REGISTRY.counter(
+    "mcp_llm_request_bytes_total", "UTF-8 bytes of prompt messages sent to the LLM."
+)
+llm_response_bytes = REGISTRY.counter(
+    "mcp_llm_response_bytes_total", "UTF-8 bytes of LLM replies."
+)
+
+
+def _api_of(uri: str, method_id: str | None) -> tuple[str, str]:
+    # Batch requests go to https://<host>/batch/<api>/<version>.
+    if "/batch/" in uri:
+        return uri.split("/batch/", 1)[1].split("/", 1)[0], "batch"
+    method = method_id or "unknown"
+    return method.split(".", 1)[0], method
+
+
+class MeteredHttp:
+    """Wrap an httplib2-style client to record Google API round trips.
+
+    ``method_id`` is the discovery method (``gmail.users.messages.list``)
+    the request was built for; batch requests reuse the first request's
+    client and are labelled ``batch``. Other attributes are forwarded so the
+    API client still finds the wrapped client's credentials.
+    """
+
+    def __init__(self, http: Any, method_id: str | None = None) -> None:
+        self._http = http
+        self._method_id = method_id
+
+    def request(
+        self,
+        uri: str,
+        method: str = "GET",
+        body: Any = None,
+        headers: Any = None,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        api, call = _api_of(uri, self._method_id)
+        if body:
+            upstream_request_bytes.inc(len(body), api=api)
+        start = time.perf_counter()
+        try:
+            resp, content = self._http.request(
+                uri, method, body, headers, *args, **kwargs
+            )
+        except Exception:
+            upstream_errors.inc(api=api, method=call, status="exception")
+            raise
+        finally:
+            upstream_latency.observe(time.perf_counter() - start, api=api, method=call)
+        if content:
+            upstream_response_bytes.inc(len(content), api=api)
+        status = getattr(resp, "status", 200)
+        if status >= 400:
+            upstream_errors.inc(api=api, method=call, status=status)
+        return resp, content
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._http, attr)
+
+
+def latency_table(histogram: Histogram) -> list[dict[str, Any]]:
+    """Return ``histogram`` percentiles as rows sorted slowest p95 first."""
+    rows = []
+    for labels, row in histogram.summary().items():
+        rows.append({"labels": dict(labels), **row})
+    rows.sort(key=lambda r: r["p95"], reverse=True)
+    return rows
+
+
+def _utf8_len(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+@contextmanager
+def llm_call(
+    provider: str, model: str, messages: list[dict[str, str]]
+) -> Iterator[Any]:
+    """Time one LLM chat call; call the yielded function with the reply text."""
+    llm_request_bytes.inc(
+        sum(_utf8_len(m.get("content") or "") for m in messages),
+        provider=provider,
+    )
+    start = time.perf_counter()
+    try:
+        yield lambda reply: llm_response_bytes.inc(
+            _utf8_len(reply or ""), provider=provider
+        )
+    except Exception:
+        llm_errors.inc(provider=provider, model=model)
+        raise
+    finally:
+        llm_latency.observe(time.perf_counter() - start, provider=provider, model=model)
@@ -0,0 +1,158 @@
+"""Parallel map-reduce summarization of text too large for one LLM call."""
+
+from __future__ import annotations
+
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
+
+from chunking import chunk_messages
+
+# ``ask(question, text) -> answer``; the agents pass their ask_mail_insights.
+Ask = Callable[[str, str], str]
+# Same as ``Ask`` but yields the answer in pieces as the model produces them.
+AskStream = Callable[[str, str], Iterator[str]]
+
+FINAL_PROMPT = "Provide a final summary answering: {question}"
+
+
+class MapReduceSummarizer:
+    """Summarize chunks concurrently, then reduce the partial answers.
+
+    Map calls run on up to ``max_in_flight`` threads, so wall time approaches
+    that of the slowest chunk rather than the sum of all of them. Each call is
+    retried ``retries`` times with jittered exponential backoff. When there
+    are more than ``fan_in`` partial answers they are reduced in groups,
+    level by level, so no reduce prompt grows with the input size.
+
+    With ``ask_stream``, the ``*_stream`` methods stream the final call only;
+    map and reduce calls are needed whole before it can start.
+    """
+
+    def __init__(
+        self,
+        ask: Ask,
+        max_in_flight: int = 4,
+        retries: int = 2,
+        fan_in: int = 8,
+        backoff: float = 0.5,
+        ask_stream: AskStream | None = None,
+    ) -> None:
+        self.ask = ask
+        self.ask_stream = ask_stream
+        self.max_in_flight = max(1, max_in_flight)
+        self.retries = max(0, retries)
+        self.fan_in = max(2, fan_in)
+        self.backoff = backoff
+
+    @classmethod
+    def from_env(
+        cls, ask: Ask, ask_stream: AskStream | None = None
+    ) -> "MapReduceSummarizer":
+        """Configure from ``MCP_SUMMARY_CONCURRENCY``, ``_RETRIES`` and ``_FAN_IN``."""
+        return cls(
+            ask,
+            max_in_flight=int(os.getenv("MCP_SUMMARY_CONCURRENCY", "4")),
+            retries=int(os.getenv("MCP_SUMMARY_RETRIES", "2")),
+            fan_in=int(os.getenv("MCP_SUMMARY_FAN_IN", "8")),
+            ask_stream=ask_stream,
+        )
+
+    def _sleep(self, attempt: int) -> None:
+        delay = self.backoff * 2**attempt
+        time.sleep(delay + random.uniform(0, delay))
+
+    def _call(self, question: str, text: str) -> str:
+        for attempt in range(self.retries + 1):
+            try:
+                return self.ask(question, text)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                self._sleep(attempt)
+        raise AssertionError("unreachable")
+
+    def _stream_call(self, question: str, text: str) -> Iterator[str]:
+        if self.ask_stream is None:
+            yield self._call(question, text)
+            return
+        for attempt in range(self.retries + 1):
+            started = False
+            try:
+                for piece in self.ask_stream(question, text):
+                    started = True
+                    yield piece
+                return
+            except Exception:
+                # Text already shown to the reader cannot be taken back.
+                if started or attempt == self.retries:
+                    raise
+                self._sleep(attempt)
+
+    def _run_all(
+        self, pool: ThreadPoolExecutor, question: str, texts: list[str]
+    ) -> list[str]:
+        # map() keeps input order, and the first failure propagates.
+        return list(pool.map(lambda text: self._call(question, text), texts))
+
+    def map(self, question: str, texts: list[str]) -> list[str]:
+        """Ask ``question`` about each text concurrently, keeping their order."""
+        if not texts:
+            return []
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_in_flight, len(texts)),
+            thread_name_prefix="summarize",
+        ) as pool:
+            return self._run_all(pool, question, texts)
+
+    def summarize_chunks(self, question: str, chunks: list[str]) -> str:
+        """Answer ``question`` over ``chunks`` with one final reduce call."""
+        if len(chunks) == 1:
+            return self._call(question, chunks[0])
+        final = FINAL_PROMPT.format(question=question)
+        return self._call(final, self._reduce(question, chunks))
+
+    def summarize_chunks_stream(
+        self, question: str, chunks: list[str]
+    ) -> Iterator[str]:
+        """Like ``summarize_chunks`` but yield the final answer as it arrives."""
+        if len(chunks) == 1:
+            yield from self._stream_call(question, chunks[0])
+            return
+        final = FINAL_PROMPT.format(question=question)
+        yield from self._stream_call(final, self._reduce(question, chunks))
+
+    def _reduce(self, question: str, chunks: list[str]) -> str:
+        """Map ``chunks`` and reduce the partials to at most ``fan_in`` lines."""
+        final = FINAL_PROMPT.format(question=question)
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_in_flight, len(chunks)),
+            thread_name_prefix="summarize",
+        ) as pool:
+            partials = self._run_all(pool, question, chunks)
+            while len(partials) > self.fan_in:
+                groups = [
+                    "\n".join(partials[i : i + self.fan_in])
+                    for i in range(0, len(partials), self.fan_in)
+                ]
+                partials = self._run_all(pool, final, groups)
+        return "\n".join(partials)
+
+    def summarize(self, question: str, text: str, chunk_tokens: int = 3000) -> str:
+        """Answer ``question`` over ``text`` in chunks of ``chunk_tokens`` tokens."""
+        chunks = chunk_messages(text, chunk_tokens)
+        if len(chunks) <= 1:
+            return self._call(question, text)
+        return self.summarize_chunks(question, chunks)
+
+    def summarize_stream(
+        self, question: str, text: str, chunk_tokens: int = 3000
+    ) -> Iterator[str]:
+        """Like ``summarize`` but yield the final answer as it arrives."""
+        chunks = chunk_messages(text, chunk_tokens)
+        if len(chunks) <= 1:
+            yield from self._stream_call(question, text)
+            return
+        yield from self.summarize_chunks_stream(question, chunks)
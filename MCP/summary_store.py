@@ -0,0 +1,370 @@
+"""Incremental per-message, per-day and multi-day email summaries."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dtime, timedelta
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+from zoneinfo import ZoneInfo
+
+from chunking import get_tokenizer
+from summarizer import MapReduceSummarizer
+
+DEFAULT_PATH = Path(__file__).resolve().parent / "summary_store.db"
+MESSAGE_PROMPT = "Summarize this email in at most two sentences."
+DAY_PROMPT = "Summarize all emails from {day} in detail."
+# Gmail snippets are already short; messages under this many tokens are
+# stored as they are instead of costing an LLM call.
+MESSAGE_SUMMARY_TOKENS = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS message_summaries (
+    id TEXT PRIMARY KEY,
+    day TEXT NOT NULL,
+    internal_date INTEGER NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS message_summaries_day ON message_summaries (day);
+CREATE TABLE IF NOT EXISTS scope_messages (
+    scope TEXT NOT NULL,
+    day TEXT NOT NULL,
+    id TEXT NOT NULL,
+    PRIMARY KEY (scope, id)
+);
+CREATE INDEX IF NOT EXISTS scope_messages_day ON scope_messages (scope, day);
+CREATE TABLE IF NOT EXISTS day_summaries (
+    day TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    message_count INTEGER NOT NULL,
+    complete INTEGER NOT NULL,
+    PRIMARY KEY (day, scope)
+);
+CREATE TABLE IF NOT EXISTS span_summaries (
+    key TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def _digest(parts: Iterable[str]) -> str:
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+class SummaryStore:
+    """SQLite persistence for the three summary levels."""
+
+    def __init__(self, path: str | Path = DEFAULT_PATH) -> None:
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(day_summaries)")
+        }
+        if columns and "scope" not in columns:
+            # Day summaries from before scoping mixed every query's mail;
+            # they are only a cache, so rebuild them.
+            self._conn.execute("DROP TABLE day_summaries")
+        self._conn.executescript(_SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> "SummaryStore":
+        return cls(os.getenv("MCP_SUMMARY_STORE_PATH", str(DEFAULT_PATH)))
+
+    def message_summaries(self, ids: list[str]) -> dict[str, str]:
+        found: dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i : i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT id, summary FROM message_summaries"
+                    f" WHERE id IN ({marks})",
+                    chunk,
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_message_summaries(self, rows: list[tuple[str, str, int, str]]) -> None:
+        """Store ``(id, day, internal_date, summary)`` rows."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO message_summaries"
+                " (id, day, internal_date, summary) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def add_to_scope(self, scope: str, rows: list[tuple[str, str]]) -> None:
+        """Record ``(day, id)`` rows as seen by queries in ``scope``."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO scope_messages (scope, day, id)"
+                " VALUES (?, ?, ?)",
+                [(scope, day, message_id) for day, message_id in rows],
+            )
+            self._conn.commit()
+
+    def day_messages(self, day: str, scope: str = "") -> list[tuple[str, str]]:
+        """Return ``(id, summary)`` of ``day`` as seen by ``scope``, oldest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT m.id, m.summary FROM message_summaries m"
+                " JOIN scope_messages s ON s.id = m.id"
+                " WHERE s.scope = ? AND s.day = ?"
+                " ORDER BY m.internal_date, m.id",
+                (scope, day),
+            ).fetchall()
+
+    def day(self, day: str, scope: str = "") -> tuple[str, str, bool] | None:
+        """Return ``(digest, summary, complete)`` for ``day`` if stored."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, summary, complete FROM day_summaries"
+                " WHERE day = ? AND scope = ?",
+                (day, scope),
+            ).fetchone()
+        return (row[0], row[1], bool(row[2])) if row else None
+
+    def put_day(
+        self,
+        day: str,
+        scope: str,
+        digest: str,
+        summary: str,
+        count: int,
+        complete: bool,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO day_summaries"
+                " (day, scope, digest, summary, message_count, complete)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (day, scope, digest, summary, count, int(complete)),
+            )
+            self._conn.commit()
+
+    def span(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM span_summaries WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_span(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO span_summaries (key, summary, created_at)"
+                " VALUES (?, ?, ?)",
+                (key, summary, time.time()),
+            )
+            self._conn.commit()
+
+
+class RollupSummarizer:
+    """Build day and multi-day summaries from stored message summaries.
+
+    Each message is summarized once. Day summaries belong to a ``scope``
+    (for example the query and labels that fetched the mail), so a rollup of
+    important mail never mixes with one of the whole inbox. Within a scope a
+    day summary is keyed by a digest of every message id the scope has seen
+    for that day, so it is recomputed only when new mail for the day
+    appears; a summary built after the day ended is served
+    without fetching anything. Multi-day answers are built from day
+    summaries and stored per question, so a weekly summary costs LLM tokens
+    only for days that changed. Days are built concurrently, on up to the
+    summarizer's ``max_in_flight`` threads.
+
+    ``messages`` are dicts with ``id``, ``internalDate`` (epoch milliseconds,
+    as returned by Gmail) and the formatted ``text``.
+    """
+
+    def __init__(
+        self,
+        store: SummaryStore,
+        summarizer: MapReduceSummarizer,
+        timezone: str = "UTC",
+        chunk_tokens: int = 3000,
+    ) -> None:
+        self.store = store
+        self.summarizer = summarizer
+        self.tz = ZoneInfo(timezone)
+        self.chunk_tokens = chunk_tokens
+        self.stats = {"messages_summarized": 0, "days_built": 0, "days_reused": 0}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, summarizer: MapReduceSummarizer) -> "RollupSummarizer":
+        return cls(
+            SummaryStore.from_env(),
+            summarizer,
+            timezone=os.getenv("MCP_TIMEZONE", "UTC"),
+        )
+
+    def day_of(self, message: dict[str, Any]) -> str:
+        millis = int(message.get("internalDate") or 0)
+        return datetime.fromtimestamp(millis / 1000, self.tz).date().isoformat()
+
+    def day_bounds(self, day: str) -> tuple[int, int]:
+        """Return epoch seconds ``[start, end)`` of ``day`` in this timezone.
+
+        Use them to fetch a day's mail (``after:START before:END``) so the
+        fetch agrees with ``day_of``.
+        """
+        start = datetime.combine(date.fromisoformat(day), dtime(), self.tz)
+        end = datetime.combine(start.date() + timedelta(days=1), dtime(), self.tz)
+        return int(start.timestamp()), int(end.timestamp())
+
+    def _today(self) -> date:
+        return datetime.now(self.tz).date()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _store_messages(
+        self, messages: list[dict[str, Any]], scope: str, day: str | None = None
+    ) -> None:
+        """Store new messages and add them to ``scope``.
+
+        With ``day``, every message is filed under it, whatever ``day_of``
+        says, so a day's summary covers all the mail fetched for it.
+        """
+        known = self.store.message_summaries([m["id"] for m in messages])
+        new = [m for m in messages if m["id"] not in known]
+        count = get_tokenizer().count
+        long = [m for m in new if count(m["text"]) > MESSAGE_SUMMARY_TOKENS]
+        summaries = dict(
+            zip(
+                (m["id"] for m in long),
+                self.summarizer.map(MESSAGE_PROMPT, [m["text"] for m in long]),
+            )
+        )
+        self._count("messages_summarized", len(long))
+        self.store.put_message_summaries(
+            [
+                (
+                    m["id"],
+                    self.day_of(m),
+                    int(m.get("internalDate") or 0),
+                    summaries.get(m["id"], m["text"]),
+                )
+                for m in new
+            ]
+        )
+        self.store.add_to_scope(
+            scope, [(day or self.day_of(m), m["id"]) for m in messages]
+        )
+
+    def cached_day(self, day: str, scope: str = "") -> str | None:
+        """Return the stored summary of a finished ``day``, if any."""
+        stored = self.store.day(day, scope)
+        if stored and stored[2]:
+            self._count("days_reused")
+            return stored[1]
+        return None
+
+    def _build_day(self, day: str, scope: str) -> tuple[str, str]:
+        rows = self.store.day_messages(day, scope)
+        digest = _digest(sorted(message_id for message_id, _ in rows))
+        return digest, "".join(self._day_stream(day, scope, rows, digest))
+
+    def _day_stream(
+        self, day: str, scope: str, rows: list[tuple[str, str]], digest: str
+    ) -> Iterator[str]:
+        if not rows:
+            yield "No emails found."
+            return
+        stored = self.store.day(day, scope)
+        if stored and stored[0] == digest:
+            self._count("days_reused")
+            yield stored[1]
+            return
+        text = "\n\n".join(summary for _, summary in rows)
+        parts: list[str] = []
+        for piece in self.summarizer.summarize_stream(
+            DAY_PROMPT.format(day=day), text, self.chunk_tokens
+        ):
+            parts.append(piece)
+            yield piece
+        complete = date.fromisoformat(day) < self._today()
+        self.store.put_day(day, scope, digest, "".join(parts), len(rows), complete)
+        self._count("days_built")
+
+    def day_summaries(
+        self, messages: list[dict[str, Any]], scope: str = ""
+    ) -> dict[str, tuple[str, str]]:
+        """Return ``{day: (digest, summary)}`` for the days ``messages`` cover."""
+        self._store_messages(messages, scope)
+        days = sorted({self.day_of(m) for m in messages})
+        if len(days) <= 1:
+            return {day: self._build_day(day, scope) for day in days}
+        with ThreadPoolExecutor(
+            max_workers=min(self.summarizer.max_in_flight, len(days)),
+            thread_name_prefix="rollup",
+        ) as pool:
+            built = pool.map(lambda day: self._build_day(day, scope), days)
+            return dict(zip(days, built))
+
+    def summarize_day(
+        self, day: str, messages: list[dict[str, Any]], scope: str = ""
+    ) -> str:
+        """Return the summary for ``day`` including ``messages``."""
+        return "".join(self.summarize_day_stream(day, messages, scope))
+
+    def summarize_day_stream(
+        self, day: str, messages: list[dict[str, Any]], scope: str = ""
+    ) -> Iterator[str]:
+        """Yield the summary for ``day`` as it is generated.
+
+        The summary is stored only once the stream has been read to the end.
+        """
+        if not messages:
+            yield self.cached_day(day, scope) or "No emails found."
+            return
+        self._store_messages(messages, scope, day)
+        rows = self.store.day_messages(day, scope)
+        digest = _digest(sorted(message_id for message_id, _ in rows))
+        yield from self._day_stream(day, scope, rows, digest)
+
+    def answer(
+        self, question: str, messages: list[dict[str, Any]], scope: str = ""
+    ) -> str:
+        """Answer ``question`` over ``messages`` using their day summaries."""
+        return "".join(self.answer_stream(question, messages, scope))
+
+    def answer_stream(
+        self, question: str, messages: list[dict[str, Any]], scope: str = ""
+    ) -> Iterator[str]:
+        """Like ``answer`` but yield the final answer as it is generated."""
+        by_day = self.day_summaries(messages, scope)
+        if len(by_day) == 1:
+            ((day, (_, summary)),) = by_day.items()
+            if question == DAY_PROMPT.format(day=day):
+                yield summary
+                return
+        key = _digest(
+            [question, *(f"{day}:{digest}" for day, (digest, _) in by_day.items())]
+        )
+        stored = self.store.span(key)
+        if stored is not None:
+            yield stored
+            return
+        text = "\n\n".join(f"{day}:\n{summary}" for day, (_, summary) in by_day.items())
+        parts: list[str] = []
+        for piece in self.summarizer.summarize_stream(
+            question, text, self.chunk_tokens
+        ):
+            parts.append(piece)
+            yield piece
+        self.store.put_span(key, "".join(parts))
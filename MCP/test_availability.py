@@ -0,0 +1,33 @@
+import unittest
+from datetime import date, time
+from zoneinfo import ZoneInfo
+
+from availability import find_common_slots, parse_datetime, working_windows
+
+
+class TestFindCommonSlots(unittest.TestCase):
+    def test_busy_map_is_aligned_across_dst_change(self):
+        tz = ZoneInfo("America/New_York")
+        # Clocks go forward on Sunday 2025-03-09.
+        windows = working_windows(
+            date(2025, 3, 7), date(2025, 3, 10), time(9), time(17), tz
+        )
+        # 09:00-17:00 EDT on Monday, as freebusy returns it.
+        busy = {
+            "primary": [
+                (
+                    parse_datetime("2025-03-10T13:00:00Z"),
+                    parse_datetime("2025-03-10T21:00:00Z"),
+                )
+            ]
+        }
+        slots = find_common_slots(busy, windows, 60, step_minutes=60, limit=100)
+        days = {s.date().isoformat() for s, _ in slots}
+        self.assertNotIn("2025-03-10", days)
+        sunday = [s.hour for s, _ in slots if s.date() == date(2025, 3, 9)]
+        self.assertEqual(sunday, list(range(9, 17)))
+        self.assertTrue(all(s.tzinfo is tz for s, _ in slots))
+
+
+if __name__ == "__main__":
+    unittest.main()
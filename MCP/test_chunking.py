@@ -0,0 +1,60 @@
+import unittest
+
+from chunking import Tokenizer, chunk_messages, get_tokenizer, split_messages
+
+
+class WordTokenizer(Tokenizer):
+    """One token per whitespace-separated word, for predictable budgets."""
+
+    def _count(self, text):
+        return len(text.split())
+
+    def split(self, text, budget):
+        words = text.split()
+        return [" ".join(words[i : i + budget]) for i in range(0, len(words), budget)]
+
+
+def message(i, body_words=5):
+    body = " ".join(f"b{i}_{n}" for n in range(body_words))
+    return f"Date: d{i}\nFrom: f{i}\nSubject: s{i}\nLabels: INBOX\n{body}"
+
+
+class TestChunking(unittest.TestCase):
+    def setUp(self):
+        self.tokenizer = WordTokenizer()
+
+    def test_messages_are_packed_whole_and_keep_newlines(self):
+        text = "\n\n".join(message(i) for i in range(5))
+        # Each message is 13 words; two fit in a 30-token budget.
+        chunks = chunk_messages(text, 30, self.tokenizer)
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(chunks[0], message(0) + "\n\n" + message(1))
+        self.assertEqual(split_messages("\n\n".join(chunks)), split_messages(text))
+
+    def test_only_oversized_messages_are_split_on_lines(self):
+        big = message(1, body_words=25)
+        text = "\n\n".join([message(0), big, message(2)])
+        chunks = chunk_messages(text, 20, self.tokenizer)
+        self.assertEqual(chunks[0], message(0))
+        self.assertTrue(chunks[1].startswith("Date: d1\nFrom: f1\nSubject: s1"))
+        # The tail of the split message shares a chunk with the next one.
+        self.assertTrue(chunks[-1].endswith("\n\n" + message(2)))
+        self.assertTrue(all(self.tokenizer.count(c) <= 20 for c in chunks))
+        self.assertEqual(" ".join(chunks).split(), text.split())
+
+    def test_blank_line_inside_body_is_not_a_boundary(self):
+        text = message(0) + "\n\nsecond paragraph\n\n" + message(1)
+        self.assertEqual(len(split_messages(text)), 2)
+
+    def test_counts_are_cached(self):
+        tokenizer = get_tokenizer()
+        text = "\n\n".join(message(i, 50) for i in range(20))
+        chunk_messages(text, 200, tokenizer)
+        hits = tokenizer.count.cache_info().hits
+        chunks = chunk_messages(text, 200, tokenizer)
+        self.assertGreater(tokenizer.count.cache_info().hits, hits)
+        self.assertTrue(all(tokenizer.count(c) <= 200 for c in chunks))
+
+
+if __name__ == "__main__":
+    unittest.main()
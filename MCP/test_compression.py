@@ -0,0 +1,135 @@
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+from compression import CompressionPipeline, RuleSet
+from email_utils import condense_repetitive_messages
+
+
+def _message(subject, body):
+    return f"Date: Mon\nFrom: a@example.com\nSubject: {subject}\nLabels: INBOX\n{body}"
+
+
+class TestCompressionPipeline(unittest.TestCase):
+    def compress(self, body, stages=None):
+        text, _ = CompressionPipeline(stages).compress(_message("Hi", body))
+        return text.split("Labels: INBOX\n", 1)[1]
+
+    def test_rule_sets_strip_noise_and_keep_content(self):
+        cases = [
+            (
+                "Sounds good, I&#39;ll send it. On Mon, May 19, 2025 at 9:00 AM"
+                " Bob &lt;bob@example.com&gt; wrote: &gt; Can you send it?",
+                "Sounds good, I'll send it.",
+            ),
+            ("See below.\n> old line\n> older line", "See below."),
+            (
+                "Sale ends today at shop.com. You are receiving this email because"
+                " you signed up at shop.com. Unsubscribe here.",
+                "Sale ends today at shop.com.",
+            ),
+            (
+                "Please sign by Friday. CONFIDENTIALITY NOTICE: This email is"
+                " intended only for the addressee.",
+                "Please sign by Friday.",
+            ),
+            (
+                "Contract attached.\nBest regards,\nCarol Smith\nCounsel | Corp",
+                "Contract attached.",
+            ),
+            (
+                "\u034f \u200c \u034fCan we move the sync? Sent from my iPhone",
+                "Can we move the sync?",
+            ),
+        ]
+        for body, expected in cases:
+            with self.subTest(body=body):
+                self.assertEqual(self.compress(body), expected)
+
+    def test_ordinary_sentences_with_boilerplate_words_survive(self):
+        bodies = [
+            "This message contains the confidential Q3 numbers. Revenue is up 12%.",
+            "Hi team. This email is confidential until Monday. Revenue is up 12%.",
+            "Thanks\nPlease pay invoice 123 by Friday.",
+            "Best,\nHere is the plan: ship on Monday.\nThen we review.",
+            "On Monday the CFO wrote: budgets are frozen until July.",
+            "We will opt out of the vendor contract. Please unsubscribe me later.",
+            "Can you click the button to opt out of the vendor plan?",
+        ]
+        for body in bodies:
+            with self.subTest(body=body):
+                self.assertEqual(self.compress(body), body)
+
+    def test_footers_only_count_in_the_last_paragraph(self):
+        body = (
+            "Report attached.\n\nThis email and any attachments are confidential"
+            " and intended solely for the addressee."
+        )
+        self.assertEqual(self.compress(body), "Report attached.")
+        body = (
+            "DISCLAIMER: these are draft numbers.\n\nRevenue is up 12%."
+            " Costs are flat."
+        )
+        self.assertEqual(self.compress(body), body.replace("\n\n", "\n"))
+
+    def test_long_unpunctuated_body_is_linear(self):
+        body = "Keep this. " + "word " * 8000 + "unsubscribe here"
+        start = time.perf_counter()
+        self.assertEqual(self.compress(body), "Keep this.")
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_report_counts_tokens_saved_per_stage(self):
+        text = "\n\n".join(
+            [
+                _message("Budget", "Numbers attached. Sent from my iPhone"),
+                _message("Sale", "40% off. Unsubscribe from these emails."),
+            ]
+        )
+        pipeline = CompressionPipeline()
+        result, report = pipeline.compress(condense_repetitive_messages(text))
+        self.assertEqual(result.count("Subject: "), 2)
+        self.assertGreater(report["saved"]["signatures"], 0)
+        self.assertGreater(report["saved"]["unsubscribe"], 0)
+        self.assertEqual(report["saved"]["quoted_replies"], 0)
+        self.assertEqual(
+            sum(report["saved"].values()),
+            report["tokens_before"] - report["tokens_after"],
+        )
+        self.assertEqual(
+            pipeline.stats["tokens_saved"],
+            report["tokens_before"] - report["tokens_after"],
+        )
+
+    def test_message_dicts_are_compressed_one_by_one(self):
+        messages = [
+            {
+                "id": "1",
+                "text": _message("Budget", "Numbers attached. Sent from my iPhone"),
+            },
+            {"id": "2", "text": _message("Sale", "40% off. Unsubscribe here.")},
+        ]
+        result, report = CompressionPipeline().compress_messages(messages)
+        self.assertEqual([m["id"] for m in result], ["1", "2"])
+        self.assertTrue(result[0]["text"].endswith("\nNumbers attached."))
+        self.assertTrue(result[1]["text"].endswith("\n40% off."))
+        self.assertEqual(report["messages"], 2)
+
+    def test_stages_are_pluggable_and_selectable(self):
+        def no_tracking(body):
+            return body.replace("[tracking pixel]", "")
+
+        stages = [RuleSet("shouting", remove=[r"!{2,}"]), no_tracking]
+        self.assertEqual(self.compress("Done!!! [tracking pixel]", stages), "Done")
+        with patch.dict(os.environ, {"MCP_COMPRESSION": "signatures"}):
+            pipeline = CompressionPipeline.from_env()
+        self.assertEqual([s.name for s in pipeline.stages], ["signatures"])
+        with patch.dict(os.environ, {"MCP_COMPRESSION": "off"}):
+            self.assertEqual(CompressionPipeline.from_env().stages, [])
+        with patch.dict(os.environ, {"MCP_COMPRESSION": "bogus"}):
+            with self.assertRaises(ValueError):
+                CompressionPipeline.from_env()
+
+
+if __name__ == "__main__":
+    unittest.main()
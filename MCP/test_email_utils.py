@@ -1,6 +1,6 @@
 import unittest
 
-from email_utils import condense_repetitive_messages
+from email_utils import condense_repetitive_messages, condense_repetitive_records
 
 
 class TestEmailUtils(unittest.TestCase):
@@ -18,6 +18,17 @@ class TestEmailUtils(unittest.TestCase):
         # Unique subjects preserved
         self.assertIn("Subject: Update", out)
 
+    def test_condense_repetitive_records_per_group(self):
+        messages = [
+            {"id": "1", "day": "mon", "text": "From: a\nSubject: Report\nSnippet1"},
+            {"id": "2", "day": "mon", "text": "From: b\nSubject: Report\nSnippet2"},
+            {"id": "3", "day": "tue", "text": "From: c\nSubject: Report\nSnippet3"},
+        ]
+        out = condense_repetitive_records(messages, lambda m: m["day"])
+        self.assertEqual([m["id"] for m in out], ["1", "3"])
+        self.assertIn("Subject: Report (x2)", out[0]["text"])
+        self.assertEqual(out[1], messages[2])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,87 @@
+import os
+import unittest
+from unittest.mock import patch
+
+import extractive
+import llm_service
+from extractive import ExtractiveService, rank_sentences, shrink_messages, summarize
+from llm_router import RateLimitError, RouterLLMService
+from test_llm_router import StubProvider
+
+MAILBOX = """Date: Mon, 19 May 2025 09:00:00 +0000
+From: a@example.com
+Subject: Quarterly budget review
+Labels: INBOX
+The quarterly budget review moved to Thursday. Please bring the budget figures. Thanks!
+
+Date: Mon, 19 May 2025 10:00:00 +0000
+From: b@example.com
+Subject: Lunch
+Labels: INBOX
+Anyone up for tacos today? The new place opened downtown.
+
+Date: Mon, 19 May 2025 11:00:00 +0000
+From: c@example.com
+Subject: Budget figures updated
+Labels: INBOX
+I updated the budget figures for the quarterly review. Sent from my phone."""
+
+
+class TestExtractive(unittest.TestCase):
+    def test_summary_keeps_central_sentences_in_order(self):
+        summary = summarize(MAILBOX, max_sentences=4)
+        self.assertEqual(
+            summary.splitlines(),
+            [
+                "- Quarterly budget review",
+                "- The quarterly budget review moved to Thursday.",
+                "- Budget figures updated",
+                "- I updated the budget figures for the quarterly review.",
+            ],
+        )
+        self.assertEqual(summarize(MAILBOX, max_sentences=4), summary)
+        self.assertEqual(summarize(""), "No emails found.")
+
+    def test_shrink_keeps_headers_and_a_sentence_per_message(self):
+        shrunk = shrink_messages(MAILBOX, ratio=0.3)
+        self.assertLess(len(shrunk), len(MAILBOX))
+        for header in ("Subject: Lunch", "From: c@example.com", "Labels: INBOX"):
+            self.assertIn(header, shrunk)
+        self.assertEqual(len(shrunk.split("\n\n")), 3)
+        self.assertIn("quarterly budget review moved", shrunk)
+        self.assertNotIn("Sent from my phone", shrunk)
+
+    @unittest.skipIf(extractive.np is None, "numpy not installed")
+    def test_numpy_and_python_rankings_agree(self):
+        sentences = [s for s in MAILBOX.splitlines() if not s.endswith("0000")]
+        numpy_scores = rank_sentences(sentences)
+        with patch.object(extractive, "np", None):
+            self.assertEqual(rank_sentences(sentences), numpy_scores)
+        # Every sentence shares "update", and a few share nothing else.
+        topics = ["budget review", "release notes", "billing issue", "travel"]
+        sentences = [
+            f"Update {i}: {topics[i % 4]} item{i % 7} pending" for i in range(300)
+        ] + ["Lone words here", "Another isolated phrase"]
+        numpy_scores = rank_sentences(sentences)
+        with patch.object(extractive, "np", None):
+            self.assertEqual(rank_sentences(sentences), numpy_scores)
+
+    def test_provider_answers_prompts_and_backs_up_the_router(self):
+        env = {"MCP_LLM_PROVIDER": "extractive", "MCP_LLM_CACHE": "0"}
+        with patch.dict(os.environ, env):
+            service = llm_service.get_service()
+        self.assertIsInstance(service, ExtractiveService)
+        prompt = [{"role": "user", "content": f"Emails:\n{MAILBOX}\n\nQuestion: q"}]
+        expected = summarize(MAILBOX, service.max_sentences)
+        self.assertEqual(service.chat(prompt), expected)
+        router = RouterLLMService(
+            {
+                "remote": StubProvider("remote", error=RateLimitError("down")),
+                "extractive": service,
+            }
+        )
+        self.assertEqual(router.chat(prompt), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import MagicMock
+
+from gmail_mirror import GmailMirror
+
+
+def _message(mid, labels):
+    return {
+        "id": mid,
+        "threadId": "t" + mid,
+        "internalDate": "1700000000000",
+        "labelIds": labels,
+        "snippet": "hello",
+        "payload": {"headers": [{"name": "Subject", "value": "Hi"}]},
+    }
+
+
+class NotFound(Exception):
+    resp = type("Resp", (), {"status": 404})()
+
+
+class TestGmailMirror(unittest.TestCase):
+    def setUp(self):
+        self.mirror = GmailMirror(":memory:", max_age=0)
+        self.service = MagicMock()
+        users = self.service.users.return_value
+        users.getProfile.return_value.execute.return_value = {"historyId": "10"}
+        self.history = users.history.return_value.list.return_value
+        self.mirror.sync(self.service)
+        self.mirror.put_many([_message("1", ["INBOX"]), _message("2", ["INBOX"])])
+
+    def test_history_applies_label_changes_and_deletions(self):
+        self.history.execute.return_value = {
+            "historyId": "12",
+            "history": [
+                {
+                    "labelsAdded": [{"message": {"id": "1"}, "labelIds": ["STARRED"]}],
+                    "labelsRemoved": [{"message": {"id": "1"}, "labelIds": ["INBOX"]}],
+                },
+                {"messagesDeleted": [{"message": {"id": "2", "labelIds": ["INBOX"]}}]},
+            ],
+        }
+        self.mirror.store_label_count("INBOX", 2)
+        self.mirror.store_label_count("SENT", 5)
+        self.mirror.sync(self.service)
+
+        stored = self.mirror.get_many(["1", "2"])
+        self.assertEqual(list(stored), ["1"])
+        self.assertEqual(stored["1"]["labelIds"], ["STARRED"])
+        self.assertEqual(stored["1"]["payload"]["headers"][0]["value"], "Hi")
+        self.assertIsNone(self.mirror.label_count("INBOX"))
+        self.assertEqual(self.mirror.label_count("SENT"), 5)
+        self.assertEqual(self.mirror.history_id, "12")
+
+    def test_expired_history_id_resets_mirror(self):
+        self.history.execute.side_effect = NotFound()
+        self.mirror.sync(self.service)
+        self.assertEqual(self.mirror.get_many(["1", "2"]), {})
+        self.assertEqual(self.mirror.stats["resets"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
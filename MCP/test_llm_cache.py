@@ -0,0 +1,70 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from llm_cache import ResponseCache, cache_key
+from llm_service import BaseLLMService, CachedLLMService
+
+MESSAGES = [{"role": "user", "content": "Summarize 2025-05-19"}]
+
+
+class CountingService(BaseLLMService):
+    def __init__(self):
+        self.calls = 0
+
+    def chat(self, messages, model="gpt-4o"):
+        self.calls += 1
+        return f"reply {self.calls}"
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(":memory:", ttl=60, max_entries=2)
+        self.provider = CountingService()
+        self.llm = CachedLLMService(self.provider, self.cache)
+
+    def test_repeated_chat_is_served_from_cache(self):
+        self.assertEqual(self.llm.chat(MESSAGES), "reply 1")
+        self.assertEqual(self.llm.chat(MESSAGES), "reply 1")
+        self.assertEqual(self.llm.chat(MESSAGES, model="other"), "reply 2")
+        self.assertEqual(self.provider.calls, 2)
+        self.assertEqual(self.cache.stats["hits"], 1)
+        self.assertEqual(self.cache.stats["misses"], 2)
+
+    def test_stream_is_cached_once_complete(self):
+        stream = self.llm.chat_stream(MESSAGES)
+        self.assertEqual(next(stream), "reply 1")
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(list(stream), [])
+        self.assertEqual(list(self.llm.chat_stream(MESSAGES)), ["reply 1"])
+        self.assertEqual(self.provider.calls, 1)
+        self.assertEqual(self.cache.stats["hits"], 1)
+
+    def test_bypass_refreshes_cached_reply(self):
+        self.llm.chat(MESSAGES)
+        self.assertEqual(self.llm.chat(MESSAGES, bypass_cache=True), "reply 2")
+        self.assertEqual(self.llm.chat(MESSAGES), "reply 2")
+        self.assertEqual(self.cache.stats["bypassed"], 1)
+
+    def test_entries_expire_after_ttl(self):
+        self.llm.chat(MESSAGES)
+        with patch("llm_cache.time.time", return_value=10**10):
+            self.assertEqual(self.llm.chat(MESSAGES), "reply 2")
+        self.assertEqual(self.cache.stats["expired"], 1)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        keys = [cache_key("m", [{"role": "user", "content": str(i)}]) for i in range(3)]
+        now = time.time()
+        with patch("llm_cache.time.time", side_effect=[now - 3, now - 2, now - 1, now]):
+            self.cache.put(keys[0], "m", "a")
+            self.cache.put(keys[1], "m", "b")
+            self.cache.get(keys[0])
+            self.cache.put(keys[2], "m", "c")
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertEqual(self.cache.get(keys[0]), "a")
+        self.assertEqual(self.cache.stats["evictions"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from llm_router import RateLimitError, RouterLLMService, is_rate_limited
+import llm_service
+from llm_service import BaseLLMService
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class StubProvider(BaseLLMService):
+    """Local provider with configurable latency and failures."""
+
+    def __init__(self, name, latency=0.0, error=None):
+        self.name = name
+        self.latency = latency
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def chat(self, messages, model="gpt-4o"):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+        return self.name
+
+
+class Http429(Exception):
+    status_code = 429
+
+
+class TestRouterLLMService(unittest.TestCase):
+    def test_rate_limited_provider_fails_over_and_cools_down(self):
+        primary = StubProvider("primary", error=RateLimitError("slow down"))
+        backup = StubProvider("backup")
+        router = RouterLLMService({"primary": primary, "backup": backup})
+        self.assertEqual(router.chat(MESSAGES), "backup")
+        self.assertEqual(router.chat(MESSAGES), "backup")
+        # The throttled provider is skipped while it cools down.
+        self.assertEqual(primary.calls, 1)
+        self.assertEqual(router.stats["failovers"], 1)
+        self.assertTrue(router.snapshot()["primary"]["cooling_down"])
+
+    def test_stream_fails_over_only_before_first_piece(self):
+        primary = StubProvider("primary", error=RateLimitError("slow down"))
+        backup = StubProvider("backup")
+        router = RouterLLMService({"primary": primary, "backup": backup})
+        self.assertEqual(list(router.chat_stream(MESSAGES)), ["backup"])
+        self.assertEqual(router.stats["failovers"], 1)
+
+        class Broken(StubProvider):
+            def chat_stream(self, messages, model="gpt-4o"):
+                yield "partial"
+                raise RuntimeError("connection reset")
+
+        router = RouterLLMService({"broken": Broken("broken"), "backup": backup})
+        stream = router.chat_stream(MESSAGES)
+        self.assertEqual(next(stream), "partial")
+        with self.assertRaises(RuntimeError):
+            next(stream)
+        self.assertEqual(router.snapshot()["broken"]["errors"], 1)
+
+    def test_routes_to_fastest_provider(self):
+        slow = StubProvider("slow", latency=0.03)
+        fast = StubProvider("fast", latency=0.0)
+        router = RouterLLMService({"slow": slow, "fast": fast}, hedge_quantile=0)
+        router.chat(MESSAGES)
+        slow.error = RuntimeError("boom")
+        router.chat(MESSAGES)  # fails over, measuring "fast"
+        slow.error = None
+        router.health["slow"].outcomes.clear()
+        self.assertEqual(router.chat(MESSAGES), "fast")
+
+    def test_slow_request_is_hedged(self):
+        primary = StubProvider("primary", latency=0.001)
+        backup = StubProvider("backup")
+        router = RouterLLMService(
+            {"primary": primary, "backup": backup}, hedge_quantile=0.95, min_samples=3
+        )
+        for _ in range(3):
+            router.chat(MESSAGES)
+        primary.latency = 0.5
+        start = time.perf_counter()
+        self.assertEqual(router.chat(MESSAGES), "backup")
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertEqual(router.stats["hedges"], 1)
+        self.assertEqual(router.stats["hedge_wins"], 1)
+
+    def test_concurrent_calls_are_not_capped_or_hedged_while_queued(self):
+        primary = StubProvider("primary", latency=0.05)
+        backup = StubProvider("backup")
+        router = RouterLLMService({"primary": primary, "backup": backup}, min_samples=3)
+        router.health["primary"].latencies.extend([0.15] * 3)
+        threads = [
+            threading.Thread(target=router.chat, args=(MESSAGES,)) for _ in range(16)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLess(time.perf_counter() - start, 0.15)
+        self.assertEqual(router.stats["hedges"], 0)
+
+        queued = RouterLLMService(
+            {"primary": primary, "backup": backup}, min_samples=3, max_workers=1
+        )
+        queued.health["primary"].latencies.extend([0.15] * 3)
+        threads = [
+            threading.Thread(target=queued.chat, args=(MESSAGES,)) for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # The last call waits 0.15s for the worker but runs for only 0.05s.
+        self.assertEqual(queued.stats["hedges"], 0)
+
+    def test_all_providers_failing_raises_last_error(self):
+        router = RouterLLMService(
+            {
+                "a": StubProvider("a", error=RuntimeError("a down")),
+                "b": StubProvider("b", error=RuntimeError("b down")),
+            }
+        )
+        with self.assertRaisesRegex(RuntimeError, "b down"):
+            router.chat(MESSAGES)
+
+    def test_rate_limit_detection(self):
+        self.assertTrue(is_rate_limited(Http429()))
+        self.assertFalse(is_rate_limited(ValueError()))
+
+    def test_get_service_builds_router_from_provider_list(self):
+        providers = {"a": lambda: StubProvider("a"), "b": lambda: StubProvider("b")}
+        env = {"MCP_LLM_PROVIDER": "a, b", "MCP_LLM_CACHE": "0"}
+        with patch.dict(llm_service._PROVIDERS, providers), patch.dict(
+            "os.environ", env
+        ):
+            service = llm_service.get_service()
+        self.assertIsInstance(service, RouterLLMService)
+        self.assertEqual(list(service.providers), ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
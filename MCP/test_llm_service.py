@@ -0,0 +1,60 @@
+import asyncio
+import os
+import threading
+import unittest
+from unittest.mock import patch
+
+import llm_service
+from llm_cache import ResponseCache
+from llm_service import BaseLLMService, CachedLLMService, shared_service
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class CountingService(BaseLLMService):
+    built = 0
+
+    def __init__(self):
+        CountingService.built += 1
+        self.calls = 0
+
+    def chat(self, messages, model="gpt-4o"):
+        self.calls += 1
+        return f"reply {self.calls}"
+
+
+class TestSharedService(unittest.TestCase):
+    def setUp(self):
+        CountingService.built = 0
+        llm_service.reset_shared_services()
+        self.addCleanup(llm_service.reset_shared_services)
+
+    def test_service_is_built_once_per_process(self):
+        env = {"MCP_LLM_PROVIDER": "counting", "MCP_LLM_CACHE": "0"}
+        seen = []
+        with patch.dict(llm_service._PROVIDERS, {"counting": CountingService}):
+            with patch.dict(os.environ, env):
+                threads = [
+                    threading.Thread(target=lambda: seen.append(shared_service()))
+                    for _ in range(8)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        self.assertEqual(CountingService.built, 1)
+        self.assertTrue(all(service is seen[0] for service in seen))
+
+    def test_async_chat_falls_back_to_thread_and_uses_cache(self):
+        provider = CountingService()
+        llm = CachedLLMService(provider, ResponseCache(":memory:"))
+
+        async def ask_twice():
+            return [await llm.achat(MESSAGES), await llm.achat(MESSAGES)]
+
+        self.assertEqual(asyncio.run(ask_twice()), ["reply 1", "reply 1"])
+        self.assertEqual(provider.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
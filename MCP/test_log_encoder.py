@@ -0,0 +1,81 @@
+import json
+import unittest
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from log_encoder import compile_key_matcher, dumps_redacted, write_redacted_json
+
+SENSITIVE = {"token", "secret", "api_key", "access_token"}
+
+
+def legacy_redact(value: Any) -> Any:
+    """The deep-copying redaction log_call used before the streaming encoder."""
+    if isinstance(value, Mapping):
+        return {
+            k: "[REDACTED]" if k.lower() in SENSITIVE else legacy_redact(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [legacy_redact(v) for v in value]
+    return value
+
+
+class TestLogEncoder(unittest.TestCase):
+    def setUp(self):
+        self.matcher = compile_key_matcher(SENSITIVE)
+
+    def test_matches_legacy_redaction(self):
+        payloads = [
+            None,
+            "plain",
+            42,
+            [],
+            {},
+            {"Token": "abc", "nested": {"API_KEY": 1, "ok": [1, 2.5, True, None]}},
+            {"messages": [{"id": "1", "snippet": 'café \U0001f600 "q"\n'}]},
+            {"values": [float("nan"), float("inf"), -0.0, 1e300, -7]},
+            {"items": [{"access_token": {"deep": "x"}}, [{"secret": "s"}]]},
+            MappingProxyType({"secret": "s", "other": "o"}),
+        ]
+        for payload in payloads:
+            self.assertEqual(
+                dumps_redacted(payload, self.matcher),
+                json.dumps(legacy_redact(payload)),
+                msg=repr(payload),
+            )
+
+    def test_non_string_keys_match_json_dumps(self):
+        # The old _redact raised AttributeError on these keys.
+        # True == 1, so the bool key needs a dict of its own.
+        for payload in (
+            {1: "int key", 2.5: "float key", None: "none key"},
+            {True: "bool key", False: "false key"},
+        ):
+            self.assertEqual(dumps_redacted(payload, self.matcher), json.dumps(payload))
+
+    def test_redacts_inside_tuples_and_patterns(self):
+        matcher = compile_key_matcher(SENSITIVE, [r".*password.*", r"x-api-\w+"])
+        payload = ({"token": "t"}, {"DB_Password": "p", "X-Api-Key": "k", "x-apis": 1})
+        self.assertEqual(
+            json.loads(dumps_redacted(payload, matcher)),
+            [
+                {"token": "[REDACTED]"},
+                {"DB_Password": "[REDACTED]", "X-Api-Key": "[REDACTED]", "x-apis": 1},
+            ],
+        )
+
+    def test_large_arrays_are_written_in_chunks(self):
+        chunks = []
+        payload = {"messages": [{"id": str(i), "token": "t"} for i in range(5000)]}
+        write_redacted_json(payload, chunks.append, self.matcher)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), json.dumps(legacy_redact(payload)))
+
+    def test_unserializable_values_fall_back_to_str(self):
+        self.assertEqual(
+            dumps_redacted({"when": {1, 2}}, self.matcher), '{"when": "{1, 2}"}'
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
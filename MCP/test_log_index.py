@@ -0,0 +1,60 @@
+import json
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+from log_index import LogIndexHandler, query_logs
+
+
+def _line(ts, name, module="server"):
+    return json.dumps({"timestamp": ts, "module": module, "name": name, "request": {}})
+
+
+class TestLogIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.index = self.dir / "index.db"
+        self.log_file = self.dir / "app.log"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_backfills_existing_log_and_filters(self):
+        self.log_file.write_text(
+            "\n".join(
+                [
+                    _line("2025-05-19T10:00:00+00:00", "send_email"),
+                    "not json",
+                    _line("2025-05-19T11:00:00+00:00", "list_recent_emails"),
+                    _line("2025-05-19T12:00:00+00:00", "send_email", module="main"),
+                ]
+            )
+            + "\n"
+        )
+        handler = LogIndexHandler(self.index, self.log_file)
+        handler.emit(logging.makeLogRecord({"msg": "started", "module": "web_gui"}))
+        handler.close()
+
+        result = query_logs(self.index, name="send_email")
+        self.assertEqual([e["module"] for e in result["entries"]], ["main", "server"])
+        result = query_logs(self.index, module="server", since="2025-05-19T10:30:00Z")
+        self.assertEqual([e["name"] for e in result["entries"]], ["list_recent_emails"])
+        result = query_logs(self.index, until="2025-05-19T10:30:00")
+        self.assertEqual(len(result["entries"]), 1)
+        # The log page sends browser-local filter times with their offset.
+        result = query_logs(self.index, until="2025-05-19T12:30:00+02:00")
+        self.assertEqual(len(result["entries"]), 1)
+        self.assertEqual(
+            query_logs(self.index, limit=1)["entries"][0]["message"], "started"
+        )
+
+    def test_missing_index_returns_empty_page(self):
+        self.assertEqual(
+            query_logs(self.dir / "missing.db"), {"entries": [], "next_before": None}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,8 @@
+import atexit
+import gzip
 import importlib
 import json
+import logging
 import os
 import tempfile
 import unittest
@@ -10,22 +13,51 @@ import logger_utils
 class TestLoggerUtils(unittest.TestCase):
     def setUp(self):
         self.tmp = tempfile.TemporaryDirectory()
+        self.log_dir = os.environ.get("MCP_LOG_DIR")
         os.environ["MCP_LOG_DIR"] = self.tmp.name
         importlib.reload(logger_utils)
         self.logger = logger_utils.get_logger()
-        for h in list(self.logger.handlers):
-            h.close()
-            self.logger.removeHandler(h)
+        self._close_handlers()
         if logger_utils.LOG_FILE.exists():
             logger_utils.LOG_FILE.unlink()
         self.logger = logger_utils.get_logger()  # re-create handler
 
     def tearDown(self):
+        self._close_handlers()
         self.tmp.cleanup()
-        os.environ.pop("MCP_LOG_DIR", None)
+        if self.log_dir is None:
+            os.environ.pop("MCP_LOG_DIR", None)
+        else:
+            os.environ["MCP_LOG_DIR"] = self.log_dir
+        for key in ("MCP_LOG_MAX_PAYLOAD", "MCP_LOG_ROTATE_BYTES", "MCP_LOG_SAMPLE"):
+            os.environ.pop(key, None)
+
+    def _reload(self, **env):
+        os.environ.update(env)
+        importlib.reload(logger_utils)
+        self._close_handlers()
+        self.logger = logger_utils.get_logger()
+
+    def _close_handlers(self):
+        for h in list(self.logger.handlers):
+            listener = getattr(h, "listener", None)
+            if listener is not None:
+                # QueueListener.stop is not idempotent before Python 3.12.
+                atexit.unregister(listener.stop)
+                listener.stop()
+                for target in listener.handlers:
+                    target.close()
+            h.close()
+            self.logger.removeHandler(h)
+
+    def _entries(self):
+        logger_utils.flush()
+        with logger_utils.LOG_FILE.open() as fh:
+            return [json.loads(line) for line in fh]
 
     def test_log_call_creates_json_entry(self):
         logger_utils.log_call("tool", {"token": "abc", "value": 1}, {"result": 42})
+        logger_utils.flush()
         self.assertTrue(logger_utils.LOG_FILE.exists())
         with logger_utils.LOG_FILE.open() as fh:
             line = fh.readline()
@@ -37,6 +69,84 @@ class TestLoggerUtils(unittest.TestCase):
         self.assertIn("timestamp", data)
         self.assertIn("module", data)
 
+    def test_background_writer_keeps_order_and_caller_module(self):
+        self.logger.error("plain message")
+        logger_utils.log_call("tool", {"n": 1}, "ok")
+        logger_utils.flush()
+        with logger_utils.LOG_FILE.open() as fh:
+            lines = fh.read().splitlines()
+        self.assertEqual(lines[0], "plain message")
+        self.assertEqual(json.loads(lines[1])["module"], __name__)
+
+    def test_large_payloads_are_summarized_with_hash(self):
+        self._reload(MCP_LOG_MAX_PAYLOAD="100")
+        logger_utils.log_call("tool", {"q": "x"}, {"messages": ["y" * 500]})
+        entry = self._entries()[0]
+        self.assertEqual(entry["request"], {"q": "x"})
+        self.assertTrue(entry["response"]["truncated"])
+        self.assertGreater(entry["response"]["bytes"], 500)
+        self.assertEqual(len(entry["response"]["sha256"]), 64)
+
+    def test_sampled_tools_are_dropped_at_rate(self):
+        self._reload(MCP_LOG_SAMPLE="noisy=0,half=0.5")
+        logger_utils.log_call("noisy", {}, {})
+        logger_utils.log_call("other", {}, {})
+        entries = self._entries()
+        self.assertEqual([e["name"] for e in entries], ["other"])
+        self.assertNotIn("sample_rate", entries[0])
+
+    def test_rotated_files_are_compressed(self):
+        self._reload(MCP_LOG_ROTATE_BYTES="200")
+        for i in range(5):
+            logger_utils.log_call("tool", {"i": i}, "x" * 100)
+        logger_utils.flush()
+        rotated = logger_utils.LOG_DIR / "app.log.1.gz"
+        self.assertTrue(rotated.exists())
+        with gzip.open(rotated, "rt") as fh:
+            self.assertEqual(json.loads(fh.readline())["name"], "tool")
+
+    def test_only_one_process_rotates_and_others_follow(self):
+        path = str(logger_utils.LOG_DIR / "shared.log")
+        handlers = [
+            logger_utils._SharedRotatingFileHandler(path, maxBytes=200, backupCount=9)
+            for _ in range(2)
+        ]
+        try:
+            for i in range(20):
+                handlers[i % 2].emit(logging.makeLogRecord({"msg": "x" * 40}))
+            self.assertTrue(handlers[0]._owner)
+            self.assertFalse(handlers[1]._owner)
+            for handler in handlers:
+                self.assertEqual(
+                    os.fstat(handler.stream.fileno()).st_ino, os.stat(path).st_ino
+                )
+            lines = 0
+            for i in ["", ".1", ".2", ".3", ".4"]:
+                with open(path + i) as fh:
+                    lines += len(fh.read().splitlines())
+            self.assertEqual(lines, 20)
+        finally:
+            for handler in handlers:
+                handler.close()
+
+    def test_entries_are_indexed_for_paginated_queries(self):
+        from log_index import query_logs
+
+        for i in range(5):
+            logger_utils.log_call("tool_a" if i % 2 else "tool_b", {"i": i}, "ok")
+        self.logger.error("plain message")
+        logger_utils.flush()
+
+        page = query_logs(logger_utils.INDEX_FILE, name="tool_b", limit=2)
+        self.assertEqual([e["request"]["i"] for e in page["entries"]], [4, 2])
+        older = query_logs(
+            logger_utils.INDEX_FILE, name="tool_b", before=page["next_before"]
+        )
+        self.assertEqual([e["request"]["i"] for e in older["entries"]], [0])
+        self.assertIsNone(older["next_before"])
+        latest = query_logs(logger_utils.INDEX_FILE, limit=1)["entries"][0]
+        self.assertEqual(latest["message"], "plain message")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from types import SimpleNamespace
+
+import metrics
+from metrics import MeteredHttp, MetricsRegistry, percentile
+
+
+class FakeHttp:
+    credentials = "creds"
+
+    def __init__(self, status=200, content=b"{}"):
+        self.status = status
+        self.content = content
+
+    def request(self, uri, method="GET", body=None, headers=None):
+        return SimpleNamespace(status=self.status), self.content
+
+
+def _count(counter, **labels):
+    return counter.values().get(metrics._labels(labels), 0)
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_percentiles_and_prometheus_text(self):
+        registry = MetricsRegistry()
+        hist = registry.histogram("t_seconds", "Test latency.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.2, 0.3, 2.0):
+            hist.observe(value, tool="a")
+        row = hist.summary()[(("tool", "a"),)]
+        self.assertEqual(row["count"], 4)
+        self.assertAlmostEqual(row["p50"], 0.25)
+        self.assertAlmostEqual(percentile([1.0, 2.0, 3.0], 0.99), 2.98)
+
+        registry.counter("t_errors_total", "Test errors.").inc(tool="a", status=500)
+        text = registry.render()
+        self.assertIn("# TYPE t_seconds histogram", text)
+        self.assertIn('t_seconds_bucket{tool="a",le="0.1"} 1', text)
+        self.assertIn('t_seconds_bucket{tool="a",le="1.0"} 3', text)
+        self.assertIn('t_seconds_bucket{tool="a",le="+Inf"} 4', text)
+        self.assertIn('t_seconds_count{tool="a"} 4', text)
+        self.assertIn('t_errors_total{status="500",tool="a"} 1', text)
+        with self.assertRaises(ValueError):
+            registry.counter("t_seconds", "clash")
+
+    def test_metered_http_labels_by_method_and_batch(self):
+        method = "gmail.users.messages.list"
+        before = _count(metrics.upstream_response_bytes, api="gmail")
+        http = MeteredHttp(FakeHttp(content=b"x" * 10), method)
+        http.request("https://gmail.googleapis.com/gmail/v1/users/me/messages")
+        http.request(
+            "https://gmail.googleapis.com/batch/gmail/v1", "POST", body="b" * 3
+        )
+        summary = metrics.upstream_latency.summary()
+        self.assertGreaterEqual(
+            summary[(("api", "gmail"), ("method", method))]["count"], 1
+        )
+        self.assertIn((("api", "gmail"), ("method", "batch")), summary)
+        self.assertEqual(
+            _count(metrics.upstream_response_bytes, api="gmail") - before, 20
+        )
+        self.assertEqual(http.credentials, "creds")
+
+        failing = MeteredHttp(FakeHttp(status=429), "calendar.events.list")
+        failing.request("https://www.googleapis.com/calendar/v3/calendars/x/events")
+        self.assertGreaterEqual(
+            _count(
+                metrics.upstream_errors,
+                api="calendar",
+                method="calendar.events.list",
+                status=429,
+            ),
+            1,
+        )
+
+    def test_llm_call_records_bytes_and_errors(self):
+        messages = [{"role": "user", "content": "héllo"}]
+        before = _count(metrics.llm_request_bytes, provider="stub")
+        with metrics.llm_call("stub", "m", messages) as record:
+            record("ok")
+        with self.assertRaises(RuntimeError):
+            with metrics.llm_call("stub", "m", messages):
+                raise RuntimeError("rate limited")
+        self.assertEqual(
+            _count(metrics.llm_request_bytes, provider="stub") - before, 12
+        )
+        self.assertGreaterEqual(
+            _count(metrics.llm_errors, provider="stub", model="m"), 1
+        )
+        row = metrics.llm_latency.summary()[(("model", "m"), ("provider", "stub"))]
+        self.assertGreaterEqual(row["count"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
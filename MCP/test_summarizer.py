@@ -0,0 +1,109 @@
+import threading
+import time
+import unittest
+
+from summarizer import FINAL_PROMPT, MapReduceSummarizer
+
+
+class RecordingLLM:
+    def __init__(self, latency=0.0, failures=0):
+        self.latency = latency
+        self.failures = failures
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def ask(self, question, text):
+        with self._lock:
+            self.calls.append((question, text))
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            fail = self.failures > 0
+            self.failures -= 1
+        try:
+            time.sleep(self.latency)
+            if fail:
+                raise RuntimeError("rate limited")
+            return f"[{text.split()[0]}]"
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class TestMapReduceSummarizer(unittest.TestCase):
+    def test_small_input_is_a_single_call(self):
+        llm = RecordingLLM()
+        answer = MapReduceSummarizer(llm.ask).summarize("q", "a b c", chunk_tokens=50)
+        self.assertEqual(answer, "[a]")
+        self.assertEqual(llm.calls, [("q", "a b c")])
+
+    def test_map_runs_concurrently_within_limit_and_keeps_order(self):
+        llm = RecordingLLM(latency=0.05)
+        chunks = [f"w{i}" for i in range(8)]
+        summarizer = MapReduceSummarizer(llm.ask, max_in_flight=4, fan_in=8)
+        start = time.perf_counter()
+        summarizer.summarize_chunks("q", chunks)
+        self.assertLess(time.perf_counter() - start, 0.3)
+        self.assertEqual(llm.peak, 4)
+        final_question, combined = llm.calls[-1]
+        self.assertEqual(final_question, FINAL_PROMPT.format(question="q"))
+        self.assertEqual(combined, "\n".join(f"[w{i}]" for i in range(8)))
+
+    def test_tree_reduce_bounds_reduce_inputs(self):
+        llm = RecordingLLM()
+        chunks = [f"w{i}" for i in range(10)]
+        MapReduceSummarizer(llm.ask, fan_in=3).summarize_chunks("q", chunks)
+        reduces = [t for q, t in llm.calls if q != "q"]
+        # 10 partials -> 4 -> 2, then the final reduce.
+        self.assertEqual(len(reduces), 4 + 2 + 1)
+        self.assertTrue(all(len(t.splitlines()) <= 3 for t in reduces))
+
+    def test_failed_calls_are_retried(self):
+        llm = RecordingLLM(failures=2)
+        summarizer = MapReduceSummarizer(llm.ask, max_in_flight=1, backoff=0)
+        self.assertEqual(summarizer.summarize_chunks("q", ["a", "b"]), "[[a]]")
+        failing = MapReduceSummarizer(
+            RecordingLLM(failures=5).ask, retries=1, backoff=0
+        )
+        with self.assertRaises(RuntimeError):
+            failing.summarize_chunks("q", ["a", "b"])
+
+    def test_stream_yields_final_answer_and_retries_before_first_piece(self):
+        llm = RecordingLLM()
+        streamed = []
+        failures = [1]
+
+        def ask_stream(question, text):
+            streamed.append(question)
+            if failures[0]:
+                failures[0] -= 1
+                raise RuntimeError("rate limited")
+            yield "final "
+            yield "answer"
+
+        summarizer = MapReduceSummarizer(llm.ask, backoff=0, ask_stream=ask_stream)
+        pieces = list(summarizer.summarize_chunks_stream("q", ["a", "b"]))
+        self.assertEqual(pieces, ["final ", "answer"])
+        # Map calls are not streamed; the final call is, and was retried.
+        self.assertEqual(llm.calls, [("q", "a"), ("q", "b")])
+        self.assertEqual(streamed, [FINAL_PROMPT.format(question="q")] * 2)
+
+    def test_stream_failure_after_first_piece_is_not_retried(self):
+        calls = []
+
+        def ask_stream(question, text):
+            calls.append(question)
+            yield "partial"
+            raise RuntimeError("connection reset")
+
+        summarizer = MapReduceSummarizer(
+            RecordingLLM().ask, backoff=0, ask_stream=ask_stream
+        )
+        with self.assertRaises(RuntimeError):
+            list(summarizer.summarize_stream("q", "a b c"))
+        self.assertEqual(calls, ["q"])
+
+
+if __name__ == "__main__":
+    unittest.main()
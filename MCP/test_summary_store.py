@@ -0,0 +1,152 @@
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+
+from summarizer import MapReduceSummarizer
+from summary_store import DAY_PROMPT, MESSAGE_PROMPT, RollupSummarizer, SummaryStore
+
+
+def message(message_id, day, text=None):
+    stamp = datetime.fromisoformat(f"{day}T12:00:00+00:00").timestamp()
+    return {
+        "id": message_id,
+        "internalDate": str(int(stamp * 1000)),
+        "text": text or f"Subject: {message_id}",
+    }
+
+
+class RecordingLLM:
+    def __init__(self):
+        self.calls = []
+
+    def ask(self, question, text):
+        self.calls.append(question)
+        return f"{question} <- {len(text.splitlines())} lines"
+
+
+class TestRollupSummarizer(unittest.TestCase):
+    def setUp(self):
+        self.llm = RecordingLLM()
+        self.rollups = RollupSummarizer(
+            SummaryStore(":memory:"), MapReduceSummarizer(self.llm.ask, max_in_flight=1)
+        )
+        self.week = [
+            message("a", "2025-05-19"),
+            message("b", "2025-05-19"),
+            message("c", "2025-05-20"),
+        ]
+
+    def test_week_is_built_from_day_summaries_once(self):
+        self.rollups.answer("Summarize the week", self.week)
+        self.assertEqual(
+            self.llm.calls,
+            [
+                DAY_PROMPT.format(day="2025-05-19"),
+                DAY_PROMPT.format(day="2025-05-20"),
+                "Summarize the week",
+            ],
+        )
+        self.llm.calls.clear()
+        self.rollups.answer("Summarize the week", self.week)
+        self.assertEqual(self.llm.calls, [])
+
+    def test_only_days_with_new_mail_are_recomputed(self):
+        self.rollups.answer("Summarize the week", self.week)
+        self.llm.calls.clear()
+        # A partial fetch of a known day reuses its summary.
+        self.rollups.answer("Summarize the week", self.week[:1])
+        self.assertEqual(self.llm.calls, ["Summarize the week"])
+        self.llm.calls.clear()
+        self.rollups.answer(
+            "Summarize the week", [*self.week, message("d", "2025-05-20")]
+        )
+        self.assertEqual(
+            self.llm.calls, [DAY_PROMPT.format(day="2025-05-20"), "Summarize the week"]
+        )
+
+    def test_finished_days_are_a_lookup(self):
+        day = DAY_PROMPT.format(day="2025-05-19")
+        self.assertIsNone(self.rollups.cached_day("2025-05-19"))
+        summary = self.rollups.summarize_day("2025-05-19", self.week[:2])
+        self.assertEqual(self.rollups.answer(day, self.week[:2]), summary)
+        self.assertEqual(self.rollups.cached_day("2025-05-19"), summary)
+        today = datetime.now(timezone.utc).date().isoformat()
+        self.rollups.summarize_day(today, [message("t", today)])
+        self.assertIsNone(self.rollups.cached_day(today))
+
+    def test_scopes_do_not_share_day_summaries(self):
+        important = self.rollups.summarize_day(
+            "2025-05-19", self.week[:1], "is:important"
+        )
+        inbox = self.rollups.summarize_day("2025-05-19", self.week[:2])
+        self.assertIn("1 lines", important)
+        self.assertIn("3 lines", inbox)
+        self.llm.calls.clear()
+        self.assertEqual(
+            self.rollups.summarize_day("2025-05-19", self.week[:1], "is:important"),
+            important,
+        )
+        self.assertEqual(
+            self.rollups.cached_day("2025-05-19", "is:important"), important
+        )
+        self.assertEqual(self.llm.calls, [])
+
+    def test_days_are_built_concurrently(self):
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def ask(question, text):
+            with lock:
+                active.append(question)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(question)
+            return question
+
+        rollups = RollupSummarizer(
+            SummaryStore(":memory:"), MapReduceSummarizer(ask, max_in_flight=4)
+        )
+        days = [f"2025-05-{day}" for day in range(19, 23)]
+        by_day = rollups.day_summaries([message(day, day) for day in days])
+        self.assertEqual(list(by_day), days)
+        self.assertEqual(max(peak), 4)
+        self.assertEqual(rollups.stats["days_built"], 4)
+
+    def test_day_covers_all_mail_fetched_for_it(self):
+        rollups = RollupSummarizer(
+            SummaryStore(":memory:"),
+            MapReduceSummarizer(self.llm.ask, max_in_flight=1),
+            timezone="America/New_York",
+        )
+        start, end = rollups.day_bounds("2025-05-19")
+        self.assertEqual(
+            (start, end),
+            (
+                int(datetime.fromisoformat("2025-05-19T04:00:00+00:00").timestamp()),
+                int(datetime.fromisoformat("2025-05-20T04:00:00+00:00").timestamp()),
+            ),
+        )
+        # Gmail's day can differ from ours; the mail fetched for a day is
+        # summarized even when day_of puts it on the next one.
+        late = message("late", "2025-05-20")
+        late["internalDate"] = str(
+            int(datetime.fromisoformat("2025-05-20T03:00:00+00:00").timestamp() * 1000)
+        )
+        summary = self.rollups.summarize_day(
+            "2025-05-19", [message("a", "2025-05-19"), late]
+        )
+        self.assertIn("3 lines", summary)
+
+    def test_long_messages_are_summarized_once(self):
+        long = message("big", "2025-05-19", "word " * 1000)
+        self.rollups.summarize_day("2025-05-19", [long])
+        self.rollups.summarize_day("2025-05-19", [long])
+        self.assertEqual(self.llm.calls.count(MESSAGE_PROMPT), 1)
+        self.assertEqual(self.rollups.stats["messages_summarized"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
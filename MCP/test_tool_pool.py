@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from tool_pool import ToolPool, parse_limits
+
+
+class TestToolPool(unittest.TestCase):
+    def test_parse_limits(self):
+        self.assertEqual(parse_limits("a=2, b=0,bogus"), {"a": 2, "b": 1})
+
+    def test_per_tool_cap_does_not_block_other_tools(self):
+        pool = ToolPool(max_workers=4, default_limit=1)
+        release = threading.Event()
+        order = []
+
+        def slow():
+            release.wait(2)
+            order.append("slow")
+
+        def fast():
+            order.append("fast")
+            release.set()
+
+        async def scenario():
+            slow_calls = [
+                asyncio.ensure_future(pool.run("slow", slow)) for _ in range(3)
+            ]
+            await asyncio.sleep(0.05)
+            self.assertEqual(pool.snapshot()["slow"]["running"], 1)
+            self.assertEqual(pool.snapshot()["slow"]["waiting"], 2)
+            await asyncio.gather(pool.run("fast", fast), *slow_calls)
+
+        start = time.perf_counter()
+        asyncio.run(scenario())
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual(order[0], "fast")
+        stats = pool.snapshot()
+        self.assertEqual(stats["slow"]["completed"], 3)
+        self.assertEqual(stats["slow"]["waiting"], 0)
+        self.assertEqual(stats["fast"]["completed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
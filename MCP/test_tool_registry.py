@@ -0,0 +1,62 @@
+import unittest
+
+from tool_registry import ArgumentError, ToolRegistry, compile_validator
+
+SCHEMA = {
+    "type": "object",
+    "required": ["date"],
+    "properties": {
+        "date": {"type": "string", "minLength": 1},
+        "max_results": {"type": "integer", "minimum": 1, "default": 10},
+        "attendees": {"type": "array", "items": {"type": "string"}},
+        "refresh": {"type": "boolean", "default": False},
+    },
+}
+
+
+class TestToolRegistry(unittest.TestCase):
+    def test_validator_applies_defaults_and_coerces(self):
+        validate = compile_validator(SCHEMA)
+        args = validate({"date": "2025-05-19", "max_results": "5", "attendees": "a, b"})
+        self.assertEqual(
+            args,
+            {
+                "date": "2025-05-19",
+                "max_results": 5,
+                "attendees": ["a", "b"],
+                "refresh": False,
+            },
+        )
+        self.assertEqual(
+            validate({"date": "x", "max_results": None})["max_results"], 10
+        )
+
+    def test_validator_rejects_bad_arguments(self):
+        validate = compile_validator(SCHEMA)
+        for bad in (
+            {},
+            {"date": ""},
+            {"date": "x", "max_results": 0},
+            {"date": "x", "max_results": "ten"},
+            {"date": "x", "max_results": "--5"},
+            {"date": "x", "max_results": "\u00b2"},
+            {"date": "x", "max_results": "\u0663"},
+            {"date": "x", "max_results": ""},
+            {"date": "x", "refresh": "yes"},
+            {"date": "x", "attendees": [1]},
+            ["date"],
+        ):
+            with self.assertRaises(ArgumentError, msg=bad):
+                validate(bad)
+
+    def test_schemas_are_cached_until_a_tool_is_added(self):
+        registry = ToolRegistry()
+        registry.tool("a", "A", {"type": "object"})(lambda args: {})
+        first = registry.schemas()
+        self.assertIs(registry.schemas(), first)
+        registry.tool("b", "B", {"type": "object"})(lambda args: {})
+        self.assertEqual([s["name"] for s in registry.schemas()], ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,13 @@
 import asyncio
+import json
+import os
 import sys
 import types
 import unittest
 from unittest.mock import MagicMock, patch
 
+os.environ.setdefault("MCP_GMAIL_MIRROR_PATH", ":memory:")
+
 # Provide a minimal dotenv stub so the module can import without the package
 dotenv_stub = types.ModuleType("dotenv")
 dotenv_stub.load_dotenv = lambda: None
@@ -33,7 +37,26 @@ sys.modules.setdefault("google.oauth2.credentials", creds_stub)
 sys.modules.setdefault("googleapiclient", googleapiclient_stub)
 sys.modules.setdefault("googleapiclient.discovery", discovery_stub)
 
-import workspace_mcp_server as server
+import workspace_mcp_server as server  # noqa: E402
+
+
+class FakeBatch:
+    """Execute batched requests one by one, mimicking BatchHttpRequest."""
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self, http=None):
+        for request_id, request in self.requests:
+            try:
+                response, exc = request.execute(), None
+            except Exception as err:
+                response, exc = None, err
+            self.callback(request_id, response, exc)
 
 
 class TestWorkspaceMcpServer(unittest.TestCase):
@@ -43,8 +66,16 @@ class TestWorkspaceMcpServer(unittest.TestCase):
         self.cal_patcher = patch.object(server, "calendar_service")
         self.mock_calendar = self.cal_patcher.start()
 
+        server.gmail_mirror.clear()
+        server.calendar_cache.clear()
+        server.label_registry.invalidate()
         mock_users = MagicMock()
         self.mock_service.users.return_value = mock_users
+        self.mock_service.new_batch_http_request.side_effect = FakeBatch
+        mock_users.getProfile.return_value.execute.return_value = {"historyId": "100"}
+        mock_users.history.return_value.list.return_value.execute.return_value = {
+            "historyId": "100"
+        }
 
         mock_labels = MagicMock()
         mock_labels.list.return_value.execute.return_value = {
@@ -98,12 +129,229 @@ class TestWorkspaceMcpServer(unittest.TestCase):
         self.assertEqual(resp["messages"][0]["id"], "1")
         self.assertIn("Date:", resp["text"])
 
+    def test_list_recent_emails_follows_page_tokens(self):
+        messages = self.mock_service.users.return_value.messages.return_value
+        pages = {
+            None: {"messages": [{"id": "1"}, {"id": "2"}], "nextPageToken": "p2"},
+            "p2": {"messages": [{"id": "3"}, {"id": "4"}], "nextPageToken": "p3"},
+        }
+        messages.list.side_effect = lambda **kw: MagicMock(
+            execute=MagicMock(return_value=pages[kw.get("pageToken")])
+        )
+        msg = messages.get.return_value.execute.return_value
+        messages.get.side_effect = lambda **kw: MagicMock(
+            execute=MagicMock(return_value={**msg, "id": kw["id"]})
+        )
+        payload = {
+            "name": "list_recent_emails",
+            "arguments": {"query": "test", "max_results": 3},
+        }
+        resp = asyncio.run(server.call_tool(payload))
+        self.assertEqual(resp["count"], 3)
+        self.assertEqual(len(resp["messages"]), 3)
+        self.assertEqual(messages.list.call_args.kwargs["maxResults"], 1)
+
+    def test_list_recent_emails_streams_ndjson(self):
+        payload = {
+            "name": "list_recent_emails",
+            "arguments": {"query": "test", "max_results": 1},
+            "stream": True,
+        }
+
+        async def consume():
+            resp = await server.call_tool(payload)
+            return [json.loads(chunk) async for chunk in resp.body_iterator]
+
+        lines = asyncio.run(consume())
+        self.assertEqual([line["type"] for line in lines], ["message", "done"])
+        self.assertEqual(lines[0]["message"]["id"], "1")
+        self.assertIn("Subject: Test", lines[0]["text"])
+        self.assertEqual(lines[1]["count"], 1)
+
+    def test_list_recent_emails_served_from_mirror(self):
+        payload = {
+            "name": "list_recent_emails",
+            "arguments": {"query": "test", "max_results": 1},
+        }
+        first = asyncio.run(server.call_tool(payload))
+        messages = self.mock_service.users.return_value.messages.return_value
+        messages.list.reset_mock()
+        messages.get.reset_mock()
+        second = asyncio.run(server.call_tool(payload))
+        self.assertEqual(second["text"], first["text"])
+        messages.list.assert_not_called()
+        messages.get.assert_not_called()
+
+    def test_count_emails_by_label_invalidated_by_history(self):
+        labels = self.mock_service.users.return_value.labels.return_value
+        labels.get.return_value.execute.return_value = {"messagesTotal": 3}
+        payload = {"name": "count_emails_by_label", "arguments": {"label_id": "INBOX"}}
+        self.assertEqual(asyncio.run(server.call_tool(payload))["text"], "3")
+        labels.get.return_value.execute.return_value = {"messagesTotal": 4}
+        self.assertEqual(asyncio.run(server.call_tool(payload))["text"], "3")
+
+        history = self.mock_service.users.return_value.history.return_value
+        history.list.return_value.execute.return_value = {
+            "historyId": "101",
+            "history": [
+                {"messagesAdded": [{"message": {"id": "9", "labelIds": ["INBOX"]}}]}
+            ],
+        }
+        server.gmail_mirror.mark_stale()
+        self.assertEqual(asyncio.run(server.call_tool(payload))["text"], "4")
+
+    def test_list_recent_emails_reports_failed_messages(self):
+        messages = self.mock_service.users.return_value.messages.return_value
+        messages.list.return_value.execute.return_value = {
+            "messages": [{"id": "1"}, {"id": "2"}]
+        }
+        good = messages.get.return_value.execute.return_value
+
+        def get(**kwargs):
+            request = MagicMock()
+            if kwargs["id"] == "2":
+                request.execute.side_effect = RuntimeError("boom")
+            else:
+                request.execute.return_value = good
+            return request
+
+        messages.get.side_effect = get
+        payload = {
+            "name": "list_recent_emails",
+            "arguments": {"query": "test", "max_results": 2, "batch_size": 1},
+        }
+        resp = asyncio.run(server.call_tool(payload))
+        self.assertEqual([m["id"] for m in resp["messages"]], ["1"])
+        self.assertEqual(resp["errors"], [{"id": "2", "error": "boom"}])
+
+    def test_label_registry_reuses_labels_until_refresh(self):
+        labels = self.mock_service.users.return_value.labels.return_value
+        asyncio.run(server.call_tool({"name": "list_recent_emails", "arguments": {}}))
+        resp = asyncio.run(server.call_tool({"name": "list_gmail_labels"}))
+        self.assertEqual(labels.list.call_count, 1)
+        self.assertEqual(
+            resp["labels"], [{"id": "INBOX", "name": "Inbox", "type": "user"}]
+        )
+
+        labels.list.return_value.execute.return_value = {
+            "labels": [{"id": "INBOX", "name": "Inbox"}, {"id": "L1", "name": "Work"}]
+        }
+        payload = {"name": "list_gmail_labels", "arguments": {"refresh": True}}
+        resp = asyncio.run(server.call_tool(payload))
+        self.assertEqual(labels.list.call_count, 2)
+        self.assertIn("L1: Work", resp["text"])
+
+    def test_invalid_arguments_rejected_before_google_call(self):
+        payload = {
+            "name": "find_meeting_slots",
+            "arguments": {
+                "attendees": [],
+                "duration_minutes": 30,
+                "start_date": "2025-06-02",
+            },
+        }
+        with self.assertRaises(server.HTTPException) as ctx:
+            asyncio.run(server.call_tool(payload))
+        self.assertEqual(ctx.exception.status_code, 400)
+        for max_results in ("lots", "--5"):
+            payload = {
+                "name": "list_recent_emails",
+                "arguments": {"max_results": max_results},
+            }
+            with self.assertRaises(server.HTTPException) as ctx:
+                asyncio.run(server.call_tool(payload))
+            self.assertEqual(ctx.exception.status_code, 400)
+        self.mock_calendar.freebusy.assert_not_called()
+        self.mock_service.users.return_value.messages.assert_not_called()
+
+    def test_tools_listing_generated_from_registry(self):
+        tools = asyncio.run(server.list_tools())
+        self.assertEqual([t["name"] for t in tools], server.registry.names())
+        self.assertIs(asyncio.run(server.list_tools()), tools)
+
+    def test_metrics_record_tool_latency_and_errors(self):
+        payload = {"name": "list_calendar_events", "arguments": {"max_results": 1}}
+        asyncio.run(server.call_tool(payload))
+        bad_range = {
+            "name": "check_range_availability",
+            "arguments": {"start_date": "not-a-date"},
+        }
+        with self.assertRaises(server.HTTPException):
+            asyncio.run(server.call_tool(bad_range))
+        text = asyncio.run(server.prometheus_metrics()).body.decode()
+        self.assertIn(
+            'mcp_tool_duration_seconds_count{tool="list_calendar_events"}', text
+        )
+        self.assertIn(
+            'mcp_tool_errors_total{status="400",tool="check_range_availability"}', text
+        )
+        self.assertIn("<h2>Tool Latency</h2>", asyncio.run(server.dev_page()))
+
+    def test_call_tools_returns_results_in_order(self):
+        labels = self.mock_service.users.return_value.labels.return_value
+        labels.get.side_effect = lambda **kw: MagicMock(
+            execute=MagicMock(return_value={"messagesTotal": len(kw["id"])})
+        )
+        payload = {
+            "calls": [
+                {"name": "count_emails_by_label", "arguments": {"label_id": "INBOX"}},
+                {"name": "no_such_tool"},
+                {"name": "count_emails_by_label", "arguments": {"label_id": "SENT"}},
+            ]
+        }
+        resp = asyncio.run(server.call_tools(payload))
+        statuses = [r["status"] for r in resp["results"]]
+        self.assertEqual(statuses, [200, 404, 200])
+        self.assertEqual(resp["results"][0]["result"]["text"], "5")
+        self.assertEqual(resp["results"][2]["result"]["text"], "4")
+
     def test_list_calendar_events(self):
         payload = {"name": "list_calendar_events", "arguments": {"max_results": 1}}
         resp = asyncio.run(server.call_tool(payload))
         self.assertIn("events", resp)
         self.assertEqual(len(resp["events"]), 1)
 
+    def test_calendar_events_served_from_sync_token_cache(self):
+        events = self.mock_calendar.events.return_value
+        events.list.return_value.execute.return_value = {
+            "items": [
+                {
+                    "id": "a",
+                    "summary": "Standup",
+                    "start": {"dateTime": "2025-05-19T09:00:00Z"},
+                    "end": {"dateTime": "2025-05-19T09:15:00Z"},
+                },
+                {
+                    "id": "b",
+                    "summary": "Offsite",
+                    "start": {"date": "2025-05-20"},
+                    "end": {"date": "2025-05-21"},
+                },
+            ],
+            "nextSyncToken": "tok1",
+        }
+        payload = {
+            "name": "list_calendar_events",
+            "arguments": {
+                "time_min": "2025-05-20T00:00:00Z",
+                "time_max": "2025-05-21T00:00:00Z",
+            },
+        }
+        resp = asyncio.run(server.call_tool(payload))
+        self.assertEqual([e["id"] for e in resp["events"]], ["b"])
+
+        events.list.return_value.execute.return_value = {
+            "items": [{"id": "a", "status": "cancelled"}],
+            "nextSyncToken": "tok2",
+        }
+        server.calendar_cache.mark_stale("primary")
+        payload["arguments"]["time_min"] = "2025-05-19T00:00:00Z"
+        resp = asyncio.run(server.call_tool(payload))
+        self.assertEqual([e["id"] for e in resp["events"]], ["b"])
+        self.assertEqual(events.list.call_args.kwargs["syncToken"], "tok1")
+        stats = server.calendar_cache.stats
+        self.assertEqual((stats["full_syncs"], stats["incremental_syncs"]), (1, 1))
+
     def test_create_calendar_event(self):
         payload = {
             "name": "create_calendar_event",
@@ -117,9 +365,8 @@ class TestWorkspaceMcpServer(unittest.TestCase):
         self.assertEqual(resp["text"], "Event created.")
 
     def test_check_day_availability_free(self):
-        self.mock_calendar.events.return_value.list.return_value.execute.return_value = {
-            "items": []
-        }
+        events = self.mock_calendar.events.return_value
+        events.list.return_value.execute.return_value = {"items": []}
         payload = {
             "name": "check_day_availability",
             "arguments": {"date": "2025-05-19"},
@@ -127,6 +374,84 @@ class TestWorkspaceMcpServer(unittest.TestCase):
         resp = asyncio.run(server.call_tool(payload))
         self.assertEqual(resp["text"], "Free all day")
 
+    def test_check_range_availability_uses_one_freebusy_query(self):
+        freebusy = self.mock_calendar.freebusy.return_value
+        freebusy.query.return_value.execute.return_value = {
+            "calendars": {
+                "primary": {
+                    "busy": [
+                        {
+                            "start": "2025-05-19T10:00:00Z",
+                            "end": "2025-05-19T11:00:00Z",
+                        },
+                        {
+                            "start": "2025-05-19T10:30:00Z",
+                            "end": "2025-05-19T12:00:00Z",
+                        },
+                        {
+                            "start": "2025-05-20T16:00:00Z",
+                            "end": "2025-05-21T10:00:00Z",
+                        },
+                    ]
+                }
+            }
+        }
+        payload = {
+            "name": "check_range_availability",
+            "arguments": {
+                "start_date": "2025-05-19",
+                "end_date": "2025-05-21",
+                "work_start": "09:00",
+                "work_end": "17:00",
+            },
+        }
+        resp = asyncio.run(server.call_tool(payload))
+        freebusy.query.assert_called_once()
+        free = [
+            [(slot["start"][11:16], slot["end"][11:16]) for slot in day["free"]]
+            for day in resp["days"]
+        ]
+        self.assertEqual(
+            free,
+            [
+                [("09:00", "10:00"), ("12:00", "17:00")],
+                [("09:00", "16:00")],
+                [("10:00", "17:00")],
+            ],
+        )
+
+    def test_find_meeting_slots_intersects_attendees(self):
+        freebusy = self.mock_calendar.freebusy.return_value
+        freebusy.query.return_value.execute.return_value = {
+            "calendars": {
+                "primary": {
+                    "busy": [
+                        {"start": "2025-05-19T09:00:00Z", "end": "2025-05-19T10:00:00Z"}
+                    ]
+                },
+                "b@example.com": {
+                    "busy": [
+                        {"start": "2025-05-19T10:30:00Z", "end": "2025-05-19T12:00:00Z"}
+                    ]
+                },
+                "c@example.com": {"errors": [{"reason": "notFound"}]},
+            }
+        }
+        payload = {
+            "name": "find_meeting_slots",
+            "arguments": {
+                "attendees": ["b@example.com", "c@example.com"],
+                "duration_minutes": 60,
+                "start_date": "2025-05-19",
+                "max_results": 2,
+            },
+        }
+        resp = asyncio.run(server.call_tool(payload))
+        freebusy.query.assert_called_once()
+        starts = [slot["start"][11:16] for slot in resp["slots"]]
+        self.assertEqual(starts, ["12:00", "12:30"])
+        self.assertIn("c@example.com", resp["errors"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,135 @@
+"""Worker pool that runs blocking tool handlers off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+def parse_limits(spec: str) -> dict[str, int]:
+    """Parse ``"tool=4,other=2"`` into a mapping of per-tool limits."""
+    limits: dict[str, int] = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        limits[name.strip()] = max(1, int(value))
+    return limits
+
+
+@dataclass
+class ToolStats:
+    """Queue depth and throughput counters for one tool."""
+
+    limit: int
+    waiting: int = 0
+    running: int = 0
+    completed: int = 0
+    failed: int = 0
+
+
+class ToolPool:
+    """Run tool handlers on a shared thread pool with per-tool concurrency caps.
+
+    Each tool gets its own semaphore, so a burst of one slow tool queues
+    behind its own cap instead of occupying every worker thread.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 16,
+        default_limit: int = 4,
+        limits: dict[str, int] | None = None,
+    ) -> None:
+        self.max_workers = max_workers
+        self.default_limit = default_limit
+        self.limits = dict(limits or {})
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tool"
+        )
+        self._stats: dict[str, ToolStats] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @classmethod
+    def from_env(cls) -> "ToolPool":
+        """Build a pool from ``MCP_TOOL_WORKERS`` and ``MCP_TOOL_CONCURRENCY``."""
+        return cls(
+            max_workers=int(os.getenv("MCP_TOOL_WORKERS", "16")),
+            default_limit=int(os.getenv("MCP_TOOL_DEFAULT_CONCURRENCY", "4")),
+            limits=parse_limits(os.getenv("MCP_TOOL_CONCURRENCY", "")),
+        )
+
+    def _semaphore(self, tool: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Semaphores bind to the loop that first waits on them.
+            self._loop = loop
+            self._semaphores = {}
+        sem = self._semaphores.get(tool)
+        if sem is None:
+            sem = asyncio.Semaphore(self.limit_for(tool))
+            self._semaphores[tool] = sem
+        return sem
+
+    def limit_for(self, tool: str) -> int:
+        return self.limits.get(tool, self.default_limit)
+
+    def stats_for(self, tool: str) -> ToolStats:
+        stats = self._stats.get(tool)
+        if stats is None:
+            stats = self._stats[tool] = ToolStats(limit=self.limit_for(tool))
+        return stats
+
+    @asynccontextmanager
+    async def _slot(self, tool: str) -> AsyncIterator[ToolStats]:
+        """Hold one of ``tool``'s concurrency slots, tracking queue depth."""
+        stats = self.stats_for(tool)
+        stats.waiting += 1
+        acquired = False
+        try:
+            async with self._semaphore(tool):
+                stats.waiting -= 1
+                acquired = True
+                stats.running += 1
+                try:
+                    yield stats
+                except BaseException:
+                    stats.failed += 1
+                    raise
+                finally:
+                    stats.running -= 1
+                stats.completed += 1
+        finally:
+            if not acquired:
+                stats.waiting -= 1
+
+    async def run(self, tool: str, func: Callable[..., T], *args: Any) -> T:
+        """Run ``func(*args)`` on a worker thread under ``tool``'s cap."""
+        async with self._slot(tool):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    async def stream(self, tool: str, items: Iterator[T]) -> AsyncIterator[T]:
+        """Advance a blocking iterator on worker threads under ``tool``'s cap.
+
+        The slot is held until the iterator is exhausted or the consumer stops.
+        """
+        done = object()
+        async with self._slot(tool):
+            loop = asyncio.get_running_loop()
+            while True:
+                item = await loop.run_in_executor(self._executor, next, items, done)
+                if item is done:
+                    break
+                yield item  # type: ignore[misc]
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        """Return a copy of the per-tool counters."""
+        return {name: asdict(stats) for name, stats in sorted(self._stats.items())}
@@ -0,0 +1,186 @@
+"""Declarative tool registry with argument validators compiled from schemas."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Iterator
+
+Validator = Callable[[Any], dict[str, Any]]
+Handler = Callable[[dict[str, Any]], dict[str, Any]]
+
+
+class ArgumentError(ValueError):
+    """Raised when tool arguments do not match the declared schema."""
+
+
+def _check_string(name: str, spec: dict[str, Any]) -> Callable[[Any], Any]:
+    min_length = spec.get("minLength", 0)
+
+    def check(value: Any) -> str:
+        if not isinstance(value, str):
+            raise ArgumentError(f"'{name}' must be a string")
+        if len(value) < min_length:
+            raise ArgumentError(f"'{name}' must not be empty")
+        return value
+
+    return check
+
+
+def _check_integer(name: str, spec: dict[str, Any]) -> Callable[[Any], Any]:
+    minimum = spec.get("minimum")
+
+    def check(value: Any) -> int:
+        # Older clients send numbers from form fields as strings.
+        if isinstance(value, str):
+            try:
+                if not value.isascii():
+                    raise ValueError(value)
+                value = int(value)
+            except ValueError:
+                raise ArgumentError(f"'{name}' must be an integer") from None
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ArgumentError(f"'{name}' must be an integer")
+        if minimum is not None and value < minimum:
+            raise ArgumentError(f"'{name}' must be at least {minimum}")
+        return value
+
+    return check
+
+
+def _check_boolean(name: str, spec: dict[str, Any]) -> Callable[[Any], Any]:
+    def check(value: Any) -> bool:
+        if not isinstance(value, bool):
+            raise ArgumentError(f"'{name}' must be a boolean")
+        return value
+
+    return check
+
+
+def _check_string_array(name: str, spec: dict[str, Any]) -> Callable[[Any], Any]:
+    min_items = spec.get("minItems", 0)
+
+    def check(value: Any) -> list[str]:
+        # A comma-separated string is accepted as shorthand for a list.
+        if isinstance(value, str):
+            value = [v.strip() for v in value.split(",") if v.strip()]
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise ArgumentError(f"'{name}' must be a list of strings")
+        if len(value) < min_items:
+            raise ArgumentError(f"'{name}' must not be empty")
+        return list(value)
+
+    return check
+
+
+_CHECKERS = {
+    "string": _check_string,
+    "integer": _check_integer,
+    "boolean": _check_boolean,
+    "array": _check_string_array,
+}
+
+
+def compile_validator(schema: dict[str, Any]) -> Validator:
+    """Build a validator for an object ``inputSchema``.
+
+    The schema is walked once here; the returned function only runs the
+    per-property checks. It returns a new dict with declared defaults filled
+    in and ``null`` values treated as absent. Unknown properties pass through
+    unchanged.
+    """
+    properties = schema.get("properties", {})
+    required = tuple(schema.get("required", ()))
+    checks = []
+    for name, spec in properties.items():
+        kind = spec.get("type", "string")
+        if kind not in _CHECKERS:
+            raise ValueError(f"Unsupported schema type for '{name}': {kind}")
+        checks.append((name, _CHECKERS[kind](name, spec), spec.get("default")))
+
+    def validate(arguments: Any) -> dict[str, Any]:
+        if arguments is None:
+            arguments = {}
+        if not isinstance(arguments, dict):
+            raise ArgumentError("'arguments' must be an object")
+        missing = [key for key in required if arguments.get(key) is None]
+        if missing:
+            raise ArgumentError(f"Missing required arguments: {', '.join(missing)}")
+        result = dict(arguments)
+        for name, check, default in checks:
+            value = arguments.get(name)
+            if value is None:
+                if default is not None:
+                    result[name] = default
+                else:
+                    result.pop(name, None)
+            else:
+                result[name] = check(value)
+        return result
+
+    return validate
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    name: str
+    description: str
+    input_schema: dict[str, Any]
+    handler: Handler
+    validate: Validator
+    stream: Callable[[dict[str, Any]], Iterator[bytes]] | None = None
+
+    def schema(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "inputSchema": self.input_schema,
+        }
+
+
+class ToolRegistry:
+    """Map tool names to handlers, schemas and compiled validators."""
+
+    def __init__(self) -> None:
+        self._tools: dict[str, ToolSpec] = {}
+        self._schemas: list[dict[str, Any]] | None = None
+
+    def tool(
+        self, name: str, description: str, input_schema: dict[str, Any]
+    ) -> Callable[[Handler], Handler]:
+        """Register the decorated function as the handler for ``name``."""
+
+        def decorator(handler: Handler) -> Handler:
+            if name in self._tools:
+                raise ValueError(f"Tool already registered: {name}")
+            self._tools[name] = ToolSpec(
+                name,
+                description,
+                input_schema,
+                handler,
+                compile_validator(input_schema),
+            )
+            self._schemas = None
+            return handler
+
+        return decorator
+
+    def streams(self, name: str) -> Callable[[Callable], Callable]:
+        """Register the decorated generator as the NDJSON stream for ``name``."""
+
+        def decorator(func: Callable) -> Callable:
+            self._tools[name] = replace(self._tools[name], stream=func)
+            return func
+
+        return decorator
+
+    def get(self, name: str) -> ToolSpec | None:
+        return self._tools.get(name)
+
+    def names(self) -> list[str]:
+        return list(self._tools)
+
+    def schemas(self) -> list[dict[str, Any]]:
+        """Return the ``/tools`` listing, built once per registry change."""
+        if self._schemas is None:
+            self._schemas = [spec.schema() for spec in self._tools.values()]
+        return self._schemas
@@ -1,16 +1,26 @@
 """Standalone server exposing Google Workspace tools via FastAPI."""
 
+import asyncio
 import base64
+import json
 import os
-from typing import Any, List
+import threading
+import time
+from typing import Any, AsyncIterator, Iterable, Iterator, List
 
-import uvicorn
+import availability
+from calendar_cache import CalendarCache
 from dotenv import load_dotenv
 from fastapi import Body, FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+from gmail_batch import DEFAULT_BATCH_SIZE, fetch_message_metadata
+from gmail_mirror import GmailMirror
+from label_registry import LabelRegistry
 from logger_utils import log_call, logger
+from metrics import CONTENT_TYPE, REGISTRY, MeteredHttp, latency_table
+from metrics import tool_errors, tool_latency, upstream_latency
+from tool_pool import ToolPool
+from tool_registry import ArgumentError, ToolRegistry, ToolSpec
 
 load_dotenv()
 SCOPES = [
@@ -20,415 +30,878 @@ SCOPES = [
     "https://www.googleapis.com/auth/userinfo.email",
 ]
 
-creds = Credentials(
-    token=os.environ.get("GOOGLE_ACCESS_TOKEN"),
-    refresh_token=os.environ.get("GOOGLE_REFRESH_TOKEN"),
-    token_uri=os.environ.get("GOOGLE_TOKEN_URI", "https://oauth2.googleapis.com/token"),
-    client_id=os.environ.get("GOOGLE_CLIENT_ID"),
-    client_secret=os.environ.get("GOOGLE_CLIENT_SECRET"),
-    scopes=SCOPES,
-)
+_thread_local = threading.local()
+_creds_lock = threading.Lock()
+_creds: Any = None
+
+
+def _credentials() -> Any:
+    """Return the shared OAuth credentials, importing google-auth on first use."""
+    global _creds
+    with _creds_lock:
+        if _creds is None:
+            from google.oauth2.credentials import Credentials
+
+            _creds = Credentials(
+                token=os.environ.get("GOOGLE_ACCESS_TOKEN"),
+                refresh_token=os.environ.get("GOOGLE_REFRESH_TOKEN"),
+                token_uri=os.environ.get(
+                    "GOOGLE_TOKEN_URI", "https://oauth2.googleapis.com/token"
+                ),
+                client_id=os.environ.get("GOOGLE_CLIENT_ID"),
+                client_secret=os.environ.get("GOOGLE_CLIENT_SECRET"),
+                scopes=SCOPES,
+            )
+        return _creds
+
+
+def _build_request(http: Any, *args: Any, **kwargs: Any) -> Any:
+    """Create API requests bound to a per-thread authorized HTTP client.
+
+    httplib2 connections are not thread-safe and tool handlers run on a worker
+    pool, so each worker thread keeps its own connection. Every round trip is
+    timed per API method for ``/metrics``.
+    """
+    import httplib2
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.http import HttpRequest
+
+    local_http = getattr(_thread_local, "http", None)
+    if local_http is None:
+        local_http = AuthorizedHttp(_credentials(), http=httplib2.Http())
+        _thread_local.http = local_http
+    http = MeteredHttp(local_http, kwargs.get("methodId"))
+    return HttpRequest(http, *args, **kwargs)
+
 
-gmail_service = build("gmail", "v1", credentials=creds)
-calendar_service = build("calendar", "v3", credentials=creds)
+class _LazyService:
+    """Google API client built on first attribute access.
+
+    Building at import time made every server spawn pay for the discovery
+    client import. Discovery documents come from the copies bundled with
+    google-api-python-client, so construction never touches the network.
+    """
+
+    def __init__(self, name: str, version: str) -> None:
+        self._name = name
+        self._version = version
+        self._lock = threading.Lock()
+        self._service: Any = None
+
+    def _get(self) -> Any:
+        if self._service is None:
+            with self._lock:
+                if self._service is None:
+                    from googleapiclient.discovery import build
+
+                    self._service = build(
+                        self._name,
+                        self._version,
+                        credentials=_credentials(),
+                        requestBuilder=_build_request,
+                        static_discovery=True,
+                        cache_discovery=False,
+                    )
+        return self._service
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._get(), attr)
+
+
+gmail_service = _LazyService("gmail", "v1")
+calendar_service = _LazyService("calendar", "v3")
 
 app = FastAPI(title="Workspace MCP Server")
+tool_pool = ToolPool.from_env()
+gmail_mirror = GmailMirror.from_env()
+calendar_cache = CalendarCache.from_env()
+label_registry = LabelRegistry.from_env()
 
 # store last few tool invocations for debugging
 tool_history: List[str] = []
 
 
-@app.get("/tools")
-async def list_tools() -> list[dict[str, Any]]:
-    """Return the available tools and their schemas."""
-    return [
-        {
-            "name": "list_calendar_events",
-            "description": "List upcoming events from Google Calendar.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {
-                    "calendar_id": {
-                        "type": "string",
-                        "description": "Calendar identifier. Defaults to 'primary'.",
-                    },
-                    "max_results": {
-                        "type": "integer",
-                        "description": "Maximum number of events to return.",
-                    },
-                    "time_min": {"type": "string", "description": "ISO start time"},
-                    "time_max": {"type": "string", "description": "ISO end time"},
-                },
+registry = ToolRegistry()
+GMAIL_MAX_PAGE_SIZE = 500
+MAX_BULK_CALLS = 100
+# Listings longer than this are not kept in the mirror's listing cache.
+MAX_CACHED_IDS = 5000
+
+_CALENDAR_ID = {
+    "type": "string",
+    "description": "Calendar identifier. Defaults to 'primary'.",
+    "default": "primary",
+}
+_RANGE_PROPERTIES: dict[str, Any] = {
+    "start_date": {
+        "type": "string",
+        "description": "First day YYYY-MM-DD",
+        "minLength": 1,
+    },
+    "end_date": {
+        "type": "string",
+        "description": "Last day YYYY-MM-DD. Defaults to start_date.",
+    },
+    "work_start": {
+        "type": "string",
+        "description": "Start of working hours HH:MM.",
+        "default": "09:00",
+    },
+    "work_end": {
+        "type": "string",
+        "description": "End of working hours HH:MM.",
+        "default": "17:00",
+    },
+    "timezone": {
+        "type": "string",
+        "description": "IANA timezone name.",
+        "default": "UTC",
+    },
+}
+
+
+def _calendar_error(action: str, exc: Exception) -> dict[str, Any]:
+    return {
+        "type": "text",
+        "text": f"Unable to {action}. Please check your credentials. Error: {str(exc)}",
+    }
+
+
+def _parse_range(arguments: dict[str, Any]) -> list[Any]:
+    """Return working windows for validated range arguments or raise a 400."""
+    try:
+        first, last, work_start, work_end, tz = availability.parse_range(
+            arguments["start_date"],
+            arguments.get("end_date"),
+            arguments["work_start"],
+            arguments["work_end"],
+            arguments["timezone"],
+        )
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return availability.working_windows(first, last, work_start, work_end, tz)
+
+
+@registry.tool(
+    "list_calendar_events",
+    "List upcoming events from Google Calendar.",
+    {
+        "type": "object",
+        "properties": {
+            "calendar_id": _CALENDAR_ID,
+            "max_results": {
+                "type": "integer",
+                "description": "Maximum number of events to return.",
+                "minimum": 1,
+                "default": 10,
             },
+            "time_min": {"type": "string", "description": "ISO start time"},
+            "time_max": {"type": "string", "description": "ISO end time"},
         },
-        {
-            "name": "create_calendar_event",
-            "description": "Create a new Google Calendar event.",
-            "inputSchema": {
-                "type": "object",
-                "required": ["summary", "start", "end"],
-                "properties": {
-                    "calendar_id": {
-                        "type": "string",
-                        "description": "Calendar identifier. Defaults to 'primary'.",
-                    },
-                    "summary": {"type": "string", "description": "Event summary"},
-                    "start": {"type": "string", "description": "ISO start datetime"},
-                    "end": {"type": "string", "description": "ISO end datetime"},
-                    "attendees": {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "description": "Emails of attendees",
-                    },
-                },
+    },
+)
+def _list_calendar_events(arguments: dict[str, Any]) -> dict[str, Any]:
+    try:
+        events = calendar_cache.events_between(
+            calendar_service,
+            arguments["calendar_id"],
+            arguments.get("time_min"),
+            arguments.get("time_max"),
+        )[: arguments["max_results"]]
+        lines = []
+        for event in events:
+            start = event.get("start", {}).get("dateTime", event.get("start", {}).get("date", ""))
+            summary = event.get("summary", "(no title)")
+            lines.append(f"{start} {summary}")
+        text = "\n".join(lines) if lines else "No events found."
+        return {"type": "text", "text": text, "events": events}
+    except Exception as e:
+        logger.error(f"Error listing calendar events: {e}")
+        return _calendar_error("access calendar", e)
+
+
+@registry.tool(
+    "create_calendar_event",
+    "Create a new Google Calendar event.",
+    {
+        "type": "object",
+        "required": ["summary", "start", "end"],
+        "properties": {
+            "calendar_id": _CALENDAR_ID,
+            "summary": {"type": "string", "description": "Event summary"},
+            "start": {
+                "type": "string",
+                "description": "ISO start datetime",
+                "minLength": 1,
+            },
+            "end": {"type": "string", "description": "ISO end datetime", "minLength": 1},
+            "attendees": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Emails of attendees",
             },
         },
-        {
-            "name": "check_day_availability",
-            "description": "Return free slots for a specific day.",
-            "inputSchema": {
-                "type": "object",
-                "required": ["date"],
-                "properties": {
-                    "calendar_id": {
-                        "type": "string",
-                        "description": "Calendar identifier. Defaults to 'primary'.",
-                    },
-                    "date": {"type": "string", "description": "Date YYYY-MM-DD"},
-                },
+    },
+)
+def _create_calendar_event(arguments: dict[str, Any]) -> dict[str, Any]:
+    calendar_id = arguments["calendar_id"]
+    body: dict[str, Any] = {
+        "summary": arguments["summary"],
+        "start": {"dateTime": arguments["start"]},
+        "end": {"dateTime": arguments["end"]},
+    }
+    if arguments.get("attendees"):
+        body["attendees"] = [{"email": a} for a in arguments["attendees"]]
+    try:
+        created = calendar_service.events().insert(calendarId=calendar_id, body=body).execute()
+        calendar_cache.mark_stale(calendar_id)
+        return {"type": "text", "text": "Event created.", "id": created.get("id")}
+    except Exception as e:
+        logger.error(f"Error creating calendar event: {e}")
+        return _calendar_error("create calendar event", e)
+
+
+@registry.tool(
+    "check_day_availability",
+    "Return free slots for a specific day.",
+    {
+        "type": "object",
+        "required": ["date"],
+        "properties": {
+            "calendar_id": _CALENDAR_ID,
+            "date": {"type": "string", "description": "Date YYYY-MM-DD", "minLength": 1},
+        },
+    },
+)
+def _check_day_availability(arguments: dict[str, Any]) -> dict[str, Any]:
+    from datetime import datetime
+
+    date = arguments["date"]
+    start_of_day = f"{date}T00:00:00Z"
+    end_of_day = f"{date}T23:59:59Z"
+    try:
+        events = calendar_cache.events_between(
+            calendar_service, arguments["calendar_id"], start_of_day, end_of_day
+        )
+        if not events:
+            return {"type": "text", "text": "You are free all day on " + date}
+
+        # compute free slots between events
+        parsed = []
+        for ev in events:
+            start_date = ev.get("start", {}).get("date")
+            end_date = ev.get("end", {}).get("date")
+
+            s = ev.get("start", {}).get("dateTime")
+            if not s and start_date:
+                s = start_date + "T00:00:00Z"
+            elif not s:
+                s = start_of_day
+
+            e = ev.get("end", {}).get("dateTime")
+            if not e and end_date:
+                e = end_date + "T00:00:00Z"
+            elif not e:
+                e = end_of_day
+
+            parsed.append((datetime.fromisoformat(s.replace("Z", "+00:00")), datetime.fromisoformat(e.replace("Z", "+00:00")), ev.get("summary", "(No title)")))
+        parsed.sort(key=lambda t: t[0])
+        day_start = datetime.fromisoformat(start_of_day.replace("Z", "+00:00"))
+        day_end = datetime.fromisoformat(end_of_day.replace("Z", "+00:00"))
+
+        scheduled_events = []
+        for start, end, summary in parsed:
+            start_str = start.strftime("%I:%M %p")
+            end_str = end.strftime("%I:%M %p")
+            scheduled_events.append(f"{start_str} - {end_str}: {summary}")
+
+        free_slots = [
+            f"{s.strftime('%I:%M %p')} - {e.strftime('%I:%M %p')}"
+            for s, e in availability.free_slots(
+                [(s, e) for s, e, _ in parsed], day_start, day_end
+            )
+        ]
+
+        formatted_date = datetime.fromisoformat(date).strftime("%A, %B %d, %Y")
+        text = f"Schedule for {formatted_date}:\n\n"
+        text += "Scheduled Events:\n"
+        if scheduled_events:
+            text += "\n".join(scheduled_events)
+        else:
+            text += "No scheduled events\n"
+
+        text += "\n\nAvailable Time Slots:\n"
+        if free_slots:
+            text += "\n".join(free_slots)
+        else:
+            text += "No free time available"
+
+        return {"type": "text", "text": text}
+    except Exception as e:
+        logger.error(f"Error checking day availability: {e}")
+        return _calendar_error("check calendar availability", e)
+
+
+@registry.tool(
+    "check_range_availability",
+    "Return free slots within working hours for every day in a date range.",
+    {
+        "type": "object",
+        "required": ["start_date"],
+        "properties": {
+            "calendar_id": _CALENDAR_ID,
+            **_RANGE_PROPERTIES,
+            "min_minutes": {
+                "type": "integer",
+                "description": "Ignore free slots shorter than this.",
+                "minimum": 0,
+                "default": 0,
             },
         },
-        {
-            "name": "list_recent_emails",
-            "description": "List snippets of recent Gmail messages matching an optional search query.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "Gmail search query. Defaults to 'newer_than:1d'.",
-                    },
-                    "max_results": {
-                        "type": "integer",
-                        "description": "Maximum number of messages to return.",
-                    },
-                },
+    },
+)
+def _check_range_availability(arguments: dict[str, Any]) -> dict[str, Any]:
+    calendar_id = arguments["calendar_id"]
+    tz_name = arguments["timezone"]
+    windows = _parse_range(arguments)
+    try:
+        busy, errors = availability.query_busy(
+            calendar_service,
+            [calendar_id],
+            windows[0][1],
+            windows[-1][2],
+            tz_name,
+        )
+        days = availability.range_availability(
+            busy[calendar_id], windows, arguments["min_minutes"]
+        )
+        response = {
+            "type": "text",
+            "text": availability.format_range(days, tz_name),
+            "timezone": tz_name,
+            "days": days,
+        }
+        if errors:
+            response["errors"] = errors
+        return response
+    except Exception as e:
+        logger.error(f"Error checking range availability: {e}")
+        return _calendar_error("check calendar availability", e)
+
+
+@registry.tool(
+    "find_meeting_slots",
+    "Find times within working hours when every attendee is free.",
+    {
+        "type": "object",
+        "required": ["attendees", "duration_minutes", "start_date"],
+        "properties": {
+            "attendees": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Attendee emails or calendar ids.",
+                "minItems": 1,
+            },
+            "calendar_id": {
+                **_CALENDAR_ID,
+                "description": "Organizer calendar, always included. "
+                "Defaults to 'primary'.",
+            },
+            "duration_minutes": {
+                "type": "integer",
+                "description": "Meeting length in minutes.",
+                "minimum": 1,
+            },
+            **_RANGE_PROPERTIES,
+            "step_minutes": {
+                "type": "integer",
+                "description": "Candidate start granularity.",
+                "minimum": 1,
+                "default": 30,
+            },
+            "max_results": {
+                "type": "integer",
+                "description": "Number of candidate slots to return.",
+                "minimum": 1,
+                "default": 5,
             },
         },
-        {
-            "name": "count_emails_by_label",
-            "description": "Return the total number of messages with the given Gmail label ID.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {
-                    "label_id": {
-                        "type": "string",
-                        "description": "Label identifier (e.g. INBOX).",
-                    }
-                },
+    },
+)
+def _find_meeting_slots(arguments: dict[str, Any]) -> dict[str, Any]:
+    tz_name = arguments["timezone"]
+    windows = _parse_range(arguments)
+    tz = windows[0][1].tzinfo
+    try:
+        busy, errors = availability.query_busy(
+            calendar_service,
+            [arguments["calendar_id"], *arguments["attendees"]],
+            windows[0][1],
+            windows[-1][2],
+            tz_name,
+        )
+        slots = availability.find_common_slots(
+            busy,
+            windows,
+            arguments["duration_minutes"],
+            step_minutes=arguments["step_minutes"],
+            limit=arguments["max_results"],
+        )
+        lines = [
+            f"{s.astimezone(tz).strftime('%a %Y-%m-%d %I:%M %p')} - "
+            f"{e.astimezone(tz).strftime('%I:%M %p')}"
+            for s, e in slots
+        ]
+        response = {
+            "type": "text",
+            "text": "\n".join(lines) if lines else "No common free slots found.",
+            "timezone": tz_name,
+            "slots": [
+                {"start": s.astimezone(tz).isoformat(), "end": e.astimezone(tz).isoformat()}
+                for s, e in slots
+            ],
+        }
+        if errors:
+            # Calendars we cannot read are treated as free; report them.
+            response["errors"] = errors
+        return response
+    except Exception as e:
+        logger.error(f"Error finding meeting slots: {e}")
+        return _calendar_error("check calendar availability", e)
+
+
+@registry.tool(
+    "list_recent_emails",
+    "List snippets of recent Gmail messages matching an optional search query.",
+    {
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Gmail search query.",
+                "default": "newer_than:1d",
+            },
+            "label_ids": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Restrict results to these label ids.",
+            },
+            "max_results": {
+                "type": "integer",
+                "description": "Maximum number of messages to return per "
+                "label; result pages are followed as needed.",
+                "minimum": 1,
+                "default": 10,
+            },
+            "batch_size": {
+                "type": "integer",
+                "description": "Messages fetched per Gmail batch request.",
+                "minimum": 1,
+                "default": DEFAULT_BATCH_SIZE,
             },
         },
-        {
-            "name": "list_gmail_labels",
-            "description": "List all Gmail labels for the current user.",
-            "inputSchema": {"type": "object", "properties": {}},
+    },
+)
+def _list_recent_emails(arguments: dict[str, Any]) -> dict[str, Any]:
+    summary: dict[str, Any] = {"count": 0, "errors": [], "list_results": []}
+    label_map = _label_map()
+    raw_messages = list(_iter_recent_messages(arguments, summary))
+    lines = [_format_message(msg, label_map) for msg in raw_messages]
+    text = "\n\n".join(lines) if lines else "No recent emails found."
+    response = {
+        "type": "text",
+        "text": text,
+        "count": summary["count"],
+        "messages": raw_messages,
+    }
+    if summary["errors"]:
+        response["errors"] = summary["errors"]
+    log_call(
+        "list_recent_emails_raw",
+        arguments,
+        {"list_results": summary["list_results"], "messages": raw_messages},
+    )
+    return response
+
+
+@registry.tool(
+    "count_emails_by_label",
+    "Return the total number of messages with the given Gmail label ID.",
+    {
+        "type": "object",
+        "properties": {
+            "label_id": {
+                "type": "string",
+                "description": "Label identifier (e.g. INBOX).",
+                "default": "INBOX",
+            }
+        },
+    },
+)
+def _count_emails_by_label(arguments: dict[str, Any]) -> dict[str, Any]:
+    label_id = arguments["label_id"]
+    count = None
+    if gmail_mirror.sync_if_stale(gmail_service):
+        count = gmail_mirror.label_count(label_id)
+    if count is None:
+        info = gmail_service.users().labels().get(userId="me", id=label_id).execute()
+        count = info.get("messagesTotal", 0)
+        gmail_mirror.store_label_count(label_id, count)
+    return {"type": "text", "text": str(count)}
+
+
+@registry.tool(
+    "list_gmail_labels",
+    "List all Gmail labels for the current user.",
+    {
+        "type": "object",
+        "properties": {
+            "refresh": {
+                "type": "boolean",
+                "description": "Bypass the cached label list.",
+                "default": False,
+            }
         },
-        {
-            "name": "send_email",
-            "description": "Send an email using Gmail.",
-            "inputSchema": {
-                "type": "object",
-                "required": ["to", "message"],
-                "properties": {
-                    "to": {"type": "string", "description": "Recipient address."},
-                    "subject": {"type": "string", "description": "Email subject."},
-                    "message": {"type": "string", "description": "Email body."},
-                },
+    },
+)
+def _list_gmail_labels(arguments: dict[str, Any]) -> dict[str, Any]:
+    labels = label_registry.labels(gmail_service, refresh=arguments["refresh"])
+    lines = [f"{lbl['id']}: {lbl['name']}" for lbl in labels]
+    text = "\n".join(lines) if lines else "No labels found."
+    return {"type": "text", "text": text, "labels": labels}
+
+
+@registry.tool(
+    "send_email",
+    "Send an email using Gmail.",
+    {
+        "type": "object",
+        "required": ["to", "message"],
+        "properties": {
+            "to": {"type": "string", "description": "Recipient address.", "minLength": 1},
+            "subject": {
+                "type": "string",
+                "description": "Email subject.",
+                "default": "",
             },
+            "message": {"type": "string", "description": "Email body.", "minLength": 1},
         },
-    ]
+    },
+)
+def _send_email(arguments: dict[str, Any]) -> dict[str, Any]:
+    raw = base64.urlsafe_b64encode(
+        f"To: {arguments['to']}\r\nSubject: {arguments['subject']}\r\n\r\n"
+        f"{arguments['message']}".encode("utf-8")
+    ).decode("utf-8")
+    gmail_service.users().messages().send(userId="me", body={"raw": raw}).execute()
+    gmail_mirror.mark_stale()
+    return {"type": "text", "text": "Email sent."}
+
+
+@app.get("/tools")
+async def list_tools() -> list[dict[str, Any]]:
+    """Return the available tools and their schemas."""
+    return registry.schemas()
 
 
-@app.post("/call_tool")
-async def call_tool(payload: dict[str, Any] = Body(...)) -> dict[str, Any]:
-    """Invoke a tool by name with the supplied arguments."""
-    name = payload.get("name")
-    arguments = payload.get("arguments", {}) if isinstance(payload, dict) else {}
+def _validated(name: Any, arguments: Any) -> tuple[ToolSpec, dict[str, Any]]:
+    """Resolve ``name`` and validate ``arguments`` before any Google call."""
     if not name:
         raise HTTPException(status_code=400, detail="Missing 'name' field")
+    spec = registry.get(name)
+    if spec is None:
+        raise HTTPException(status_code=404, detail=f"Unknown tool: {name}")
+    try:
+        return spec, spec.validate(arguments)
+    except ArgumentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/call_tool", response_model=None)
+async def call_tool(
+    payload: dict[str, Any] = Body(...)
+) -> dict[str, Any] | StreamingResponse:
+    """Invoke a tool by name with the supplied arguments.
+
+    With ``"stream": true`` a streamable tool answers with NDJSON lines as
+    results arrive instead of a single JSON document.
+    """
+    spec, arguments = _validated(payload.get("name"), payload.get("arguments"))
+    name = spec.name
 
     tool_history.append(f"{name} {arguments}")
     if len(tool_history) > 50:
         tool_history.pop(0)
 
-    if name == "list_calendar_events":
-        calendar_id = arguments.get("calendar_id", "primary")
-        max_results = int(arguments.get("max_results", 10))
-        time_min = arguments.get("time_min")
-        time_max = arguments.get("time_max")
-        kwargs = {
-            "calendarId": calendar_id,
-            "maxResults": max_results,
-            "singleEvents": True,
-            "orderBy": "startTime",
-        }
-        if time_min:
-            kwargs["timeMin"] = time_min
-        if time_max:
-            kwargs["timeMax"] = time_max
-        
-        try:
-            events_result = calendar_service.events().list(**kwargs).execute()
-            events = events_result.get("items", [])
-            lines = []
-            for event in events:
-                start = event.get("start", {}).get("dateTime", event.get("start", {}).get("date", ""))
-                summary = event.get("summary", "(no title)")
-                lines.append(f"{start} {summary}")
-            text = "\n".join(lines) if lines else "No events found."
-            response = {"type": "text", "text": text, "events": events}
-        except Exception as e:
-            logger.error(f"Error listing calendar events: {e}")
-            response = {"type": "text", "text": f"Unable to access calendar. Please check your credentials. Error: {str(e)}"}
-        log_call(name, arguments, response)
-        return response
+    if payload.get("stream"):
+        if spec.stream is None:
+            raise HTTPException(status_code=400, detail=f"{name} cannot stream")
+        return StreamingResponse(
+            _timed_stream(name, tool_pool.stream(name, spec.stream(arguments))),
+            media_type="application/x-ndjson",
+        )
+    start = time.perf_counter()
+    try:
+        return await tool_pool.run(name, _dispatch, name, arguments)
+    except HTTPException as e:
+        tool_errors.inc(tool=name, status=e.status_code)
+        raise
+    except Exception:
+        tool_errors.inc(tool=name, status=500)
+        raise
+    finally:
+        tool_latency.observe(time.perf_counter() - start, tool=name)
 
-    if name == "create_calendar_event":
-        calendar_id = arguments.get("calendar_id", "primary")
-        summary = arguments.get("summary", "")
-        start = arguments.get("start")
-        end = arguments.get("end")
-        attendees = arguments.get("attendees", [])
-        if isinstance(attendees, str):
-            attendees = [attendees]
-        if not start or not end:
-            raise HTTPException(status_code=400, detail="Missing start or end")
-        body = {
-            "summary": summary,
-            "start": {"dateTime": start},
-            "end": {"dateTime": end},
-        }
-        if attendees:
-            body["attendees"] = [{"email": a} for a in attendees]
-        
-        try:
-            created = calendar_service.events().insert(calendarId=calendar_id, body=body).execute()
-            response = {"type": "text", "text": "Event created.", "id": created.get("id")}
-        except Exception as e:
-            logger.error(f"Error creating calendar event: {e}")
-            response = {"type": "text", "text": f"Unable to create calendar event. Please check your credentials. Error: {str(e)}"}
-        
-        log_call(name, arguments, response)
-        return response
 
-    if name == "check_day_availability":
-        calendar_id = arguments.get("calendar_id", "primary")
-        date = arguments.get("date")
-        if not date:
-            raise HTTPException(status_code=400, detail="Missing date")
-        start_of_day = f"{date}T00:00:00Z"
-        end_of_day = f"{date}T23:59:59Z"
-  
+async def _timed_stream(
+    name: str, chunks: AsyncIterator[bytes]
+) -> AsyncIterator[bytes]:
+    """Record a streamed call's latency once its last line is sent."""
+    start = time.perf_counter()
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except Exception:
+        tool_errors.inc(tool=name, status=500)
+        raise
+    finally:
+        tool_latency.observe(time.perf_counter() - start, tool=name)
+
+
+@app.post("/call_tools")
+async def call_tools(payload: dict[str, Any] = Body(...)) -> dict[str, Any]:
+    """Invoke several independent tools concurrently.
+
+    Expects ``{"calls": [{"name": ..., "arguments": {...}}, ...]}`` and returns
+    ``{"results": [...]}`` in request order, each with an HTTP-style
+    ``status`` and either ``result`` or ``error``. One failing call does not
+    affect the others; every call still goes through its tool's worker pool cap.
+    """
+    calls = payload.get("calls")
+    if not isinstance(calls, list):
+        raise HTTPException(status_code=400, detail="'calls' must be a list")
+    if len(calls) > MAX_BULK_CALLS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_BULK_CALLS} calls per request"
+        )
+
+    async def run_one(call: Any) -> dict[str, Any]:
+        if not isinstance(call, dict) or call.get("stream"):
+            return {"status": 400, "error": "Each call must be a non-streaming object"}
         try:
-            events_result = calendar_service.events().list(
-                calendarId=calendar_id,
-                timeMin=start_of_day,
-                timeMax=end_of_day,
-                singleEvents=True,
-                orderBy="startTime",
-            ).execute()
-            events = events_result.get("items", [])
-            
-            if not events:
-                response = {"type": "text", "text": "You are free all day on " + date}
-                log_call(name, arguments, response)
-                return response
-
-            # compute free slots between events
-            from datetime import datetime
-
-            fmt = "%Y-%m-%dT%H:%M:%S%z"
-            parsed = []
-            for ev in events:
-                start_date = ev.get("start", {}).get("date")
-                end_date = ev.get("end", {}).get("date")
-                
-                s = ev.get("start", {}).get("dateTime")
-                if not s and start_date:
-                    s = start_date + "T00:00:00Z"
-                elif not s:
-                    s = start_of_day
-                    
-                e = ev.get("end", {}).get("dateTime")
-                if not e and end_date:
-                    e = end_date + "T00:00:00Z"
-                elif not e:
-                    e = end_of_day
-                    
-                parsed.append((datetime.fromisoformat(s.replace("Z", "+00:00")), datetime.fromisoformat(e.replace("Z", "+00:00")), ev.get("summary", "(No title)")))
-            parsed.sort(key=lambda t: t[0])
-            day_start = datetime.fromisoformat(start_of_day.replace("Z", "+00:00"))
-            day_end = datetime.fromisoformat(end_of_day.replace("Z", "+00:00"))
-            
-            scheduled_events = []
-            for start, end, summary in parsed:
-                start_str = start.strftime("%I:%M %p")
-                end_str = end.strftime("%I:%M %p")
-                scheduled_events.append(f"{start_str} - {end_str}: {summary}")
-            
-            free_slots = []
-            cur = day_start
-            for s, e, _ in parsed:
-                if s > cur:
-                    start_str = cur.strftime("%I:%M %p")
-                    end_str = s.strftime("%I:%M %p")
-                    free_slots.append(f"{start_str} - {end_str}")
-                cur = max(cur, e)
-            if cur < day_end:
-                start_str = cur.strftime("%I:%M %p")
-                end_str = day_end.strftime("%I:%M %p")
-                free_slots.append(f"{start_str} - {end_str}")
-            
-            formatted_date = datetime.fromisoformat(date).strftime("%A, %B %d, %Y")
-            text = f"Schedule for {formatted_date}:\n\n"
-            text += "Scheduled Events:\n"
-            if scheduled_events:
-                text += "\n".join(scheduled_events)
-            else:
-                text += "No scheduled events\n"
-            
-            text += "\n\nAvailable Time Slots:\n"
-            if free_slots:
-                text += "\n".join(free_slots)
-            else:
-                text += "No free time available"
-            
-            response = {"type": "text", "text": text}
+            return {"status": 200, "result": await call_tool(call)}
+        except HTTPException as e:
+            return {"status": e.status_code, "error": e.detail}
         except Exception as e:
-            logger.error(f"Error checking day availability: {e}")
-            response = {"type": "text", "text": f"Unable to check calendar availability. Please check your credentials. Error: {str(e)}"}
-        
-        log_call(name, arguments, response)
-        return response
+            logger.error(f"Error in bulk call {call.get('name')}: {e}")
+            return {"status": 500, "error": str(e)}
 
-    if name == "list_recent_emails":
-        query = arguments.get("query", "newer_than:1d")
-        label_ids = arguments.get("label_ids") or []
-        if isinstance(label_ids, str):
-            label_ids = [label_ids]
-        max_results = int(arguments.get("max_results", 10))
-
-        label_map = {
-            lbl["id"]: lbl["name"]
-            for lbl in gmail_service.users()
-            .labels()
-            .list(userId="me")
-            .execute()
-            .get("labels", [])
-        }
+    return {"results": await asyncio.gather(*(run_one(c) for c in calls))}
 
-        collected: list[dict[str, str]] = []
-        seen: set[str] = set()
-        raw_messages: list[dict[str, Any]] = []
-        list_results: list[dict[str, Any]] = []
 
-        def fetch_for_label(lid: str | None) -> None:
-            kwargs = {"userId": "me", "q": query, "maxResults": max_results}
+def _dispatch(name: str, arguments: dict[str, Any]) -> dict[str, Any]:
+    """Run the blocking Google API calls for ``name`` on a worker thread.
+
+    ``arguments`` must already have passed the tool's validator.
+    """
+    spec = registry.get(name)
+    if spec is None:
+        raise HTTPException(status_code=404, detail=f"Unknown tool: {name}")
+    response = spec.handler(arguments)
+    log_call(name, arguments, response)
+    return response
+
+
+def _label_map() -> dict[str, str]:
+    return label_registry.names(gmail_service)
+
+
+def _format_message(msg: dict[str, Any], label_map: dict[str, str]) -> str:
+    headers = {h["name"]: h["value"] for h in msg.get("payload", {}).get("headers", [])}
+    subject = headers.get("Subject", "(no subject)")
+    sender = headers.get("From", "(unknown)")
+    date_str = headers.get("Date", "(unknown)")
+    snippet = msg.get("snippet", "")
+    lbl_names = [label_map.get(lid, lid) for lid in msg.get("labelIds", [])]
+    return (
+        f"Date: {date_str}\nFrom: {sender}\nSubject: {subject}\n"
+        f"Labels: {', '.join(lbl_names)}\n{snippet}"
+    )
+
+
+def _iter_message_ids(
+    query: str,
+    label_ids: list[str],
+    max_results: int,
+    list_results: list[dict[str, Any]] | None,
+) -> Iterator[list[str]]:
+    """Yield pages of unseen message ids, following ``nextPageToken``.
+
+    Each label query stops after ``max_results`` ids.
+    """
+    seen: set[str] = set()
+    for lid in label_ids or [None]:
+        remaining = max_results
+        page_token = None
+        while remaining > 0:
+            kwargs: dict[str, Any] = {
+                "userId": "me",
+                "q": query,
+                "maxResults": min(remaining, GMAIL_MAX_PAGE_SIZE),
+            }
             if lid:
                 kwargs["labelIds"] = [lid]
+            if page_token:
+                kwargs["pageToken"] = page_token
             result = gmail_service.users().messages().list(**kwargs).execute()
-            list_results.append(result)
-            for m in result.get("messages", []):
-                if m["id"] not in seen:
-                    seen.add(m["id"])
-                    collected.append(m)
-
-        if label_ids:
-            for lid in label_ids:
-                fetch_for_label(lid)
-        else:
-            fetch_for_label(None)
-
-        lines: list[str] = []
-        for m in collected:
-            msg = (
-                gmail_service.users()
-                .messages()
-                .get(
-                    userId="me",
-                    id=m["id"],
-                    format="metadata",
-                    metadataHeaders=["Subject", "From", "Date"],
-                )
-                .execute()
-            )
-            raw_messages.append(msg)
-            headers = {
-                h["name"]: h["value"] for h in msg.get("payload", {}).get("headers", [])
-            }
-            subject = headers.get("Subject", "(no subject)")
-            sender = headers.get("From", "(unknown)")
-            date_str = headers.get("Date", "(unknown)")
-            snippet = msg.get("snippet", "")
-            lbl_names = [label_map.get(lid, lid) for lid in msg.get("labelIds", [])]
-            lines.append(
-                f"Date: {date_str}\nFrom: {sender}\nSubject: {subject}\nLabels: {', '.join(lbl_names)}\n{snippet}"
+            if list_results is not None:
+                list_results.append(result)
+            page = [m["id"] for m in result.get("messages", [])][:remaining]
+            remaining -= len(page)
+            new = [mid for mid in page if mid not in seen]
+            seen.update(new)
+            if new:
+                yield new
+            page_token = result.get("nextPageToken")
+            if not page_token or not page:
+                break
+
+
+def _iter_recent_messages(
+    arguments: dict[str, Any], summary: dict[str, Any]
+) -> Iterator[dict[str, Any]]:
+    """Yield message metadata for ``list_recent_emails`` as pages arrive.
+
+    Only one batch of messages is held at a time; ``summary`` collects the
+    listed id count, per-message errors and (when it is a list) the raw
+    ``messages.list`` results.
+    """
+    query = arguments.get("query", "newer_than:1d")
+    label_ids = arguments.get("label_ids") or []
+    if isinstance(label_ids, str):
+        label_ids = [label_ids]
+    max_results = int(arguments.get("max_results", 10))
+    batch_size = int(arguments.get("batch_size", DEFAULT_BATCH_SIZE))
+
+    mirror_current = gmail_mirror.sync_if_stale(gmail_service)
+    cache_key = json.dumps([query, sorted(label_ids), max_results])
+    cached = gmail_mirror.cached_ids(cache_key) if mirror_current else None
+    pages: Iterable[list[str]] = (
+        [cached]
+        if cached is not None
+        else _iter_message_ids(query, label_ids, max_results, summary["list_results"])
+    )
+    listed: list[str] | None = [] if cached is None else None
+
+    for page in pages:
+        summary["count"] += len(page)
+        if listed is not None and len(listed) < MAX_CACHED_IDS:
+            listed.extend(page)
+        for i in range(0, len(page), batch_size):
+            chunk = page[i : i + batch_size]
+            # Metadata for messages already in the mirror is served locally;
+            # only ids the mirror has never seen are fetched from Gmail.
+            by_id = gmail_mirror.get_many(chunk) if mirror_current else {}
+            missing = [mid for mid in chunk if mid not in by_id]
+            fetched, errors = fetch_message_metadata(
+                gmail_service, missing, batch_size=batch_size
             )
-        text = "\n\n".join(lines) if lines else "No recent emails found."
-        response = {
-            "type": "text",
-            "text": text,
-            "count": len(collected),
-            "messages": raw_messages,
-        }
-        log_call(
-            f"{name}_raw",
-            arguments,
-            {"list_results": list_results, "messages": raw_messages},
-        )
-        log_call(name, arguments, response)
-        return response
+            summary["errors"].extend(errors)
+            gmail_mirror.put_many(fetched)
+            by_id.update((msg["id"], msg) for msg in fetched)
+            for mid in chunk:
+                if mid in by_id:
+                    yield by_id[mid]
 
-    if name == "count_emails_by_label":
-        label_id = arguments.get("label_id", "INBOX")
-        info = gmail_service.users().labels().get(userId="me", id=label_id).execute()
-        count = info.get("messagesTotal", 0)
-        response = {"type": "text", "text": str(count)}
-        log_call(name, arguments, response)
-        return response
+    if listed is not None and mirror_current and len(listed) < MAX_CACHED_IDS:
+        gmail_mirror.store_ids(cache_key, listed)
 
-    if name == "list_gmail_labels":
-        result = gmail_service.users().labels().list(userId="me").execute()
-        labels = result.get("labels", [])
-        lines = [f"{lbl['id']}: {lbl['name']}" for lbl in labels]
-        text = "\n".join(lines) if lines else "No labels found."
-        response = {"type": "text", "text": text}
-        log_call(name, arguments, response)
-        return response
 
-    if name == "send_email":
-        to_addr = arguments.get("to")
-        subject = arguments.get("subject", "")
-        message = arguments.get("message")
-        if not to_addr or not message:
-            raise HTTPException(status_code=400, detail="Missing required fields")
-        raw = base64.urlsafe_b64encode(
-            f"To: {to_addr}\r\nSubject: {subject}\r\n\r\n{message}".encode("utf-8")
-        ).decode("utf-8")
-        gmail_service.users().messages().send(userId="me", body={"raw": raw}).execute()
-        response = {"type": "text", "text": "Email sent."}
-        log_call(name, arguments, response)
-        return response
+@registry.streams("list_recent_emails")
+def _stream_recent_emails(arguments: dict[str, Any]) -> Iterator[bytes]:
+    """Encode ``list_recent_emails`` results as NDJSON, one message per line."""
+    summary: dict[str, Any] = {"count": 0, "errors": [], "list_results": None}
+    try:
+        label_map = _label_map()
+        for msg in _iter_recent_messages(arguments, summary):
+            line = {"type": "message", "text": _format_message(msg, label_map)}
+            line["message"] = msg
+            yield (json.dumps(line) + "\n").encode("utf-8")
+        done: dict[str, Any] = {"type": "done", "count": summary["count"]}
+        if summary["errors"]:
+            done["errors"] = summary["errors"]
+    except Exception as e:
+        logger.error(f"Error streaming recent emails: {e}")
+        done = {"type": "error", "detail": str(e), "count": summary["count"]}
+    log_call("list_recent_emails", arguments, done)
+    yield (json.dumps(done) + "\n").encode("utf-8")
+
+
+@app.get("/pool_stats")
+async def pool_stats() -> dict[str, dict[str, int]]:
+    """Return queue depth and completion counters for each tool."""
+    return tool_pool.snapshot()
+
 
-    raise HTTPException(status_code=404, detail=f"Unknown tool: {name}")
+@app.get("/mirror_stats")
+async def mirror_stats() -> dict[str, Any]:
+    """Return Gmail mirror hit/fetch counters and the current history id."""
+    return {**gmail_mirror.stats, "history_id": gmail_mirror.history_id}
+
+
+@app.get("/calendar_cache_stats")
+async def calendar_cache_stats() -> dict[str, int]:
+    """Return calendar cache hit/miss and sync counters."""
+    return dict(calendar_cache.stats)
+
+
+@app.get("/label_registry_stats")
+async def label_registry_stats() -> dict[str, int]:
+    """Return label registry hit and refresh counters."""
+    return dict(label_registry.stats)
+
+
+@app.get("/metrics")
+async def prometheus_metrics() -> Response:
+    """Return tool and Google API latency, error and byte counters."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+def _latency_rows(histogram: Any, key: str) -> str:
+    return "\n".join(
+        f"<tr><td>{row['labels'].get(key, '')}</td><td>{row['count']}</td>"
+        + "".join(f"<td>{row[p] * 1000:.1f}</td>" for p in ("p50", "p95", "p99"))
+        + "</tr>"
+        for row in latency_table(histogram)
+    )
 
 
 @app.get("/dev", response_class=HTMLResponse)
 async def dev_page() -> str:
     rows = "\n".join(f"<li>{entry}</li>" for entry in reversed(tool_history))
-    return f"<html><body><h1>Recent Tool Calls</h1><ul>{rows}</ul></body></html>"
+    pool_rows = "\n".join(
+        f"<tr><td>{tool}</td><td>{s['limit']}</td><td>{s['waiting']}</td>"
+        f"<td>{s['running']}</td><td>{s['completed']}</td><td>{s['failed']}</td></tr>"
+        for tool, s in tool_pool.snapshot().items()
+    )
+    latency_header = (
+        "<th>Count</th><th>p50 (ms)</th><th>p95 (ms)</th><th>p99 (ms)</th></tr>"
+    )
+    return (
+        "<html><body><h1>Recent Tool Calls</h1>"
+        f"<ul>{rows}</ul>"
+        "<h2>Worker Pool</h2><table><tr><th>Tool</th><th>Limit</th>"
+        "<th>Waiting</th><th>Running</th><th>Completed</th><th>Failed</th></tr>"
+        f"{pool_rows}</table>"
+        f"<h2>Tool Latency</h2><table><tr><th>Tool</th>{latency_header}"
+        f"{_latency_rows(tool_latency, 'tool')}</table>"
+        f"<h2>Google API Latency</h2><table><tr><th>Method</th>{latency_header}"
+        f"{_latency_rows(upstream_latency, 'method')}</table></body></html>"
+    )
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     port = int(os.environ.get("PORT", "8001"))
     uvicorn.run(app, host="0.0.0.0", port=port)
@@ -3,12 +3,24 @@ document.addEventListener('DOMContentLoaded', function() {
     const forms = document.querySelectorAll('form');
     
     forms.forEach(form => {
-        form.addEventListener('submit', function() {
+        form.addEventListener('submit', function(event) {
             const submitBtn = this.querySelector('button[type="submit"]');
+            const label = submitBtn ? submitBtn.innerHTML : '';
             if (submitBtn) {
                 submitBtn.innerHTML = '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> Loading...';
                 submitBtn.disabled = true;
             }
+            // Forms with a stream URL render the summary as it is generated;
+            // without EventSource they fall back to a normal POST.
+            if (this.dataset.streamUrl && window.EventSource) {
+                event.preventDefault();
+                streamSummary(this, function() {
+                    if (submitBtn) {
+                        submitBtn.innerHTML = label;
+                        submitBtn.disabled = false;
+                    }
+                });
+            }
         });
     });
     
@@ -23,3 +35,35 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 });
+
+function streamSummary(form, finished) {
+    const panel = document.getElementById(form.dataset.streamTarget);
+    const params = new URLSearchParams(new FormData(form));
+    const source = new EventSource(form.dataset.streamUrl + '?' + params.toString());
+
+    panel.innerHTML = '<div class="card shadow"><div class="card-header"><h3 class="mb-0"></h3></div>'
+        + '<div class="card-body"><p class="text-muted small stream-status"></p>'
+        + '<div class="email-summary"></div></div></div>';
+    panel.querySelector('h3').textContent = form.dataset.streamTitle || 'Summary';
+    const status = panel.querySelector('.stream-status');
+    const output = panel.querySelector('.email-summary');
+
+    source.addEventListener('status', function(e) {
+        status.textContent = JSON.parse(e.data);
+    });
+    source.addEventListener('token', function(e) {
+        output.textContent += JSON.parse(e.data);
+    });
+    source.addEventListener('done', function(e) {
+        output.innerHTML = JSON.parse(e.data).html;
+        source.close();
+        finished();
+    });
+    source.addEventListener('error', function(e) {
+        status.classList.replace('text-muted', 'text-danger');
+        // Server-sent errors carry a message; connection errors do not.
+        status.textContent = e.data ? JSON.parse(e.data) : 'Connection to the server was lost.';
+        source.close();
+        finished();
+    });
+}
@@ -1,14 +1,26 @@
+import json
 import os
+from functools import lru_cache
 import subprocess
+import sys
 import threading
 import requests
 from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify
 from dotenv import load_dotenv
 
+MCP_DIR = os.path.join(os.path.dirname(__file__), "MCP")
+# MCP modules import their siblings by top-level name, as they do when run
+# from that directory.
+sys.path.insert(0, MCP_DIR)
+
+from llm_service import shared_service  # noqa: E402
+from log_index import INDEX_NAME, query_logs  # noqa: E402
+from metrics import CONTENT_TYPE, REGISTRY  # noqa: E402
+
 load_dotenv()
 
-MCP_DIR = os.path.join(os.path.dirname(__file__), "MCP")
+LOG_DIR = os.getenv("MCP_LOG_DIR", os.path.join(os.path.dirname(__file__), "logs"))
 
 app = Flask(__name__, 
             template_folder='templates',
@@ -16,6 +28,7 @@ app = Flask(__name__,
 app.secret_key = os.urandom(24)
 
 SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:8001")
+DEFAULT_TIMEZONE = os.getenv("MCP_TIMEZONE", "UTC")
 
 def start_server() -> subprocess.Popen:
     """Launch workspace_mcp_server.py as a subprocess."""
@@ -92,23 +105,41 @@ def create_event():
 @app.route('/check_availability', methods=['GET', 'POST'])
 def check_availability():
     availability_data = None
+    availability_days = None
     
     if request.method == 'POST':
         date_str = request.form.get('date')
+        end_date = request.form.get('end_date')
         
-        payload = {
-            "name": "check_day_availability",
-            "arguments": {"date": date_str},
-        }
+        if end_date:
+            payload = {
+                "name": "check_range_availability",
+                "arguments": {
+                    "start_date": date_str,
+                    "end_date": end_date,
+                    "work_start": request.form.get('work_start') or "09:00",
+                    "work_end": request.form.get('work_end') or "17:00",
+                    "timezone": request.form.get('timezone') or DEFAULT_TIMEZONE,
+                },
+            }
+        else:
+            payload = {
+                "name": "check_day_availability",
+                "arguments": {"date": date_str},
+            }
         
         try:
             resp = requests.post(f"{SERVER_URL}/call_tool", json=payload, timeout=30)
             resp.raise_for_status()
             availability_data = resp.json().get("text", "")
+            availability_days = resp.json().get("days")
         except requests.RequestException as e:
             flash(f'Error checking availability: {str(e)}', 'error')
     
-    return render_template('availability.html', availability_data=availability_data)
+    return render_template('availability.html',
+                           availability_data=availability_data,
+                           availability_days=availability_days,
+                           default_timezone=DEFAULT_TIMEZONE)
 
 @app.route('/api/list_events', methods=['GET'])
 def list_events_api():
@@ -133,62 +164,169 @@ def list_events_api():
     except requests.RequestException as e:
         return jsonify({"error": str(e)}), 500
 
+EMAIL_SYSTEM_PROMPT = "You are an assistant that answers questions about the users recent emails based only on the snippets provided."
+DEFAULT_QUESTION = "Summarize the last week's emails with important highlights and stats."
+
+def important_label_ids():
+    """Return the ids of labels marked important in gmail_labels.csv."""
+    import csv
+
+    labels = []
+    label_csv = os.path.join(MCP_DIR, "gmail_labels.csv")
+    if os.path.exists(label_csv):
+        with open(label_csv, newline="") as fh:
+            for row in csv.DictReader(fh):
+                if row.get("important", "").lower() == "true":
+                    labels.append(row["id"])
+    return labels
+
+def fetch_emails_text(query, labels, max_results):
+    """Return the formatted text and count of the matching emails."""
+    payload = {
+        "name": "list_recent_emails",
+        "arguments": {
+            "query": query,
+            "label_ids": labels,
+            "max_results": max_results
+        }
+    }
+    resp = requests.post(f"{SERVER_URL}/call_tool", json=payload, timeout=30)
+    resp.raise_for_status()
+    return resp.json().get("text", ""), resp.json().get("count", 0)
+
+def email_chat_messages(emails_text, question, system=EMAIL_SYSTEM_PROMPT):
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": f"Emails:\n{emails_text}\n\nQuestion: {question}"}
+    ]
+
+def sse(event, data):
+    """Format one server-sent event; ``data`` is sent as JSON."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def summary_stream(events):
+    """Stream ``(event, data)`` pairs to an EventSource.
+
+    ``token`` events carry pieces of the summary as the LLM produces them;
+    the closing ``done`` event carries the whole summary rendered the same
+    way as the non-streaming page. Failures end the stream with ``error``.
+    """
+    def generate():
+        parts = []
+        try:
+            for event, data in events:
+                if event == "token":
+                    parts.append(data)
+                yield sse(event, data)
+            yield sse("done", {"html": str(format_email("".join(parts)))})
+        except Exception as e:
+            yield sse("error", str(e))
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        # Proxies must not buffer, or the first token arrives with the last.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.route('/summarize_emails', methods=['GET', 'POST'])
 def summarize_emails():
     summary = None
     
     if request.method == 'POST':
         query = request.form.get('query', 'newer_than:7d')
-        question = request.form.get('question', 'Summarize the last week\'s emails with important highlights and stats.')
+        question = request.form.get('question', DEFAULT_QUESTION)
         max_results = int(request.form.get('max_results', '10'))
         
         labels = []
         try:
-            import csv
-            from pathlib import Path
-            
-            LABEL_CSV = os.path.join(MCP_DIR, "gmail_labels.csv")
-            if os.path.exists(LABEL_CSV):
-                with open(LABEL_CSV, newline="") as fh:
-                    for row in csv.DictReader(fh):
-                        if row.get("important", "").lower() == "true":
-                            labels.append(row["id"])
+            labels = important_label_ids()
         except Exception as e:
             flash(f'Error loading labels: {str(e)}', 'error')
         
         try:
-            payload = {
-                "name": "list_recent_emails",
-                "arguments": {
-                    "query": query,
-                    "label_ids": labels,
-                    "max_results": max_results
-                }
-            }
-            resp = requests.post(f"{SERVER_URL}/call_tool", json=payload, timeout=30)
-            resp.raise_for_status()
-            
-            emails_text = resp.json().get("text", "")
-            email_count = resp.json().get("count", 0)
-            
-            from MCP.llm_service import get_service
-            
-            llm = get_service()
-            messages = [
-                {
-                    "role": "system",
-                    "content": "You are an assistant that answers questions about the users recent emails based only on the snippets provided."
-                },
-                {"role": "user", "content": f"Emails:\n{emails_text}\n\nQuestion: {question}"}
-            ]
-            
-            summary = llm.chat(messages)
+            emails_text, email_count = fetch_emails_text(query, labels, max_results)
+            summary = shared_service().chat(email_chat_messages(emails_text, question))
             flash(f'Found {email_count} emails matching your query.', 'success')
         except Exception as e:
             flash(f'Error summarizing emails: {str(e)}', 'error')
     
     return render_template('summarize_emails.html', summary=summary)
 
+@app.route('/summarize_emails/stream')
+def summarize_emails_stream():
+    """Server-sent events version of ``summarize_emails`` for the page's JS."""
+    query = request.args.get('query', 'newer_than:7d')
+    question = request.args.get('question', DEFAULT_QUESTION)
+    max_results = request.args.get('max_results', 10, type=int)
+
+    def events():
+        try:
+            labels = important_label_ids()
+        except Exception as e:
+            labels = []
+            yield "status", f'Error loading labels: {str(e)}'
+        emails_text, email_count = fetch_emails_text(query, labels, max_results)
+        yield "status", f'Found {email_count} emails matching your query.'
+        messages = email_chat_messages(emails_text, question)
+        for piece in shared_service().chat_stream(messages):
+            yield "token", piece
+
+    return summary_stream(events())
+
+@lru_cache(maxsize=1)
+def day_rollups():
+    """Return the day summary store shared with the CLI agents.
+
+    Built once per process; the store is safe to use from request threads.
+    """
+    from summarizer import MapReduceSummarizer
+    from summary_store import RollupSummarizer
+
+    system = "You are an assistant that answers questions about the users emails based only on the snippets provided."
+
+    def ask(question, emails_text):
+        return shared_service().chat(email_chat_messages(emails_text, question, system))
+
+    def ask_stream(question, emails_text):
+        return shared_service().chat_stream(email_chat_messages(emails_text, question, system))
+
+    return RollupSummarizer.from_env(MapReduceSummarizer.from_env(ask, ask_stream))
+
+def fetch_email_messages(query, max_results):
+    """Return ``{"id", "internalDate", "text"}`` for each matching email."""
+    payload = {
+        "name": "list_recent_emails",
+        "arguments": {"query": query, "max_results": max_results},
+        "stream": True,
+    }
+    messages = []
+    with requests.post(f"{SERVER_URL}/call_tool", json=payload, timeout=30, stream=True) as resp:
+        resp.raise_for_status()
+        for raw in resp.iter_lines():
+            if not raw:
+                continue
+            line = json.loads(raw)
+            if line["type"] == "message":
+                message = line.get("message", {})
+                messages.append({
+                    "id": message.get("id", ""),
+                    "internalDate": message.get("internalDate"),
+                    "text": line["text"],
+                })
+            elif line["type"] == "error":
+                raise RuntimeError(line["detail"])
+    return messages
+
+def day_query(date_str):
+    """Return the Gmail query for the emails received on ``date_str``.
+
+    Bounds are epoch seconds of the day in ``MCP_TIMEZONE``, the timezone
+    the summary store files messages under.
+    """
+    start, end = day_rollups().day_bounds(date_str)
+    return f"after:{start} before:{end}"
+
 @app.route('/review_day', methods=['GET', 'POST'])
 def review_day():
     summary = None
@@ -197,40 +335,43 @@ def review_day():
         date_str = request.form.get('date')
         
         try:
-            from datetime import datetime, timedelta
-            date = datetime.strptime(date_str, "%Y-%m-%d")
-            next_day = date + timedelta(days=1)
-            query = f"after:{date.strftime('%Y/%m/%d')} before:{next_day.strftime('%Y/%m/%d')}"
-            question = f"Summarize all emails from {date_str} in detail."
-            
-            payload = {
-                "name": "list_recent_emails",
-                "arguments": {
-                    "query": query,
-                    "max_results": 50
-                }
-            }
-            resp = requests.post(f"{SERVER_URL}/call_tool", json=payload, timeout=30)
-            resp.raise_for_status()
-            
-            emails_text = resp.json().get("text", "")
-            email_count = resp.json().get("count", 0)
-            
-            from MCP.llm_service import get_service
-            
-            llm = get_service()
-            messages = [
-                {"role": "system", "content": "You are an assistant that answers questions about the users emails based only on the snippets provided."},
-                {"role": "user", "content": f"Emails:\n{emails_text}\n\nQuestion: {question}"}
-            ]
+            query = day_query(date_str)
             
-            summary = llm.chat(messages)
-            flash(f'Found {email_count} emails on {date_str}.', 'success')
+            # Finished days are answered from the summary store without
+            # fetching; otherwise only new messages cost LLM calls.
+            rollups = day_rollups()
+            summary = rollups.cached_day(date_str)
+            if summary is not None:
+                flash(f'Loaded stored summary for {date_str}.', 'success')
+            else:
+                messages = fetch_email_messages(query, 50)
+                summary = rollups.summarize_day(date_str, messages)
+                flash(f'Found {len(messages)} emails on {date_str}.', 'success')
         except Exception as e:
             flash(f'Error reviewing day: {str(e)}', 'error')
     
     return render_template('review_day.html', summary=summary)
 
+@app.route('/review_day/stream')
+def review_day_stream():
+    """Server-sent events version of ``review_day`` for the page's JS."""
+    date_str = request.args.get('date', '')
+
+    def events():
+        query = day_query(date_str)
+        rollups = day_rollups()
+        summary = rollups.cached_day(date_str)
+        if summary is not None:
+            yield "status", f'Loaded stored summary for {date_str}.'
+            yield "token", summary
+            return
+        messages = fetch_email_messages(query, 50)
+        yield "status", f'Found {len(messages)} emails on {date_str}.'
+        for piece in rollups.summarize_day_stream(date_str, messages):
+            yield "token", piece
+
+    return summary_stream(events())
+
 @app.route('/count_emails', methods=['GET', 'POST'])
 def count_emails():
     labels = []
@@ -241,15 +382,33 @@ def count_emails():
         resp = requests.post(f"{SERVER_URL}/call_tool", json=payload, timeout=30)
         resp.raise_for_status()
         
-        text = resp.json().get("text", "")
-        for line in text.splitlines():
-            if ":" in line:
-                label_id, name = line.split(":", 1)
-                labels.append({"id": label_id.strip(), "name": name.strip()})
+        labels = [
+            {"id": lbl['id'], "name": lbl['name']}
+            for lbl in resp.json().get("labels", [])
+        ]
     except Exception as e:
         flash(f'Error loading labels: {str(e)}', 'error')
     
-    if request.method == 'POST':
+    all_counts = None
+    if request.method == 'POST' and 'count_all' in request.form:
+        try:
+            calls = [
+                {"name": "count_emails_by_label", "arguments": {"label_id": label['id']}}
+                for label in labels
+            ]
+            resp = requests.post(f"{SERVER_URL}/call_tools", json={"calls": calls}, timeout=60)
+            resp.raise_for_status()
+            
+            all_counts = []
+            for label, item in zip(labels, resp.json().get("results", [])):
+                if item.get("status") == 200:
+                    count = item["result"].get("text", "0")
+                else:
+                    count = f"error: {item.get('error')}"
+                all_counts.append({"label_id": label['id'], "label_name": label['name'], "count": count})
+        except Exception as e:
+            flash(f'Error counting emails: {str(e)}', 'error')
+    elif request.method == 'POST':
         label_id = request.form.get('label_id')
         
         try:
@@ -272,7 +431,7 @@ def count_emails():
         except Exception as e:
             flash(f'Error counting emails: {str(e)}', 'error')
     
-    return render_template('count_emails.html', labels=labels, count_result=count_result)
+    return render_template('count_emails.html', labels=labels, count_result=count_result, all_counts=all_counts)
 
 @app.route('/labels', methods=['GET', 'POST'])
 def manage_labels():
@@ -291,26 +450,20 @@ def manage_labels():
     if request.method == 'POST':
         if 'sync_labels' in request.form:
             try:
-                payload = {"name": "list_gmail_labels", "arguments": {}}
+                payload = {"name": "list_gmail_labels", "arguments": {"refresh": True}}
                 resp = requests.post(f"{SERVER_URL}/call_tool", json=payload, timeout=30)
                 resp.raise_for_status()
                 
-                text = resp.json().get("text", "")
                 new_labels = []
-                for line in text.splitlines():
-                    if ":" in line:
-                        label_id, name = line.split(":", 1)
-                        label_id = label_id.strip()
-                        name = name.strip()
-                        
-                        existing = next((lbl for lbl in labels if lbl['id'] == label_id), None)
-                        important = "True" if existing and existing.get('important') == "True" else "False"
-                        
-                        new_labels.append({
-                            "id": label_id,
-                            "name": name,
-                            "important": important
-                        })
+                for lbl in resp.json().get("labels", []):
+                    existing = next((old for old in labels if old['id'] == lbl['id']), None)
+                    important = "True" if existing and existing.get('important') == "True" else "False"
+                    
+                    new_labels.append({
+                        "id": lbl['id'],
+                        "name": lbl['name'],
+                        "important": important
+                    })
                 
                 with open(LABEL_CSV, "w", newline="") as fh:
                     writer = csv.DictWriter(fh, fieldnames=["id", "name", "important"])
@@ -347,27 +500,37 @@ def manage_labels():
 
 @app.route('/server_logs')
 def server_logs():
-    log_entries = []
-    
     console_output = "\n".join(server_output_lines[-50:]) if server_output_lines else "No server output available."
     
-    LOG_FILE = os.path.join(os.path.dirname(__file__), 'logs', 'app.log')
-    if os.path.exists(LOG_FILE):
-        try:
-            import json
-            with open(LOG_FILE, 'r') as f:
-                log_lines = f.readlines()[-20:]  # Last 20 entries
-                
-                for line in log_lines:
-                    try:
-                        log_entry = json.loads(line.strip())
-                        log_entries.append(log_entry)
-                    except:
-                        pass  # Skip malformed JSON lines
-        except Exception as e:
-            flash(f'Error reading log file: {str(e)}', 'error')
+    # Log entries are loaded by the page from /api/logs.
+    return render_template('server_logs.html', console_output=console_output)
+
+@app.route('/metrics')
+def metrics():
+    """Expose latency and byte counters for LLM calls made by the web GUI."""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+@app.route('/api/logs')
+def api_logs():
+    """Return indexed log entries, newest first, as JSON.
     
-    return render_template('server_logs.html', log_entries=log_entries, console_output=console_output)
+    Query parameters: name, module, since, until (ISO 8601, UTC unless an
+    offset is given), before (cursor from a previous page's next_before)
+    and limit.
+    """
+    try:
+        result = query_logs(
+            os.path.join(LOG_DIR, INDEX_NAME),
+            name=request.args.get('name') or None,
+            module=request.args.get('module') or None,
+            since=request.args.get('since') or None,
+            until=request.args.get('until') or None,
+            before=request.args.get('before', type=int),
+            limit=request.args.get('limit', 20, type=int),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result)
 
 @app.template_filter('nl2br')
 def nl2br(value):